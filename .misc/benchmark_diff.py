@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Compares the time ``coalib.results.PatienceDiff.get_opcodes`` and
+``difflib.SequenceMatcher`` take to diff generated files, and the number of
+lines they report as changed. Run it from the repository root, optionally
+with the line counts to use::
+
+    python3 .misc/benchmark_diff.py 10000 100000
+"""
+
+import difflib
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from coalib.results.PatienceDiff import get_opcodes  # noqa: E402
+
+
+def generate_code(lines, rand):
+    return ['    value_{} = compute({}, {})\n'.format(
+                index, rand.randrange(1000), rand.randrange(1000))
+            if index % 5 else '\n'
+            for index in range(lines)]
+
+
+def edited_code(lines, rand):
+    a = generate_code(lines, rand)
+    b = list(a)
+    for index in rand.sample(range(lines), lines // 100):
+        b[index] = b[index].replace('compute', 'recompute')
+    return a, b
+
+
+def repetitive(lines, rand):
+    a = ['\n' if index % 3 else '}\n' for index in range(lines)]
+    b = list(a)
+    for index in sorted(rand.sample(range(lines), 20), reverse=True):
+        b.insert(index, 'pass\n')
+    return a, b
+
+
+def reindented(lines, rand):
+    a = generate_code(lines, rand)
+    return a, ['    ' + line if line != '\n' else line for line in a]
+
+
+def shuffled(lines, rand):
+    a = [line.replace('value_', 'value_{}_'.format(index % 7))
+         for index, line in enumerate(generate_code(lines, rand))]
+    b = list(a)
+    rand.shuffle(b)
+    return a, b
+
+
+def reversed_lines(lines, rand):
+    a = generate_code(lines, rand)
+    return a, a[::-1]
+
+
+INPUTS = (('code, 1% of lines edited', edited_code),
+          ('repetitive, 20 insertions', repetitive),
+          ('reindented', reindented),
+          ('shuffled', shuffled),
+          ('reversed', reversed_lines))
+
+
+def changed_lines(opcodes):
+    return sum(max(i2 - i1, j2 - j1)
+               for tag, i1, i2, j1, j2 in opcodes if tag != 'equal')
+
+
+def measure(function, a, b):
+    start = time.perf_counter()
+    opcodes = function(a, b)
+    return time.perf_counter() - start, changed_lines(opcodes)
+
+
+def main(line_counts):
+    print('{:>7}  {:<28}{:>16}{:>16}'.format(
+        'lines', 'input', 'difflib', 'patience'))
+    for lines in line_counts:
+        for name, generate in INPUTS:
+            a, b = generate(lines, random.Random(lines))
+            results = [measure(lambda a, b: difflib.SequenceMatcher(
+                                   None, a, b).get_opcodes(), a, b),
+                       measure(get_opcodes, a, b)]
+            print('{:>7}  {:<28}'.format(lines, name) + ''.join(
+                '{:>8.3f} s{:>6}'.format(seconds, changed)
+                for seconds, changed in results))
+
+
+if __name__ == '__main__':
+    main([int(argument) for argument in sys.argv[1:]] or [10000, 100000])
@@ -1,11 +1,16 @@
+import asyncio
+from collections import OrderedDict
 from contextlib import contextmanager
 from functools import partial, partialmethod
 import logging
 import inspect
 from itertools import chain
+from multiprocessing.util import Finalize
+import os
 import re
 import shutil
 from subprocess import check_call, CalledProcessError, DEVNULL
+import tempfile
 from types import MappingProxyType
 
 from cli_helpers.utils import strip_ansi
@@ -14,7 +19,7 @@ from coalib.bears.LocalBear import LocalBear
 from coalib.bears.GlobalBear import GlobalBear
 from coala_utils.ContextManagers import make_temp
 from coala_utils.decorators import assert_right_type, enforce_signature
-from coalib.misc.Shell import run_shell_command
+from coalib.misc.Shell import run_shell_command, run_shell_command_async
 from coalib.results.Diff import Diff
 from coalib.results.Result import Result
 from coalib.results.SourceRange import SourceRange
@@ -43,7 +48,8 @@ def _prepare_options(options, bear_class):
                        'executable_check_fail_info',
                        'prerequisite_check_command',
                        'global_bear',
-                       'strip_ansi'}
+                       'strip_ansi',
+                       'batch_size'}
 
     if not options['use_stdout'] and not options['use_stderr']:
         raise ValueError('No output streams provided at all.')
@@ -152,6 +158,28 @@ def _prepare_options(options, bear_class):
         raise ValueError('Incompatible arguments provided:'
                          "'use_stdin' and 'global_bear' can't both be True.")
 
+    if options['batch_size'] < 1:
+        raise ValueError('Invalid value for `batch_size`: ' +
+                         repr(options['batch_size']))
+
+    if options['batch_size'] > 1:
+        if options['global_bear'] or options['use_stdin']:
+            raise ValueError('Incompatible arguments provided: '
+                             "'batch_size' can't be used together with "
+                             "'use_stdin' or 'global_bear'.")
+
+        if options['output_format'] in ('corrected', 'unified-diff'):
+            raise ValueError('Incompatible arguments provided: '
+                             "'batch_size' can't be used together with the "
+                             '{!r} output-format.'
+                             .format(options['output_format']))
+
+        if (options['output_format'] == 'regex' and
+                'filename' not in options['output_regex'].groupindex):
+            raise ValueError('`output_regex` needs the named group '
+                             '`filename` to assign results to the files of '
+                             'a batch.')
+
     # Check for illegal superfluous options.
     superfluous_options = options.keys() - allowed_options
     if superfluous_options:
@@ -160,6 +188,19 @@ def _prepare_options(options, bear_class):
             ', '.join(repr(s) for s in sorted(superfluous_options)))
 
 
+def _remove_files(config_files):
+    """
+    Removes the config files created by a linter.
+
+    :param config_files: A dict with the paths of the files as values.
+    """
+    for config_file in config_files.values():
+        try:
+            os.remove(config_file)
+        except OSError:
+            pass
+
+
 def _create_linter(klass, options):
 
     _prepare_options(options, klass)
@@ -172,6 +213,37 @@ def _create_linter(klass, options):
 
     class LinterBase(metaclass=LinterMeta):
 
+        BATCH_SIZE = options['batch_size']
+
+        def __init__(self, *args, **kwargs):
+            super().__init__(*args, **kwargs)
+            self._init_caches()
+
+        def _init_caches(self):
+            # The config files are shared between all files with the same
+            # config contents, and removed with the bear. Processes started
+            # by ``multiprocessing`` end without running the finalizers of
+            # ``weakref``, but run the ones of ``multiprocessing`` that have
+            # an exit priority.
+            self._config_files = {}
+            Finalize(self, _remove_files, args=(self._config_files,),
+                     exitpriority=0)
+            # The files given to ``prepare_batch()`` and the results of the
+            # files of a batch that were linted but not yet returned.
+            self._batch = OrderedDict()
+            self._batch_results = {}
+
+        def __getstate__(self):
+            # Config files and results are never shared with other processes.
+            state = self.__dict__.copy()
+            for name in ('_config_files', '_batch', '_batch_results'):
+                state.pop(name, None)
+            return state
+
+        def __setstate__(self, state):
+            self.__dict__.update(state)
+            self._init_caches()
+
         @staticmethod
         def generate_config(filename, file):
             """
@@ -234,7 +306,8 @@ def _create_linter(klass, options):
         def _get_create_arguments_metadata(cls):
             return FunctionMetadata.from_function(
                 cls.create_arguments,
-                omit={'self', 'filename', 'file', 'config_file'})
+                omit={'self', 'filename', 'file', 'filenames', 'files',
+                      'config_file'})
 
         @classmethod
         def _get_generate_config_metadata(cls):
@@ -629,9 +702,10 @@ def _create_linter(klass, options):
                         fl.write(content)
                     yield config_file
 
-        def run(self, filename=None, file=None, **kwargs):
+        def _get_config_file(self, filename=None, file=None, **kwargs):
             """
-            Runs the wrapped tool.
+            Creates the config file if the user provides one. Files with the
+            same config contents share one config file.
 
             :param filename:
                 The filename of the file being linted. ``None`` for project
@@ -639,89 +713,288 @@ def _create_linter(klass, options):
             :param file:
                 The content of the file being linted. ``None`` for project
                 scope.
+            :param kwargs:
+                Section settings passed from ``run()``.
+            :return:
+                The path of the config file or ``None``.
+            """
+            content = self.generate_config(filename, file, **kwargs)
+            if content is None:
+                return None
+
+            config_file = self._config_files.get(content)
+            if config_file is None:
+                handle, config_file = tempfile.mkstemp(
+                    suffix=options['config_suffix'])
+                with open(handle, mode='w') as fl:
+                    fl.write(content)
+                self._config_files[content] = config_file
+            return config_file
+
+        def _invoke(self, args, stdin=None):
+            """
+            Runs the executable with the given arguments, see ``_lint()``.
+
+            :param args:
+                The arguments returned by ``create_arguments()``.
+            :param stdin:
+                The input to send to the executable or ``None``.
+            :return:
+                The output to pass to ``process_output()`` or ``None`` if
+                there is nothing to process.
+            """
+            try:
+                args = tuple(args)
+            except TypeError:
+                self.err('The given arguments '
+                         '{!r} are not iterable.'.format(args))
+                return None
+
+            arguments = (self.get_executable(),) + args
+            self.debug("Running '{}'".format(
+                ' '.join(str(arg) for arg in arguments)))
+
+            result = yield arguments, stdin
+
+            stdout, stderr = result
+
+            output = []
+
+            if options['use_stdout']:
+                output.append(stdout)
+            elif stdout:
+                logging.warning(
+                    '{}: Discarded stdout: {}'.format(
+                        self.__class__.__name__, stdout))
+
+            if options['use_stderr']:
+                output.append(stderr)
+            elif stderr:
+                logging.warning(
+                    '{}: Discarded stderr: {}'.format(
+                        self.__class__.__name__, stderr))
+
+            if result.code:
+                logging.warning(
+                    '{}: Exit code {}'.format(
+                        self.__class__.__name__, result.code))
+
+            if not any(output):
+                logging.info(
+                    '{}: No output; skipping processing'.format(
+                        self.__class__.__name__))
+                return None
+
+            if options['strip_ansi']:
+                output = tuple(map(strip_ansi, output))
+
+            if len(output) == 1:
+                return output[0]
+            else:
+                return tuple(output)
+
+        def prepare_batch(self, file_dict):
+            """
+            Remembers the files to lint together with the next one ``run()``
+            is called for, if ``batch_size`` is greater than 1.
+
+            :param file_dict:
+                A dict with the names of the files as keys and their contents
+                as values.
+            """
+            self._batch = OrderedDict(file_dict)
+
+        def _lint_batch(self, batch, kwargs):
+            """
+            Runs the executable once for all files of a batch sharing the
+            same config file and assigns the results to the files, see
+            ``_lint()``.
+
+            :param batch:
+                An ``OrderedDict`` with the names of the files as keys and
+                their contents as values.
+            :param kwargs:
+                Section settings passed from ``run()``.
+            :return:
+                A dict with the names of the files as keys and the lists of
+                their results as values.
             """
-            # Get the **kwargs params to forward to `generate_config()`
-            # (from `_create_config()`).
             generate_config_kwargs = FunctionMetadata.filter_parameters(
                 self._get_generate_config_metadata(), kwargs)
+            create_arguments_kwargs = FunctionMetadata.filter_parameters(
+                self._get_create_arguments_metadata(), kwargs)
+            process_output_kwargs = FunctionMetadata.filter_parameters(
+                self._get_process_output_metadata(), kwargs)
+
+            config_groups = OrderedDict()
+            for filename, file in batch.items():
+                config_file = self._get_config_file(filename,
+                                                    file,
+                                                    **generate_config_kwargs)
+                config_groups.setdefault(config_file, []).append(filename)
+
+            batch_results = {}
+            for config_file, filenames in config_groups.items():
+                results = {os.path.normcase(os.path.abspath(filename)): []
+                           for filename in filenames}
+                output = yield from self._invoke(self.create_arguments(
+                    tuple(filenames),
+                    tuple(batch[filename] for filename in filenames),
+                    config_file,
+                    **create_arguments_kwargs))
+
+                if output is not None:
+                    for result in self.process_output(
+                            output, None, None, **process_output_kwargs):
+                        path = (os.path.normcase(result.affected_code[0].file)
+                                if result.affected_code else None)
+                        if path in results:
+                            results[path].append(result)
+                        else:
+                            self.debug('Discarding a result of no file of '
+                                       'the batch: ' + result.message)
+
+                for filename in filenames:
+                    batch_results[filename] = results[
+                        os.path.normcase(os.path.abspath(filename))]
+
+            return batch_results
+
+        def _lint(self, filename, file, kwargs):
+            """
+            Lints a file. This generator yields the commands to run as tuples
+            of the arguments and the input for the executable, and has to be
+            sent the ``ShellCommandResult`` of each command, so ``run()`` and
+            ``run_async()`` can run the commands in their own way.
 
-            with self._create_config(
-                    filename,
-                    file,
-                    **generate_config_kwargs) as config_file:
-                # And now retrieve the **kwargs for `create_arguments()`.
-                create_arguments_kwargs = (
-                    FunctionMetadata.filter_parameters(
-                        self._get_create_arguments_metadata(), kwargs))
-
-                # The interface of create_arguments is different for local
-                # and global bears, therefore we must check here, what kind
-                # of bear we have.
-                if isinstance(self, LocalBear):
-                    args = self.create_arguments(filename,
-                                                 file, config_file,
-                                                 **create_arguments_kwargs)
-                else:
-                    args = self.create_arguments(config_file,
-                                                 **create_arguments_kwargs)
+            :param filename:
+                The filename of the file being linted. ``None`` for project
+                scope.
+            :param file:
+                The content of the file being linted. ``None`` for project
+                scope.
+            :param kwargs:
+                Section settings passed from ``run()``.
+            :return:
+                The results.
+            """
+            if self.BATCH_SIZE > 1:
+                if filename not in self._batch_results:
+                    if filename in self._batch:
+                        batch, self._batch = self._batch, OrderedDict()
+                    else:
+                        batch = OrderedDict()
+                    batch[filename] = file
+                    batch_results = yield from self._lint_batch(batch, kwargs)
+                    self._batch_results.update(batch_results)
+                return self._batch_results.pop(filename)
+
+            # Get the **kwargs params to forward to `generate_config()`.
+            generate_config_kwargs = FunctionMetadata.filter_parameters(
+                self._get_generate_config_metadata(), kwargs)
+            config_file = self._get_config_file(filename,
+                                                file,
+                                                **generate_config_kwargs)
+
+            # And now retrieve the **kwargs for `create_arguments()`.
+            create_arguments_kwargs = (
+                FunctionMetadata.filter_parameters(
+                    self._get_create_arguments_metadata(), kwargs))
+
+            # The interface of create_arguments is different for local
+            # and global bears, therefore we must check here, what kind
+            # of bear we have.
+            if isinstance(self, LocalBear):
+                args = self.create_arguments(filename,
+                                             file, config_file,
+                                             **create_arguments_kwargs)
+            else:
+                args = self.create_arguments(config_file,
+                                             **create_arguments_kwargs)
 
-                try:
-                    args = tuple(args)
-                except TypeError:
-                    self.err('The given arguments '
-                             '{!r} are not iterable.'.format(args))
-                    return
-
-                arguments = (self.get_executable(),) + args
-                self.debug("Running '{}'".format(
-                    ' '.join(str(arg) for arg in arguments)))
-
-                result = run_shell_command(
-                    arguments,
-                    stdin=''.join(file) if options['use_stdin'] else None,
-                    cwd=self.get_config_dir())
-
-                stdout, stderr = result
-
-                output = []
-
-                if options['use_stdout']:
-                    output.append(stdout)
-                elif stdout:
-                    logging.warning(
-                        '{}: Discarded stdout: {}'.format(
-                            self.__class__.__name__, stdout))
-
-                if options['use_stderr']:
-                    output.append(stderr)
-                elif stderr:
-                    logging.warning(
-                        '{}: Discarded stderr: {}'.format(
-                            self.__class__.__name__, stderr))
-
-                if result.code:
-                    logging.warning(
-                        '{}: Exit code {}'.format(
-                            self.__class__.__name__, result.code))
-
-                if not any(output):
-                    logging.info(
-                        '{}: No output; skipping processing'.format(
-                            self.__class__.__name__))
-                    return
-
-                if options['strip_ansi']:
-                    output = tuple(map(strip_ansi, output))
-
-                if len(output) == 1:
-                    output = output[0]
-                else:
-                    output = tuple(output)
-
-                process_output_kwargs = FunctionMetadata.filter_parameters(
-                    self._get_process_output_metadata(), kwargs)
-                return self.process_output(output, filename, file,
-                                           **process_output_kwargs)
+            output = yield from self._invoke(
+                args,
+                stdin=''.join(file) if options['use_stdin'] else None)
+            if output is None:
+                return
+
+            process_output_kwargs = FunctionMetadata.filter_parameters(
+                self._get_process_output_metadata(), kwargs)
+            return self.process_output(output, filename, file,
+                                       **process_output_kwargs)
+
+        def run(self, filename=None, file=None, **kwargs):
+            """
+            Runs the wrapped tool.
+
+            :param filename:
+                The filename of the file being linted. ``None`` for project
+                scope.
+            :param file:
+                The content of the file being linted. ``None`` for project
+                scope.
+            """
+            steps = self._lint(filename, file, kwargs)
+            try:
+                arguments, stdin = next(steps)
+                while True:
+                    arguments, stdin = steps.send(run_shell_command(
+                        arguments, stdin=stdin, cwd=self.get_config_dir()))
+            except StopIteration as stop:
+                return stop.value
+
+        @asyncio.coroutine
+        def run_async(self, filename=None, file=None, **kwargs):
+            """
+            Runs the wrapped tool like ``run()``, but as a coroutine running
+            the executable on the current asyncio event loop.
+
+            :param filename:
+                The filename of the file being linted. ``None`` for project
+                scope.
+            :param file:
+                The content of the file being linted. ``None`` for project
+                scope.
+            """
+            steps = self._lint(filename, file, kwargs)
+            try:
+                arguments, stdin = next(steps)
+                while True:
+                    result = yield from run_shell_command_async(
+                        arguments, stdin=stdin, cwd=self.get_config_dir())
+                    arguments, stdin = steps.send(result)
+            except StopIteration as stop:
+                return stop.value
+
+        @asyncio.coroutine
+        def execute_async(self, *args, debug=False, **kwargs):
+            """
+            Executes the bear like ``execute()``, but with ``run_async()``.
+            Bears that are debugged or profiled are executed with
+            ``execute()``.
+
+            :return:
+                The list of results or ``None`` if the bear failed.
+            """
+            if self.debugger or self.profile:
+                return self.execute(*args, debug=debug, **kwargs)
+
+            try:
+                self.debug('Running bear {}...'.format(self.name))
+
+                if kwargs.get('dependency_results', True) is None:
+                    del kwargs['dependency_results']
+
+                if not self._add_section_params(kwargs):
+                    return []
+
+                result = yield from self.run_async(*args, **kwargs)
+                return [] if result is None else list(result)
+            except (Exception, SystemExit) as exc:
+                if debug and not isinstance(exc, SystemExit):
+                    raise
+
+                self._report_failure(exc, args)
 
         def __repr__(self):
             return '<{} linter object (wrapping {!r}) at {}>'.format(
@@ -805,6 +1078,7 @@ def linter(executable: str,
            prerequisite_check_command: tuple = (),
            output_format: (str, None) = None,
            strip_ansi: bool = False,
+           batch_size: int = 1,
            **options):
     """
     Decorator that creates a ``Bear`` that is able to process results from
@@ -889,6 +1163,24 @@ def linter(executable: str,
     and ``use_stderr=False`` raises a ``ValueError``. By default ``use_stdout``
     is ``True`` and ``use_stderr`` is ``False``.
 
+    Tools that take a long time to start, compared to the time they need to
+    lint a file, can lint several files at once with ``batch_size``. Then
+    ``create_arguments()`` receives tuples of the names and the contents of
+    the files, and ``process_output()`` receives ``None`` as ``filename`` and
+    ``file``, the results are assigned to the files by their affected code.
+    With the ``regex`` output-format, ``output_regex`` has to match the
+    ``filename`` of each result then.
+
+    >>> @linter('xlint',
+    ...         output_format='regex',
+    ...         output_regex=r'(?P<filename>.+?):(?P<line>\\d+): '
+    ...                      r'(?P<message>.*)',
+    ...         batch_size=20)
+    ... class XLintBear:
+    ...     @staticmethod
+    ...     def create_arguments(filenames, files, config_file):
+    ...         return ('--lint',) + filenames
+
     Every ``linter`` is also a subclass of the ``LinterClass`` class.
 
     >>> issubclass(XLintBear, LinterClass)
@@ -1013,6 +1305,11 @@ def linter(executable: str,
     :param strip_ansi:
         Supresses colored output from linters when enabled by stripping the
         ascii characters around the text.
+    :param batch_size:
+        The maximum number of files to lint with one invocation of the
+        executable. By default each file is linted on its own. Incompatible
+        with ``global_bear=True``, ``use_stdin=True`` and the ``corrected``
+        and ``unified-diff`` output-formats.
     :raises ValueError:
         Raised when invalid options are supplied.
     :raises TypeError:
@@ -1034,5 +1331,6 @@ def linter(executable: str,
     options['prerequisite_check_command'] = prerequisite_check_command
     options['global_bear'] = global_bear
     options['strip_ansi'] = strip_ansi
+    options['batch_size'] = batch_size
 
     return partial(_create_linter, options=options)
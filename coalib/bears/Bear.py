@@ -7,7 +7,6 @@ import logging
 from functools import partial
 from os import makedirs, getcwd
 from os.path import join, abspath, exists, isdir
-import requests
 from appdirs import user_data_dir
 
 from pyprint.Printer import Printer
@@ -415,7 +414,14 @@ class Bear(Printer, LogPrinterMixin, metaclass=bearclass):
         self._dump_bear_profile_data(profiler)
         return results
 
-    def run_bear_from_section(self, args, kwargs):
+    def _add_section_params(self, kwargs):
+        """
+        Adds the settings of the section ``run()`` takes to the given keyword
+        arguments.
+
+        :param kwargs: The keyword arguments to ``run()``.
+        :return:       False if the settings are invalid, True otherwise.
+        """
         try:
             # Don't get `language` setting from `section.contents`
             if self.section.language and (
@@ -427,6 +433,11 @@ class Bear(Printer, LogPrinterMixin, metaclass=bearclass):
         except ValueError as err:
             self.warn('The bear {} cannot be executed.'.format(
                 self.name), str(err))
+            return False
+        return True
+
+    def run_bear_from_section(self, args, kwargs):
+        if not self._add_section_params(kwargs):
             return
         if self.debugger:
             return debug_run(self.run, Debugger(bear=self), *args, **kwargs)
@@ -456,25 +467,35 @@ class Bear(Printer, LogPrinterMixin, metaclass=bearclass):
             if debug and not isinstance(exc, SystemExit):
                 raise
 
-            if isinstance(exc, ZeroOffsetError):
-                self.err('Bear {} violated one-based offset convention.'
-                         .format(name), str(exc))
-
-            if self.kind() == BEAR_KIND.LOCAL:
-                self.err('Bear {} failed to run on file {}. Take a look '
-                         'at debug messages (`-V`) for further '
-                         'information.'.format(name, args[0]))
-            else:
-                self.err('Bear {} failed to run. Take a look '
-                         'at debug messages (`-V`) for further '
-                         'information.'.format(name))
-            self.debug(
-                'The bear {bear} raised an exception. If you are the author '
-                'of this bear, please make sure to catch all exceptions. If '
-                'not and this error annoys you, you might want to get in '
-                'contact with the author of this bear.\n\nTraceback '
-                'information is provided below:\n\n{traceback}'
-                '\n'.format(bear=name, traceback=traceback.format_exc()))
+            self._report_failure(exc, args)
+
+    def _report_failure(self, exc, args):
+        """
+        Logs the error messages for an exception raised by ``run()``.
+
+        :param exc:  The exception.
+        :param args: The positional arguments ``run()`` was called with.
+        """
+        name = self.name
+        if isinstance(exc, ZeroOffsetError):
+            self.err('Bear {} violated one-based offset convention.'
+                     .format(name), str(exc))
+
+        if self.kind() == BEAR_KIND.LOCAL:
+            self.err('Bear {} failed to run on file {}. Take a look '
+                     'at debug messages (`-V`) for further '
+                     'information.'.format(name, args[0]))
+        else:
+            self.err('Bear {} failed to run. Take a look '
+                     'at debug messages (`-V`) for further '
+                     'information.'.format(name))
+        self.debug(
+            'The bear {bear} raised an exception. If you are the author '
+            'of this bear, please make sure to catch all exceptions. If '
+            'not and this error annoys you, you might want to get in '
+            'contact with the author of this bear.\n\nTraceback '
+            'information is provided below:\n\n{traceback}'
+            '\n'.format(bear=name, traceback=traceback.format_exc()))
 
     @staticmethod
     def kind():
@@ -494,6 +515,28 @@ class Bear(Printer, LogPrinterMixin, metaclass=bearclass):
             cls.run,
             omit={'self', 'dependency_results', 'language'})
 
+    @classmethod
+    def get_source_files(cls):
+        """
+        Returns the source files of the bear and its base classes. Results
+        cached for a bear are outdated once one of them changes.
+
+        >>> class SomeBear(Bear): pass
+        >>> inspect.getsourcefile(Bear) in SomeBear.get_source_files()
+        True
+
+        :return: A set of the paths of the source files.
+        """
+        files = set()
+        for base in inspect.getmro(cls):
+            try:
+                files.add(inspect.getsourcefile(base))
+            except TypeError:
+                # Builtin classes like ``object`` have no source file.
+                pass
+        files.discard(None)
+        return files
+
     @classmethod
     def __json__(cls):
         """
@@ -641,6 +684,8 @@ class Bear(Printer, LogPrinterMixin, metaclass=bearclass):
         self.info('Downloading {filename!r} for bear {bearname} from {url}.'
                   .format(filename=filename, bearname=self.name, url=url))
 
+        # requests is slow to import and only needed here.
+        import requests
         response = requests.get(url, stream=True, timeout=20)
         response.raise_for_status()
 
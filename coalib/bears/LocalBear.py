@@ -20,10 +20,26 @@ class LocalBear(Bear):
         certain conditions
     """
 
+    #: The number of files coala tries to pass to ``prepare_batch()`` at
+    #: once. Bears that can analyze several files at once faster than one
+    #: after the other (e.g. by running an external tool only once) can set
+    #: it to more than 1.
+    BATCH_SIZE = 1
+
     @staticmethod
     def kind():
         return BEAR_KIND.LOCAL
 
+    def prepare_batch(self, file_dict):
+        """
+        Tells the bear which files it is going to be run on next, before
+        ``run()`` is called for each of them. Only called for bears with a
+        ``BATCH_SIZE`` greater than 1, does nothing by default.
+
+        :param file_dict: A dict with the names of the files as keys and
+                          their contents as values.
+        """
+
     def run(self,
             filename,
             file,
@@ -16,8 +16,6 @@ import sys
 
 from pyprint.ConsolePrinter import ConsolePrinter
 
-from dependency_management.requirements.PipRequirement import PipRequirement
-
 from coalib.parsing.FilterHelper import (
     apply_filter, apply_filters, InvalidFilterException, filter_vector_to_dict)
 from coalib.output.Logging import configure_logging
@@ -34,6 +32,8 @@ def main(debug=False):
         # not.
         args = default_arg_parser().parse_args()
         if args.debug:
+            from dependency_management.requirements.PipRequirement import (
+                PipRequirement)
             req_ipdb = PipRequirement('ipdb')
             if not req_ipdb.is_installed():
                 logging.error('--debug flag requires ipdb. '
@@ -0,0 +1,360 @@
+import argparse
+import errno
+import hashlib
+import json
+import logging
+import os
+import socket
+import socketserver
+import sys
+import threading
+
+from coalib.io.FileProxy import FileProxyMap
+from coalib.misc.Caching import ProxyMapFileCache
+from coalib.misc.CachingUtilities import USER_DATA_DIR
+from coalib.output.Interactions import fail_acquire_settings
+from coalib.output.JSONEncoder import create_json_encoder
+from coalib.output.Logging import configure_logging
+from coalib.processes.Processing import execute_section, get_section_files
+from coalib.processes.ProcessPool import ProcessPool
+from coalib.settings.ConfigurationGathering import gather_configuration
+
+
+def do_nothing(*args):
+    return True
+
+
+class CoalaDaemon:
+    """
+    Keeps the configuration, the bears and the contents of the analyzed files
+    of a project in memory, so that it can be analyzed again quickly after
+    files changed.
+
+    The contents of the files are held in a ``FileProxyMap``. Clients can
+    replace the contents of a file with ``update_file()``, e.g. with the
+    unsaved contents of an editor, and ``sync_files()`` reloads the files
+    that changed on the disk. Only the changed files are analyzed again by
+    local bears, the results of the other files are kept from the previous
+    analysis.
+    """
+
+    def __init__(self, arg_list=(), project_dir=None):
+        """
+        :param arg_list:    The arguments coala would be run with.
+        :param project_dir: The root directory of the project, the current
+                            directory by default.
+        """
+        self.project_dir = project_dir or os.getcwd()
+        (self.sections,
+         self.local_bears,
+         self.global_bears,
+         self.targets) = gather_configuration(fail_acquire_settings,
+                                              arg_list=list(arg_list))
+
+        self.proxymap = FileProxyMap()
+        # The cache records the contents of the proxies, which may not be
+        # saved to the disk: it must not be shared with coala runs.
+        self.cache = ProxyMapFileCache(None, 'daemon:' + self.project_dir,
+                                       flush_cache=True)
+        self.cache.set_proxymap(self.proxymap)
+
+        # The modification times of the files on the disk, as they were when
+        # their proxies were loaded.
+        self.disk_times = {}
+        self.local_results = {}
+        self.global_results = {}
+        self.pool = ProcessPool()
+        self.lock = threading.Lock()
+
+    def close(self):
+        """
+        Stops the processes running the bears.
+        """
+        self.pool.close()
+
+    def update_file(self, filename, contents, version):
+        """
+        Replaces the contents of a file, without writing them to the disk.
+
+        :param filename: The absolute path of the file.
+        :param contents: The new contents of the file.
+        :param version:  The version of the contents, which has to be greater
+                         than the one of the previous update.
+        :return:         True if the contents were replaced.
+        """
+        with self.lock:
+            proxy = self.proxymap.resolve(filename, hard_sync=False)
+            self._remember_disk_time(proxy.filename)
+            return proxy.replace(contents, version)
+
+    def sync_files(self):
+        """
+        Reloads the proxies of the files that changed on the disk since they
+        were loaded and removes the ones of deleted files.
+
+        :return: The set of files that changed.
+        """
+        changed_files = set()
+        with self.lock:
+            for proxy in self.proxymap:
+                try:
+                    disk_time = os.stat(proxy.filename).st_mtime_ns
+                except OSError:
+                    self.proxymap.remove(proxy.filename)
+                    self.disk_times.pop(proxy.filename, None)
+                    changed_files.add(proxy.filename)
+                    continue
+
+                if disk_time != self.disk_times.get(proxy.filename):
+                    try:
+                        proxy.replace(proxy.get_disk_contents(),
+                                      max(proxy.version, 0) + 1)
+                    except (OSError, UnicodeDecodeError):
+                        self.proxymap.remove(proxy.filename)
+                    self.disk_times[proxy.filename] = disk_time
+                    changed_files.add(proxy.filename)
+        return changed_files
+
+    def _remember_disk_time(self, filename):
+        if filename not in self.disk_times:
+            try:
+                self.disk_times[filename] = os.stat(filename).st_mtime_ns
+            except OSError:
+                self.disk_times[filename] = None
+
+    def analyze(self):
+        """
+        Analyzes the files that changed since the last analysis.
+
+        :return: A dictionary with the names of the sections as keys and
+                 lists of all results of the section as values.
+        """
+        with self.lock:
+            results = {}
+            for section_name, section in self.sections.items():
+                if not section.is_enabled(self.targets):
+                    continue
+
+                # The daemon never changes files.
+                section['default_actions'] = ''
+
+                filenames, _ = get_section_files(section, self.cache)
+                for filename in filenames:
+                    self._remember_disk_time(os.path.normcase(filename))
+                changed_files = self.cache.get_uncached_files(
+                    set(filenames))
+
+                # ``execute_section`` replaces the bear classes in the lists
+                # with instances.
+                section_result = execute_section(
+                    section=section,
+                    global_bear_list=list(self.global_bears[section_name]),
+                    local_bear_list=list(self.local_bears[section_name]),
+                    print_results=do_nothing,
+                    cache=self.cache,
+                    log_printer=None,
+                    console_printer=None,
+                    pool=self.pool)
+
+                local_results = self.local_results.setdefault(section_name,
+                                                              {})
+                for filename in (set(local_results) - set(filenames) |
+                                 changed_files):
+                    local_results.pop(filename, None)
+                local_results.update(section_result[1])
+                self.global_results[section_name] = section_result[2]
+
+                results[section_name] = [
+                    result
+                    for section_results in (local_results,
+                                            self.global_results[section_name])
+                    for values in section_results.values()
+                    for result in values]
+
+            self.cache.write()
+            return results
+
+
+class CoalaDaemonHandler(socketserver.StreamRequestHandler):
+    """
+    Handles the requests of a client. Each request and response is a JSON
+    object on a line of its own. The ``method`` of a request can be:
+
+    - ``update``: Replaces the ``contents`` of the file ``filename`` in
+      memory, ``version`` numbers the contents of each file.
+    - ``analyze``: Analyzes the changed files and responds with the
+      ``results`` of each section.
+    - ``shutdown``: Stops the daemon.
+    """
+
+    def handle(self):
+        daemon = self.server.coala_daemon
+        JSONEncoder = create_json_encoder()
+        for line in self.rfile:
+            try:
+                request = json.loads(line.decode('utf-8'))
+                method = request['method']
+                if method == 'update':
+                    response = {'updated': daemon.update_file(
+                        request['filename'],
+                        request['contents'],
+                        request['version'])}
+                elif method == 'analyze':
+                    daemon.sync_files()
+                    response = {'results': daemon.analyze()}
+                elif method == 'shutdown':
+                    response = {}
+                    threading.Thread(target=self.server.shutdown).start()
+                else:
+                    response = {'error': 'Unknown method {!r}.'
+                                         .format(method)}
+            except (ValueError, KeyError, TypeError) as exception:
+                response = {'error': str(exception)}
+
+            self.wfile.write(
+                json.dumps(response, cls=JSONEncoder).encode('utf-8') + b'\n')
+
+
+def get_socket_path(project_dir):
+    """
+    Gets the path of the socket a daemon for a project listens on by
+    default. It is in the runtime directory of the user if there is one and
+    in the data directory of coala otherwise.
+
+    :param project_dir: The root directory of the project.
+    :return:            The path of the socket.
+    """
+    directory = os.environ.get('XDG_RUNTIME_DIR') or USER_DATA_DIR
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    digest = hashlib.sha1(
+        os.path.abspath(project_dir).encode('utf-8')).hexdigest()
+    return os.path.join(directory, 'coala-daemon-{}.sock'.format(digest[:16]))
+
+
+class CoalaDaemonServer(socketserver.ThreadingMixIn,
+                        socketserver.UnixStreamServer):
+    """
+    Serves a ``CoalaDaemon`` on a Unix domain socket, which only the user
+    running it can connect to.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, coala_daemon, socket_path=None, watch_interval=None):
+        """
+        :param coala_daemon:   The ``CoalaDaemon`` to serve.
+        :param socket_path:    The path of the socket to listen on, the one
+                               given by ``get_socket_path()`` for the project
+                               of the daemon by default.
+        :param watch_interval: The number of seconds after which the files
+                               are synchronized with the disk again, or
+                               ``None`` to synchronize them only before each
+                               analysis.
+        """
+        if socket_path is None:
+            socket_path = get_socket_path(coala_daemon.project_dir)
+        super().__init__(socket_path, CoalaDaemonHandler)
+        self.coala_daemon = coala_daemon
+        self.watch_interval = watch_interval
+        self.__stopped = threading.Event()
+
+    def server_bind(self):
+        # A socket left behind by a daemon that did not stop cleanly is
+        # replaced, but not the one of a daemon that is still running.
+        if os.path.exists(self.server_address):
+            with socket.socket(socket.AF_UNIX) as connection:
+                try:
+                    connection.connect(self.server_address)
+                except OSError:
+                    os.remove(self.server_address)
+                else:
+                    raise OSError(errno.EADDRINUSE,
+                                  'A coala daemon is listening already',
+                                  self.server_address)
+
+        old_umask = os.umask(0o177)
+        try:
+            super().server_bind()
+        finally:
+            os.umask(old_umask)
+
+    def server_close(self):
+        super().server_close()
+        try:
+            os.remove(self.server_address)
+        except OSError:
+            pass
+
+    def serve_forever(self, poll_interval=0.5):
+        watcher = None
+        if self.watch_interval:
+            watcher = threading.Thread(target=self._watch, daemon=True)
+            watcher.start()
+        try:
+            super().serve_forever(poll_interval)
+        finally:
+            self.__stopped.set()
+            if watcher is not None:
+                watcher.join()
+
+    def _watch(self):
+        while not self.__stopped.wait(self.watch_interval):
+            changed_files = self.coala_daemon.sync_files()
+            if changed_files:
+                logging.debug('Files changed on the disk:\n' +
+                              '\n'.join(sorted(changed_files)))
+
+
+def send_request(socket_path, method, **params):
+    """
+    Sends a request to a coala daemon.
+
+    :param socket_path: The path of the socket the daemon listens on.
+    :param method:      The method to call, see ``CoalaDaemonHandler``.
+    :param params:      The parameters of the method.
+    :return:            The response of the daemon.
+    """
+    with socket.socket(socket.AF_UNIX) as connection:
+        connection.connect(socket_path)
+        connection.sendall(json.dumps(dict(params, method=method))
+                           .encode('utf-8') + b'\n')
+        with connection.makefile('rb') as response:
+            return json.loads(response.readline().decode('utf-8'))
+
+
+def main(arg_list=None):
+    configure_logging()
+
+    arg_parser = argparse.ArgumentParser(
+        prog='coala-daemon',
+        description='Runs coala in the background and analyzes changed '
+                    'files on requests. All unknown arguments are passed '
+                    'to coala.')
+    arg_parser.add_argument(
+        '--socket', default=None, metavar='PATH',
+        help='the path of the Unix domain socket to listen on, one for the '
+             'project in the runtime directory of the user by default')
+    arg_parser.add_argument(
+        '--watch-interval', type=float, default=None, metavar='SECONDS',
+        help='synchronize the files with the disk in this interval')
+    args, coala_args = arg_parser.parse_known_args(arg_list)
+
+    daemon = CoalaDaemon(coala_args)
+    try:
+        server = CoalaDaemonServer(daemon, args.socket, args.watch_interval)
+        try:
+            print('coala daemon listening on {}'.format(
+                server.server_address), flush=True)
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    finally:
+        daemon.close()
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
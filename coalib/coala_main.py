@@ -8,6 +8,7 @@ from coalib.misc.Exceptions import get_exitcode
 from coalib.output.Interactions import fail_acquire_settings
 from coalib.output.Logging import CounterHandler
 from coalib.processes.Processing import execute_section, simplify_section_result
+from coalib.processes.ProcessPool import ProcessPool
 from coalib.settings.ConfigurationGathering import gather_configuration
 from coalib.results.result_actions.DoNothingAction import DoNothingAction
 from coalib.results.result_actions.ShowPatchAction import ShowPatchAction
@@ -19,7 +20,8 @@ from coalib.results.result_actions.PrintMoreInfoAction import (
     PrintMoreInfoAction)
 from coalib.results.result_actions.PrintDebugMessageAction import (
     PrintDebugMessageAction)
-from coalib.misc.Caching import FileDictFileCache
+from coalib.misc.Caching import (
+    FileDictFileCache, ResultCache, TaskResultCache, TimingCache)
 from coalib.misc.CachingUtilities import (
     settings_changed, update_settings_db, get_settings_hash)
 from coalib.parsing.FilterHelper import (
@@ -64,7 +66,8 @@ def run_coala(console_printer=None,
               arg_list=None,
               args=None,
               debug=False,
-              cache=None):
+              cache=None,
+              use_core=False):
     """
     This is a main method that should be usable for almost all purposes and
     reduces executing coala to one function call.
@@ -100,6 +103,10 @@ def run_coala(console_printer=None,
                                     multiprocessing, and not catching any
                                     exceptions.
     :param cache:                   Instance of a FileCache instance.
+    :param use_core:                Run the bears with the task scheduler of
+                                    ``coalib.core`` instead of bear processes.
+                                    It is also enabled by the ``--core``
+                                    argument. Not used in debug mode.
     :return:                        A dictionary containing a list of results
                                     for all analyzed sections as key.
     """
@@ -137,6 +144,7 @@ def run_coala(console_printer=None,
     sections = {}
     results = {}
     file_dicts = {}
+    pool = None
     try:
         yielded_results = yielded_unfixed_results = False
         did_nothing = True
@@ -155,7 +163,29 @@ def run_coala(console_printer=None,
                            settings_changed(None, settings_hash))
 
         if cache is None and not sections['cli'].get('disable_caching', False):
-            cache = FileDictFileCache(None, os.getcwd(), flush_cache)
+            cache = FileDictFileCache(
+                None, os.getcwd(), flush_cache,
+                content_hash=bool(sections['cli'].get('cache_by_content',
+                                                      False)))
+
+        result_cache = None
+        task_cache = None
+        if (sections['cli'].get('cache_results', False) and
+                not sections['cli'].get('disable_caching', False)):
+            result_cache = ResultCache(None, os.getcwd(), flush_cache)
+            # The tasks include the settings, so the cache is only flushed
+            # on request.
+            task_cache = TaskResultCache(
+                None,
+                flush_cache=bool(sections['cli'].get('flush_cache', False)))
+
+        timing_cache = None
+        if not sections['cli'].get('disable_caching', False):
+            timing_cache = TimingCache(None)
+
+        debug_mode = bool(debug or args and args.debug)
+        use_core = (not debug_mode and
+                    bool(use_core or sections['cli'].get('core', False)))
 
         if targets:
             sections = OrderedDict(
@@ -173,6 +203,10 @@ def run_coala(console_printer=None,
             except (InvalidFilterException, NotImplementedError) as ex:
                 console_printer.print(ex)
 
+        # The processes running the bears are kept for all sections
+        if not (debug_mode or use_core):
+            pool = ProcessPool()
+
         for section_name, section in sections.items():
             if not section.is_enabled(targets):
                 continue
@@ -184,18 +218,38 @@ def run_coala(console_printer=None,
                 section['show_result_on_top'] = 'yeah'
 
             print_section_beginning(section)
-            section_result = execute_section(
-                section=section,
-                global_bear_list=global_bears[section_name],
-                local_bear_list=local_bears[section_name],
-                print_results=print_results,
-                cache=cache,
-                log_printer=None,
-                console_printer=console_printer,
-                debug=debug or args and args.debug,
-                apply_single=(apply_single
-                              if apply_single is not None else
-                              False))
+            if use_core:
+                # coalib.core is only imported when it is used.
+                from coalib.processes.CoreProcessing import (
+                    execute_section_with_core)
+                section_result = execute_section_with_core(
+                    section=section,
+                    global_bear_list=global_bears[section_name],
+                    local_bear_list=local_bears[section_name],
+                    print_results=print_results,
+                    cache=cache,
+                    log_printer=None,
+                    console_printer=console_printer,
+                    apply_single=(apply_single
+                                  if apply_single is not None else
+                                  False),
+                    task_cache=task_cache)
+            else:
+                section_result = execute_section(
+                    section=section,
+                    global_bear_list=global_bears[section_name],
+                    local_bear_list=local_bears[section_name],
+                    print_results=print_results,
+                    cache=cache,
+                    log_printer=None,
+                    console_printer=console_printer,
+                    debug=debug_mode,
+                    apply_single=(apply_single
+                                  if apply_single is not None else
+                                  False),
+                    result_cache=result_cache,
+                    pool=pool,
+                    timing_cache=timing_cache)
             yielded, yielded_unfixed, results[section_name] = (
                 simplify_section_result(section_result))
 
@@ -209,6 +263,8 @@ def run_coala(console_printer=None,
         update_settings_db(None, settings_hash)
         if cache:
             cache.write()
+        if timing_cache:
+            timing_cache.write()
 
         if CounterHandler.get_num_calls_for_level('ERROR') > 0:
             exitcode = 1
@@ -232,5 +288,8 @@ def run_coala(console_printer=None,
                 raise
 
         exitcode = exitcode or get_exitcode(exception)
+    finally:
+        if pool is not None:
+            pool.close()
 
     return results, exitcode, file_dicts
@@ -1,18 +1,17 @@
-import functools
 import logging
 import os
-import pkg_resources
 import itertools
-import re
+from collections import namedtuple, OrderedDict
 from types import ModuleType
 
 from coalib.bears.BEAR_KIND import BEAR_KIND
 from coalib.collecting.Importers import iimport_objects
 from coala_utils.decorators import yield_once
+from coalib.misc.CachingUtilities import db_delete, db_load, db_update
 from coalib.misc.Exceptions import log_exception
-from coalib.misc.IterUtilities import partition
 from coalib.output.printers.LOG_LEVEL import LOG_LEVEL
-from coalib.parsing.Globbing import fnmatch, iglob, glob_escape, has_wildcard
+from coalib.parsing.Globbing import (
+    fnmatch, iglob, iglob_files, glob_escape, has_wildcard, GlobSet)
 from coalib.bearlib.languages.Language import Languages
 from coalib.bearlib.languages import definitions
 
@@ -24,19 +23,23 @@ def _get_kind(bear_class):
         return None
 
 
-def _import_bears(file_path, kinds):
+def _import_bears(file_path, kinds=None):
+    def has_kind(bear_class):
+        kind = _get_kind(bear_class)
+        return kind in kinds if kinds is not None else kind is not None
+
     # recursive imports:
     for bear_list in iimport_objects(file_path,
                                      names='__additional_bears__',
                                      types=list):
         for bear_class in bear_list:
-            if _get_kind(bear_class) in kinds:
+            if has_kind(bear_class):
                 yield bear_class
     # normal import
     for bear_class in iimport_objects(file_path,
                                       attributes='kind',
                                       local=True):
-        if _get_kind(bear_class) in kinds:
+        if has_kind(bear_class):
             yield bear_class
 
 
@@ -54,6 +57,26 @@ def _sort_bears(bears, key=lambda x: x.name.lower(), reverse=False):
     return sorted(bears, key=key, reverse=reverse)
 
 
+def _strip_trailing_globstars(ignored_globs):
+    """
+    Removes unnecessary trailing globstars from ignore globs and warns about
+    them.
+
+    :param ignored_globs: List of globs to ignore when matching files
+    :return:              List of the ignore globs without trailing globstars
+    """
+    if ignored_globs is None:
+        ignored_globs = []
+    for index, glob in enumerate(ignored_globs):
+        dirname, basename = os.path.split(glob)
+        if not has_wildcard(dirname) and basename == '**':
+            logging.warning("Detected trailing globstar in ignore glob '{}'. "
+                            "Please remove the unnecessary '**' from its end."
+                            .format(glob))
+            ignored_globs[index] = glob.rstrip('*')
+    return ignored_globs
+
+
 @yield_once
 def icollect(file_paths, ignored_globs=None, match_cache={},
              match_function=fnmatch):
@@ -70,15 +93,7 @@ def icollect(file_paths, ignored_globs=None, match_cache={},
     if isinstance(file_paths, str):
         file_paths = [file_paths]
 
-    if ignored_globs is None:
-        ignored_globs = []
-    for index, glob in enumerate(ignored_globs):
-        dirname, basename = os.path.split(glob)
-        if not has_wildcard(dirname) and basename == '**':
-            logging.warning("Detected trailing globstar in ignore glob '{}'. "
-                            "Please remove the unnecessary '**' from its end."
-                            .format(glob))
-            ignored_globs[index] = glob.rstrip('*')
+    ignored_globs = _strip_trailing_globstars(ignored_globs)
 
     for file_path in file_paths:
         if file_path not in match_cache:
@@ -89,43 +104,6 @@ def icollect(file_paths, ignored_globs=None, match_cache={},
                 yield match, file_path
 
 
-def match_dir_or_file_pattern(path, ignore_patterns=None):
-    """
-    Tries to match the given path with the directory (substring match) or file
-    (enforced full match) patterns.
-
-    :param path:                Valid file path
-    :param ignore_patterns:     List of regex patterns that match a file or a
-                                directory
-    :return:                    True if any of the given pattern match
-    """
-    def escape(pattern):
-        return pattern.replace('\\', '\\\\')
-
-    expanded_ignores = list_glob_results(ignore_patterns)
-
-    file_patterns, dir_patterns = partition(
-        expanded_ignores,
-        os.path.isfile)
-
-    return (
-        any((re.match(escape(pattern), path) for pattern in dir_patterns)) or
-        any((re.fullmatch(escape(pattern), path) for pattern in file_patterns)))
-
-
-def list_glob_results(values=None):
-    """
-    Expands the globs of all given values and concatenates the results.
-
-    :param values:  List of file-globs or files.
-    :return:        List of matched files.
-    """
-    return functools.reduce(
-        lambda seed, value: seed + list(iglob(value)),
-        values if values else (),
-        [])
-
-
 def collect_files(file_paths, log_printer=None, ignored_file_paths=None,
                   limit_file_paths=None, section_name=''):
     """
@@ -137,20 +115,25 @@ def collect_files(file_paths, log_printer=None, ignored_file_paths=None,
     :param section_name:       Name of currently executing section
     :return:                   List of paths of all matching files
     """
-    limit_fnmatch = (functools.partial(fnmatch, globs=limit_file_paths)
+    limit_fnmatch = (GlobSet(limit_file_paths).match
                      if limit_file_paths else lambda fname: True)
 
-    valid_files = list(
-        filter(lambda fname: os.path.isfile(fname[0]),
-               icollect(file_paths,
-                        ignored_file_paths,
-                        match_function=match_dir_or_file_pattern)))
+    if isinstance(file_paths, str):
+        file_paths = [file_paths]
 
-    # Find globs that gave no files and warn the user
-    if valid_files:
-        collected_files, file_globs_with_files = zip(*valid_files)
-    else:
-        collected_files, file_globs_with_files = [], []
+    # All globs are matched in a single walk through the file system, which
+    # leaves out ignored directories without entering them.
+    files_by_glob = OrderedDict((glob, OrderedDict()) for glob in file_paths)
+    for filename, glob in iglob_files(
+            file_paths, _strip_trailing_globstars(ignored_file_paths)):
+        files_by_glob[glob][filename] = None
+
+    collected_files = []
+    file_globs_with_files = []
+    for glob, filenames in files_by_glob.items():
+        if filenames:
+            file_globs_with_files.append(glob)
+        collected_files.extend(filenames)
 
     _warn_if_unused_glob(file_paths, file_globs_with_files,
                          'No files matching \'{}\' were found. '
@@ -178,18 +161,132 @@ def collect_dirs(dir_paths, ignored_dir_paths=None):
         return []
 
 
-@yield_once
-def icollect_bears(bear_dir_glob, bear_globs, kinds, log_printer=None):
+BearIndexEntry = namedtuple(
+    'BearIndexEntry',
+    'name, file, kind, languages, can_detect, can_fix, aspects')
+BearIndexEntry.__doc__ = """
+    What is known about a bear without importing it: its name, the file it
+    gets collected from, its kind, languages, ``can_detect`` and ``CAN_FIX``
+    values and the qualified names of its ``'detect'`` and ``'fix'`` aspects.
     """
-    Collect all bears from bear directories that have a matching kind.
 
-    :param bear_dir_glob: Directory globs or list of such that can contain bears
-    :param bear_globs:    Globs of bears to collect
-    :param kinds:         List of bear kinds to be collected
-    :param log_printer:   Log_printer to handle logging
-    :return:              Iterator that yields a tuple with bear class and
-                          which bear_glob was used to find that bear class.
+_bear_index = None
+# The entries of the bear index that changed and are not yet written to the
+# cache database.
+_bear_index_updates = {}
+
+
+def _get_bear_index():
+    """
+    Loads the index of bear files from the cache database in the user's data
+    directory. The index is discarded if the registered bear packages
+    changed.
+
+    :return: Dictionary with bear file paths as keys and tuples of the
+             modification time and size of the file and the list of
+             ``BearIndexEntry`` objects of its bears as values.
+    """
+    global _bear_index
+    if _bear_index is None:
+        bear_dirs = sorted(collect_registered_bears_dirs('coalabears'))
+        index = db_load(None, 'bear_index', {})
+        # The registered bear packages are stored with the empty key, which
+        # is no file path.
+        if index.pop('', None) != bear_dirs:
+            db_delete(None, 'bear_index')
+            db_update(None, 'bear_index', {'': bear_dirs})
+            index = {}
+        _bear_index = index
+    return _bear_index
+
+
+def _save_bear_index():
+    """
+    Writes the changed entries of the bear index to the cache database. Each
+    bear file has an entry of its own, so coala runs indexing other files at
+    the same time don't overwrite each other's entries.
+    """
+    if (_bear_index_updates and
+            db_update(None, 'bear_index', _bear_index_updates)):
+        _bear_index_updates.clear()
+
+
+def _import_bear_file(matching_file, kinds=None):
+    """
+    Imports the bears from a file and logs problems with it.
+
+    :param matching_file: The file to import bears from.
+    :param kinds:         List of bear kinds to be collected, ``None`` to
+                          collect bears of any kind.
+    :return:              List of bear classes or ``None`` if the file cannot
+                          be imported.
     """
+    import pkg_resources
+    try:
+        return list(_import_bears(matching_file, kinds))
+    except pkg_resources.VersionConflict as exception:
+        log_exception(
+            ('Unable to collect bears from {file} because there '
+             'is a conflict with the version of a dependency '
+             'you have installed. This may be resolved by '
+             'creating a separate virtual environment for coala '
+             'or running `pip3 install \"{pkg}\"`. Be aware that '
+             'the latter solution might break other python '
+             'packages that depend on the currently installed '
+             'version.').format(file=matching_file,
+                                pkg=exception.req),
+            exception, log_level=LOG_LEVEL.WARNING)
+    except BaseException as exception:
+        log_exception(
+            'Unable to collect bears from {file}. Probably the '
+            'file is malformed or the module code raises an '
+            'exception.'.format(file=matching_file),
+            exception,
+            log_level=LOG_LEVEL.WARNING)
+    return None
+
+
+def _get_indexed_bears(matching_file):
+    """
+    Gets the index entries of the bears in a file. The file is only imported
+    if it changed since it was indexed.
+
+    :param matching_file: The file to get the bears of.
+    :return:              List of ``BearIndexEntry`` objects or ``None`` if
+                          the file cannot be imported.
+    """
+    index = _get_bear_index()
+    try:
+        stat = os.stat(matching_file)
+    except OSError:
+        return None
+    file_state = (stat.st_mtime_ns, stat.st_size)
+
+    if matching_file in index and index[matching_file][0] == file_state:
+        return index[matching_file][1]
+
+    bears = _import_bear_file(matching_file)
+    if bears is None:
+        return None
+
+    entries = [BearIndexEntry(
+                   bear.name,
+                   matching_file,
+                   _get_kind(bear),
+                   frozenset(getattr(bear, 'LANGUAGES', ())),
+                   frozenset(getattr(bear, 'can_detect', ())),
+                   frozenset(getattr(bear, 'CAN_FIX', ())),
+                   {purpose: tuple(aspect.__qualname__
+                                   for aspect in getattr(
+                                       bear, 'aspects', {}).get(purpose, ()))
+                    for purpose in ('detect', 'fix')})
+               for bear in bears]
+    index[matching_file] = _bear_index_updates[matching_file] = (file_state,
+                                                                 entries)
+    return entries
+
+
+def _iter_bear_files(bear_dir_glob, bear_globs):
     for bear_dir, dir_glob in filter(lambda x: os.path.isdir(x[0]),
                                      icollect(bear_dir_glob)):
         # Since we get a real directory here and since we
@@ -201,28 +298,51 @@ def icollect_bears(bear_dir_glob, bear_globs, kinds, log_printer=None):
             matching_files = sorted(matching_files)
 
             for matching_file in matching_files:
-                try:
-                    for bear in _import_bears(matching_file, kinds):
-                        yield bear, bear_glob
-                except pkg_resources.VersionConflict as exception:
-                    log_exception(
-                        ('Unable to collect bears from {file} because there '
-                         'is a conflict with the version of a dependency '
-                         'you have installed. This may be resolved by '
-                         'creating a separate virtual environment for coala '
-                         'or running `pip3 install \"{pkg}\"`. Be aware that '
-                         'the latter solution might break other python '
-                         'packages that depend on the currently installed '
-                         'version.').format(file=matching_file,
-                                            pkg=exception.req),
-                        exception, log_level=LOG_LEVEL.WARNING)
-                except BaseException as exception:
-                    log_exception(
-                        'Unable to collect bears from {file}. Probably the '
-                        'file is malformed or the module code raises an '
-                        'exception.'.format(file=matching_file),
-                        exception,
-                        log_level=LOG_LEVEL.WARNING)
+                yield matching_file, bear_glob
+
+
+def get_bear_index(bear_dir_glob, bear_globs=('**',)):
+    """
+    Gets the index entries of all bears from bear directories. Bear files are
+    only imported if they changed since they were last indexed, the index is
+    stored in the user's data directory.
+
+    :param bear_dir_glob: Directory globs or list of such that can contain bears
+    :param bear_globs:    Globs of bears to collect
+    :return:              List of ``BearIndexEntry`` objects.
+    """
+    entries = []
+    for matching_file, _ in _iter_bear_files(bear_dir_glob, bear_globs):
+        entries += _get_indexed_bears(matching_file) or []
+    _save_bear_index()
+    return entries
+
+
+@yield_once
+def icollect_bears(bear_dir_glob, bear_globs, kinds, log_printer=None):
+    """
+    Collect all bears from bear directories that have a matching kind.
+
+    Files are only imported if they contain bears of one of the kinds,
+    according to the bear index.
+
+    :param bear_dir_glob: Directory globs or list of such that can contain bears
+    :param bear_globs:    Globs of bears to collect
+    :param kinds:         List of bear kinds to be collected
+    :param log_printer:   Log_printer to handle logging
+    :return:              Iterator that yields a tuple with bear class and
+                          which bear_glob was used to find that bear class.
+    """
+    for matching_file, bear_glob in _iter_bear_files(bear_dir_glob,
+                                                     bear_globs):
+        entries = _get_indexed_bears(matching_file)
+        if not entries or not any(entry.kind in kinds for entry in entries):
+            continue
+
+        for bear in _import_bear_file(matching_file, kinds) or ():
+            yield bear, bear_glob
+
+    _save_bear_index()
 
 
 def collect_bears(bear_dirs, bear_globs, kinds, log_printer=None,
@@ -307,10 +427,29 @@ def collect_bears_by_aspects(aspects, kinds):
                     in the same order as kinds and not sorted based upon bear
                     name.
     """
-    all_bears = get_all_bears()
+    from coalib.settings.Section import Section
+    leaf_aspects = aspects.get_leaf_aspects()
+    aspect_names = [type(aspect).__qualname__ for aspect in leaf_aspects]
+
+    def may_analyze(entry):
+        bear_aspects = (entry.aspects.get('detect', ()) +
+                        entry.aspects.get('fix', ()))
+        return any(aspect_name == name or aspect_name.startswith(name + '.')
+                   for aspect_name in aspect_names
+                   for name in bear_aspects)
+
+    # Only bears that may analyze any of the aspects need to be imported.
+    bear_files = OrderedDict(
+        (entry.file, None)
+        for entry in get_bear_index(Section('').bear_dirs())
+        if entry.kind in kinds and may_analyze(entry))
+    all_bears = [bear
+                 for bear_file in bear_files
+                 for bear in _import_bear_file(bear_file, kinds) or ()]
+
     bears_found = tuple([] for i in range(len(kinds)))
     unfulfilled_aspects = []
-    for aspect in aspects.get_leaf_aspects():
+    for aspect in leaf_aspects:
         for bear in all_bears:
             if (aspect in bear.aspects['detect'] or
                     aspect in bear.aspects['fix']):
@@ -376,11 +515,10 @@ def get_all_bears_names():
     """
     Get an unsorted ``list`` of names of all available bears.
     """
-    return [bear.name for bear in get_all_bears()]
-
-
-def _argcomplete_bears_names(*args, **kwargs):
-    return get_all_bears_names()
+    from coalib.settings.Section import Section
+    return [entry.name
+            for entry in get_bear_index(Section('').bear_dirs())
+            if entry.kind in (BEAR_KIND.LOCAL, BEAR_KIND.GLOBAL)]
 
 
 def get_all_languages(include_unknown=False):
@@ -449,6 +587,7 @@ def collect_registered_bears_dirs(entrypoint):
     :param entrypoint: The entrypoint to find packages with.
     :return:           List of bear directories.
     """
+    import pkg_resources
     collected_dirs = []
     for ep in pkg_resources.iter_entry_points(entrypoint):
         registered_package = None
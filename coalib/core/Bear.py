@@ -10,7 +10,6 @@ from appdirs import user_data_dir
 from coala_utils.decorators import (enforce_signature, classproperty,
                                     get_public_members)
 
-import requests
 
 from coalib.results.Result import Result
 from coalib.settings.ConfigurationGathering import get_config_directory
@@ -159,6 +158,29 @@ class Bear:
         """
         return inspect.getfile(cls)
 
+    @classmethod
+    def get_source_files(cls):
+        """
+        Returns the source files of the bear and its base classes. Results
+        cached for a bear are outdated once one of them changes.
+
+        >>> class SomeBear(Bear): pass
+        >>> sorted(SomeBear.get_source_files())
+        ['...Bear.py']
+
+        :return:
+            A set of the paths of the source files.
+        """
+        files = set()
+        for base in inspect.getmro(cls):
+            try:
+                files.add(inspect.getsourcefile(base))
+            except TypeError:
+                # Builtin classes like ``object`` have no source file.
+                pass
+        files.discard(None)
+        return files
+
     @classproperty
     def maintainers(cls):
         """
@@ -397,6 +419,8 @@ class Bear:
         logging.info('{}: Downloading {} into {!r}.'
                      .format(cls.name, url, filename))
 
+        # requests is slow to import and only needed here.
+        import requests
         response = requests.get(url, stream=True, timeout=20)
         response.raise_for_status()
 
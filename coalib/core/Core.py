@@ -2,10 +2,12 @@ import asyncio
 import concurrent.futures
 import functools
 import logging
+import os
+import threading
 
 from coalib.core.DependencyTracker import DependencyTracker
 from coalib.core.Graphs import traverse_graph
-from coalib.core.PersistentHash import persistent_hash
+from coalib.core.PersistentHash import get_content_digests, structural_hash
 
 
 def group(iterable, key=lambda x: x):
@@ -163,9 +165,15 @@ class Session:
     Dependencies of bears (provided via ``bear.BEAR_DEPS``) are automatically
     handled. If BearA requires BearB as dependency, then on running BearA,
     first BearB will be executed, followed by BearA.
+
+    Bears whose ``execute_task`` is a coroutine function run their tasks on
+    the event loop of the session instead of the executor, e.g. to wait for
+    external processes (see ``coalib.misc.Shell.run_shell_command_async``)
+    without occupying a process of the executor.
     """
 
-    def __init__(self, bears, result_callback, cache=None, executor=None):
+    def __init__(self, bears, result_callback, cache=None, executor=None,
+                 max_async_tasks=None):
         """
         :param bears:
             The bear instances to run.
@@ -191,27 +199,44 @@ class Session:
             The cache has to be a dictionary-like object, that maps bear types
             to respective cache-tables. The cache-tables itself are
             dictionary-like objects that map hash-values (generated by
-            ``PersistentHash.persistent_hash`` from the task objects) to actual
-            bear results. When bears are about to be scheduled, the core
+            ``PersistentHash.structural_hash`` from the task objects) to
+            actual bear results. When bears are about to be scheduled, the core
             performs a cache-lookup. If there's a hit, the results stored in
             the cache are returned and the task won't be scheduled. In case of
-            a miss, ``execute_task`` is called normally in the executor.
+            a miss, ``execute_task`` is called normally in the executor. The
+            results of executed tasks are written to the cache at once when
+            the session ends.
+
+            ``coalib.misc.Caching.TaskResultCache`` persists the results
+            between runs.
         :param executor:
             Custom executor used to run the bears. If ``None``, a
             ``ProcessPoolExecutor`` is used using as many processes as cores
             available on the system. Note that a passed custom executor is
             closed after the core has finished.
+        :param max_async_tasks:
+            The maximum number of coroutine tasks to run at the same time. If
+            ``None``, as many as cores are available on the system.
         """
         self.bears = bears
         self.result_callback = result_callback
         self.cache = cache
+        # The contents of the files are hashed once instead of for every task
+        # they are passed to.
+        self.content_digests = (
+            None if cache is None else
+            get_content_digests(bear.file_dict for bear in bears))
 
         # Set up event loop and executor.
         self.event_loop = asyncio.SelectorEventLoop()
         self.executor = (concurrent.futures.ProcessPoolExecutor()
                          if executor is None else
                          executor)
+        self.async_task_semaphore = asyncio.Semaphore(
+            max_async_tasks or os.cpu_count() or 1, loop=self.event_loop)
         self.running_futures = {}
+        # The results to write to the cache, by bear type and fingerprint.
+        self.cache_updates = {}
 
         # Initialize dependency tracking.
         self.dependency_tracker, self.bears_to_schedule = (
@@ -223,14 +248,64 @@ class Session:
         """
         try:
             if self.bears:
+                child_watcher = self._attach_child_watcher()
                 self._schedule_bears(self.bears_to_schedule)
                 try:
                     self.event_loop.run_forever()
                 finally:
+                    if child_watcher is not None:
+                        child_watcher.attach_loop(None)
                     self.event_loop.close()
+                    if self.cache is not None:
+                        self._write_cache_updates()
         finally:
             self.executor.shutdown()
 
+    def _attach_child_watcher(self):
+        """
+        Attaches the child watcher to the event loop, so coroutine tasks can
+        run processes on Unix. The watcher can only be attached from the main
+        thread.
+
+        :return:
+            The attached child watcher or ``None``.
+        """
+        if threading.current_thread() is not threading.main_thread():
+            return None
+
+        try:
+            child_watcher = asyncio.get_child_watcher()
+        except NotImplementedError:  # pragma: no cover
+            # Windows has no child watchers.
+            return None
+
+        child_watcher.attach_loop(self.event_loop)
+        return child_watcher
+
+    @asyncio.coroutine
+    def _execute_task(self, bear, bear_args, bear_kwargs):
+        """
+        Executes a task of a bear, as a coroutine on the event loop if the
+        ``execute_task`` of the bear is a coroutine function, otherwise in the
+        executor.
+
+        :param bear:
+            The bear to execute the task of.
+        :param bear_args:
+            The positional arguments of the task.
+        :param bear_kwargs:
+            The keyword arguments of the task.
+        :return:
+            A coroutine returning the results of the task.
+        """
+        if asyncio.iscoroutinefunction(bear.execute_task):
+            with (yield from self.async_task_semaphore):
+                results = yield from bear.execute_task(bear_args, bear_kwargs)
+        else:
+            results = yield from self.event_loop.run_in_executor(
+                self.executor, bear.execute_task, bear_args, bear_kwargs)
+        return results
+
     def _schedule_bears(self, bears):
         """
         Schedules the tasks of bears.
@@ -255,18 +330,13 @@ class Session:
                     bear_args, bear_kwargs = task
 
                     if self.cache is None:
-                        future = self.event_loop.run_in_executor(
-                            self.executor, bear.execute_task,
-                            bear_args, bear_kwargs)
+                        coroutine = self._execute_task(bear, bear_args,
+                                                       bear_kwargs)
                     else:
-                        # Execute the cache lookup in the default
-                        # ThreadPoolExecutor, so cache updates reflect properly
-                        # in the main process.
-                        future = self.event_loop.run_in_executor(
-                            None, self._execute_task_with_cache,
-                            bear, task)
+                        coroutine = self._execute_task_with_cache(bear, task)
 
-                    futures.add(future)
+                    futures.add(asyncio.ensure_future(coroutine,
+                                                      loop=self.event_loop))
 
                 self.running_futures[bear] = futures
 
@@ -325,34 +395,52 @@ class Session:
 
             self.event_loop.stop()
 
-    def _execute_task_with_cache(self, bear, task):
-        if type(bear) not in self.cache:
-            bear_cache = {}
-            self.cache[type(bear)] = bear_cache
-        else:
-            bear_cache = self.cache[type(bear)]
+    def _get_bear_cache(self, bear_type):
+        if bear_type not in self.cache:
+            self.cache[bear_type] = {}
+        return self.cache[bear_type]
 
-        fingerprint = persistent_hash(task)
+    @asyncio.coroutine
+    def _execute_task_with_cache(self, bear, task):
+        """
+        Looks up the results of a task in the cache and executes the task
+        only if there are none. The lookup runs on the event loop, so only
+        the tasks that missed occupy the executor.
 
-        if fingerprint in bear_cache:
-            results = bear_cache[fingerprint]
-        else:
-            bear_args, bear_kwargs = task
+        :param bear:
+            The bear to execute the task of.
+        :param task:
+            The task as tuple of its positional and keyword arguments.
+        :return:
+            A coroutine returning the results of the task.
+        """
+        fingerprint = structural_hash(task, self.content_digests)
+        cache_updates = self.cache_updates.setdefault(type(bear), {})
 
-            future = asyncio.run_coroutine_threadsafe(
-                asyncio.wait_for(
-                    self.event_loop.run_in_executor(
-                        self.executor, bear.execute_task,
-                        bear_args, bear_kwargs),
-                    None,
-                    loop=self.event_loop),
-                loop=self.event_loop)
+        results = cache_updates.get(fingerprint)
+        if results is None:
+            results = self._get_bear_cache(type(bear)).get(fingerprint)
 
-            results = future.result()
-            bear_cache[fingerprint] = results
+        if results is None:
+            bear_args, bear_kwargs = task
+            results = yield from self._execute_task(bear, bear_args,
+                                                    bear_kwargs)
+            # The results are written to the cache at once when the session
+            # ends.
+            cache_updates[fingerprint] = results
 
         return results
 
+    def _write_cache_updates(self):
+        """
+        Writes the results of the executed tasks to the cache.
+        """
+        for bear_type, updates in self.cache_updates.items():
+            bear_cache = self._get_bear_cache(bear_type)
+            for fingerprint, results in updates.items():
+                bear_cache[fingerprint] = results
+        self.cache_updates.clear()
+
     def _finish_task(self, bear, future):
         """
         The callback for when a task of a bear completes. It is responsible for
@@ -409,7 +497,8 @@ class Session:
                         exc_info=ex)
 
 
-def run(bears, result_callback, cache=None, executor=None):
+def run(bears, result_callback, cache=None, executor=None,
+        max_async_tasks=None):
     """
     Initiates a session with the given parameters and runs it.
 
@@ -437,14 +526,22 @@ def run(bears, result_callback, cache=None, executor=None):
         The cache has to be a dictionary-like object, that maps bear types
         to respective cache-tables. The cache-tables itself are dictionary-like
         objects that map hash-values (generated by
-        ``PersistentHash.persistent_hash`` from the task objects) to actual
+        ``PersistentHash.structural_hash`` from the task objects) to actual
         bear results. When bears are about to be scheduled, the core performs
         a cache-lookup. If there's a hit, the results stored in the cache
         are returned and the task won't be scheduled. In case of a miss,
-        ``execute_task`` is called normally in the executor.
+        ``execute_task`` is called normally in the executor. The results of
+        executed tasks are written to the cache at once when the session
+        ends.
+
+        ``coalib.misc.Caching.TaskResultCache`` persists the results between
+        runs.
     :param executor:
         Custom executor used to run the bears. If ``None``, a
         ``ProcessPoolExecutor`` is used using as many processes as cores
         available on the system.
+    :param max_async_tasks:
+        The maximum number of coroutine tasks to run at the same time, see
+        ``Session``.
     """
-    Session(bears, result_callback, cache, executor).run()
+    Session(bears, result_callback, cache, executor, max_async_tasks).run()
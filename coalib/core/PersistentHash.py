@@ -1,7 +1,17 @@
 from collections import Iterable
 from copy import deepcopy
+from functools import partial
+import hashlib
 from hashlib import sha1
 import pickle
+import struct
+
+# BLAKE2 is considerably faster than SHA1 on 64 bit machines, but only
+# available since Python 3.6.
+if hasattr(hashlib, 'blake2b'):
+    _new_hasher = partial(hashlib.blake2b, digest_size=16)
+else:  # pragma: no cover
+    _new_hasher = sha1
 
 
 def order(obj):
@@ -42,3 +52,130 @@ def persistent_hash(obj):
     fingerprint_generator = sha1()
     fingerprint_generator.update(pickle.dumps(obj, protocol=4))
     return fingerprint_generator.digest()
+
+
+def _pack_length(length):
+    return struct.pack('<Q', length)
+
+
+def hash_contents(file):
+    """
+    Hashes the contents of a file, given as sequence of lines. The lines are
+    expected to be split at the line breaks, so besides the contents only
+    their number is hashed.
+
+    >>> hash_contents(('a\\n', 'b\\n')) == hash_contents(['a\\n', 'b\\n'])
+    True
+    >>> hash_contents(('a\\n', 'b\\n')) == hash_contents(('a\\nb\\n',))
+    False
+
+    :param file: The lines of the file.
+    :return:     The digest of the contents as ``bytes``.
+    """
+    hasher = _new_hasher(_pack_length(len(file)))
+    hasher.update(''.join(file).encode('utf-8', 'surrogatepass'))
+    return hasher.digest()
+
+
+def get_content_digests(file_dicts):
+    """
+    Hashes the contents of all files in the given file dictionaries, so
+    ``structural_hash`` can use the digests instead of hashing the contents
+    of a file again for each task it is passed to.
+
+    :param file_dicts: An iterable of file dictionaries, mapping filenames to
+                       the lines of the files.
+    :return:           A dictionary to pass to ``structural_hash``.
+    """
+    digests = {}
+    seen_file_dicts = set()
+    for file_dict in file_dicts:
+        if id(file_dict) in seen_file_dicts:
+            continue
+        seen_file_dicts.add(id(file_dict))
+
+        for file in file_dict.values():
+            # Files that couldn't be read are ``None``.
+            if file is not None and id(file) not in digests:
+                # The contents are kept alongside, so their ``id`` can't be
+                # reused by another object.
+                digests[id(file)] = file, hash_contents(file)
+    return digests
+
+
+def _digest(obj, content_digests):
+    parts = []
+    _add_parts(parts, obj, content_digests)
+    return _new_hasher(b''.join(parts)).digest()
+
+
+def _add_parts(parts, obj, content_digests):
+    """
+    Appends the byte strings identifying ``obj`` to ``parts``, which are
+    hashed at once afterwards.
+    """
+    content_digest = content_digests.get(id(obj))
+    if content_digest is not None and content_digest[0] is obj:
+        parts.append(b'C' + content_digest[1])
+    elif type(obj) is str:
+        data = obj.encode('utf-8', 'surrogatepass')
+        parts.append(b'S' + _pack_length(len(data)) + data)
+    elif isinstance(obj, bytes):
+        parts.append(b'B' + _pack_length(len(obj)) + obj)
+    elif obj is None or obj is True or obj is False:
+        parts.append({None: b'N', True: b'T', False: b'F'}[obj])
+    elif type(obj) is int or type(obj) is float:
+        data = repr(obj).encode()
+        parts.append((b'I' if type(obj) is int else b'R') +
+                     _pack_length(len(data)) + data)
+    elif isinstance(obj, (tuple, list)):
+        parts.append((b'U' if isinstance(obj, tuple) else b'L') +
+                     _pack_length(len(obj)))
+        for item in obj:
+            _add_parts(parts, item, content_digests)
+    elif isinstance(obj, (set, frozenset)):
+        if all(type(item) is str for item in obj):
+            # Strings can be sorted directly, e.g. for settings.
+            parts.append(b'e' + _pack_length(len(obj)))
+            for item in sorted(obj):
+                _add_parts(parts, item, content_digests)
+        else:
+            parts.append(b'E' + _pack_length(len(obj)))
+            parts.extend(sorted(_digest(item, content_digests)
+                                for item in obj))
+    elif isinstance(obj, dict):
+        if all(type(key) is str for key in obj):
+            parts.append(b'd' + _pack_length(len(obj)))
+            for key in sorted(obj):
+                _add_parts(parts, key, content_digests)
+                _add_parts(parts, obj[key], content_digests)
+        else:
+            parts.append(b'D' + _pack_length(len(obj)))
+            parts.extend(sorted(_digest(item, content_digests)
+                                for item in obj.items()))
+    else:
+        data = pickle.dumps(obj, protocol=4)
+        parts.append(b'P' + _pack_length(len(data)) + data)
+
+
+def structural_hash(obj, content_digests=None):
+    """
+    Generates a hash for an object like ``persistent_hash``, e.g. for the
+    tasks of bears, but walks containers instead of pickling the whole
+    object. Sets and dictionaries are hashed independent of their order:
+
+    >>> (structural_hash(((), {'a': 1, 'b': {2, 3}})) ==
+    ...  structural_hash(((), {'b': {3, 2}, 'a': 1})))
+    True
+    >>> structural_hash((1, 2)) == structural_hash(('1', '2'))
+    False
+
+    Objects that aren't builtin values or containers are pickled.
+
+    :param obj:             The object to hash.
+    :param content_digests: The digests of file contents, as returned by
+                            ``get_content_digests``. Contents found in there
+                            are hashed by their digest.
+    :return:                The hash as ``bytes``.
+    """
+    return _digest(obj, {} if content_digests is None else content_digests)
@@ -15,7 +15,8 @@ between objects. The circular dependency errors are handled by
 ``CircularDependencyError``. The ``Graphs`` detects cyclicity in dependency
 graphs and raises ``CircularDependencyError`` if found.
 
-``PersistentHash`` module generates a unique hash for every task object
-first by pickling them and then using the pickled object to generate a sha1
-hash. It can then be used for caching results.
+``PersistentHash`` module generates a unique hash for every task object,
+which is used for caching results. ``structural_hash`` walks the containers
+of a task and hashes the contents of files by their precomputed digests, so
+they are not serialized again for every task.
 """
@@ -1,9 +1,16 @@
+from contextlib import contextmanager
+import codecs
+import mmap
 import os
+import re
 
 from coala_utils.decorators import generate_eq
 from cached_property import cached_property
 
 
+NON_ASCII_REGEX = re.compile(rb'[\x80-\xff]')
+
+
 @generate_eq('name', 'timestamp')
 class File:
     """
@@ -50,6 +57,11 @@ class File:
     >>> ff.string
     'This is a test file.'
 
+    Check that the file can be decoded as UTF-8 without loading all of it
+    into memory, a ``UnicodeDecodeError`` is raised otherwise:
+
+    >>> ff.check_encoding()
+
     Get the filename:
 
     >>> ff.name == temp.name
@@ -84,13 +96,64 @@ class File:
         """
         return self.lines[line]
 
+    @contextmanager
+    def _mapped(self):
+        """
+        Memory-maps the file, so it can be read without copying it.
+
+        :return:
+            A context manager yielding the read-only ``mmap`` of the file,
+            or an empty bytes object for an empty file (which can't be
+            mapped).
+        """
+        with open(self._filename, 'rb') as fp:
+            if os.fstat(fp.fileno()).st_size == 0:
+                yield b''
+            else:
+                with mmap.mmap(fp.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                    yield mm
+
+    def check_encoding(self, chunk_size=1 << 20):
+        """
+        Checks that the file is UTF-8 encoded. Files that only contain ASCII
+        characters are not decoded at all, other files are decoded in chunks
+        so at most ``chunk_size`` bytes are in memory at once. The decoded
+        contents are not kept.
+
+        :param chunk_size:
+            The number of bytes to decode at once.
+        :raises UnicodeDecodeError:
+            If the file contains invalid UTF-8.
+        """
+        with self._mapped() as content:
+            start = NON_ASCII_REGEX.search(content)
+            if start is None:
+                return
+
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            for offset in range(start.start(), len(content), chunk_size):
+                decoder.decode(content[offset:offset + chunk_size])
+            decoder.decode(b'', final=True)
+
     @cached_property
     def lines(self):
         """
+        The lines are decoded straight from the memory-mapped file, so
+        neither ``raw`` nor ``string`` are loaded and kept in memory unless
+        they are accessed explicitly.
+
         :return:
             A tuple containing the lines of the file.
         """
-        lines = self.string.splitlines()
+        if 'string' in self.__dict__:
+            string = self.string
+        elif 'raw' in self.__dict__:
+            string = self.raw.decode(encoding='utf-8')
+        else:
+            with self._mapped() as content:
+                string = str(content, encoding='utf-8')
+
+        lines = string.splitlines()
         if self._newline:
             return tuple(line + '\n'
                          for line in lines)
@@ -114,6 +177,23 @@ class File:
         """
         return self.raw.decode(encoding='utf-8')
 
+    def __getstate__(self):
+        """
+        Leaves out the raw and decoded contents when pickling, e.g. when
+        passing the ``File`` to another process. Unless its lines were
+        already loaded, the file is then mapped again in the receiving
+        process when its lines are accessed, so every process shares the
+        contents through the page cache of the operating system instead of
+        receiving a copy.
+
+        :return:
+            The attributes of the ``File`` to be pickled.
+        """
+        state = self.__dict__.copy()
+        state.pop('raw', None)
+        state.pop('string', None)
+        return state
+
     @property
     def name(self):
         """
@@ -294,6 +294,13 @@ class FileProxyMap:
         if self.get(filename):
             del self._map[filename]
 
+    def __iter__(self):
+        """
+        :return:
+            Returns an iterator over the proxy instances in the map.
+        """
+        return iter(list(self._map.values()))
+
     def get(self, filename):
         """
         :param filename:
@@ -335,8 +342,8 @@ class FileProxyMap:
 
             # Could raise a ValueError
             proxy = FileProxy(filename, workspace)
-            self.add(proxy)
 
+        self.add(proxy)
         return proxy
 
 
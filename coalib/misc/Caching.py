@@ -1,10 +1,16 @@
 import logging
-import time
 import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import threading
+import time
 
 from coala_utils.decorators import enforce_signature
+from coalib import VERSION
 from coalib.misc.CachingUtilities import (
-    pickle_load, pickle_dump, delete_files)
+    db_delete, db_get, db_load, db_update, get_data_path, hash_file, hash_id)
 from coalib.misc.Exceptions import log_exception
 from coalib.processes.Processing import get_file_dict
 from coalib.io.FileProxy import (
@@ -12,6 +18,24 @@ from coalib.io.FileProxy import (
 from coalib.output.printers.LOG_LEVEL import LOG_LEVEL
 
 
+def get_source_hash(bear_type):
+    """
+    Hashes the version of coala and the contents of the source files of a
+    bear class, which outdate the results cached for it.
+
+    :param bear_type: The bear class, see ``get_source_files`` of
+                      ``coalib.core.Bear.Bear`` and ``coalib.bears.Bear.Bear``.
+    :return:          The hash.
+    """
+    files = []
+    for filename in sorted(bear_type.get_source_files()):
+        try:
+            files.append((filename, hash_file(filename)))
+        except OSError:
+            files.append((filename, None))
+    return hash_id(repr((VERSION, files)))
+
+
 class FileCache:
     """
     This object is a file cache that helps in collecting only the changed
@@ -66,6 +90,27 @@ class FileCache:
 
     >>> old_data["b.c"] < new_data["b.c"]
     True
+
+    Modification times are only accurate to a second and change even if the
+    content of a file stays the same, e.g. after a ``git checkout``. The
+    cache can instead track a fingerprint of the content of each file:
+
+    >>> cache = FileCache(None, "test", flush_cache=True, content_hash=True)
+
+    A fingerprint consists of the size, the modification time in nanoseconds
+    and a hash of the content of the file. The (comparatively slow) hash is
+    only recomputed if the size or the modification time of a file changed.
+
+    The cache also remembers the ignore comments found in each file, so they
+    are only searched for again if the content of a file changed:
+
+    >>> cache.set_ignore_lines('a.c', b'digest', [([], 1, 2)])
+    >>> cache.write()
+    >>> cache = FileCache(None, "test", content_hash=True)
+    >>> cache.get_ignore_lines('a.c', b'digest')
+    [([], 1, 2)]
+    >>> cache.get_ignore_lines('a.c', b'other digest') is None
+    True
     """
 
     @enforce_signature
@@ -73,19 +118,31 @@ class FileCache:
             self,
             log_printer,
             project_dir: str,
-            flush_cache: bool = False):
+            flush_cache: bool = False,
+            content_hash: bool = False):
         """
         Initialize FileCache.
 
-        :param log_printer: An object to use for logging.
-        :param project_dir: The root directory of the project to be used
-                            as a key identifier.
-        :param flush_cache: Flush the cache and rebuild it.
+        :param log_printer:  An object to use for logging.
+        :param project_dir:  The root directory of the project to be used
+                             as a key identifier.
+        :param flush_cache:  Flush the cache and rebuild it.
+        :param content_hash: Detect changed files by a fingerprint of their
+                             content instead of their modification time.
         """
         self.project_dir = project_dir
+        self.content_hash = content_hash
         self.current_time = int(time.time())
+        self.current_time_ns = int(time.time() * 10**9)
+
+        self.files_namespace = 'files:' + project_dir
+        self.ignore_namespace = 'ignore_lines:' + project_dir
+        # The ignore comments of the files, loaded from the database when
+        # they are needed, and the ones to write in ``write()``.
+        self.ignore_lines = {}
+        self.changed_ignore_lines = {}
 
-        cache_data = pickle_load(None, project_dir, {})
+        cache_data = db_get(None, 'projects', project_dir, {})
         last_time = -1
         if 'time' in cache_data:
             last_time = cache_data['time']
@@ -94,8 +151,19 @@ class FileCache:
                             'time is behind the last recorded run time on this '
                             'project. The cache will be force flushed.')
             flush_cache = True
+        if (not flush_cache and 'time' in cache_data and
+                cache_data.get('content_hash', False) != content_hash):
+            logging.debug('The file cache was written with another caching '
+                          'mode and will be flushed.')
+            flush_cache = True
 
-        self.data = cache_data.get('files', {})
+        # The entries as they are stored in the database, so ``write()`` only
+        # needs to write the changed ones.
+        self.stored_data = (db_load(None, self.files_namespace, {})
+                            if not flush_cache else {})
+        # Entries equal to the time of the last run are stored as ``None``.
+        self.data = {file: last_time if value is None else value
+                     for file, value in self.stored_data.items()}
         if flush_cache:
             self.flush_cache()
 
@@ -104,13 +172,20 @@ class FileCache:
         # later section (which will happen if that file doesn't yield a
         # result in that section).
         self.to_untrack = set()
+        # fingerprints already computed in this run, see ``write()``
+        self.fingerprints = {}
 
     def flush_cache(self):
         """
-        Flushes the cache and deletes the relevant file.
+        Flushes the cache and deletes the relevant database entries.
         """
         self.data = {}
-        delete_files(None, [self.project_dir])
+        self.stored_data = {}
+        self.ignore_lines = {}
+        self.changed_ignore_lines = {}
+        db_delete(None, self.files_namespace)
+        db_delete(None, self.ignore_namespace)
+        db_update(None, 'projects', {}, deleted_keys=[self.project_dir])
         logging.debug('The file cache was successfully flushed.')
 
     def __enter__(self):
@@ -121,16 +196,47 @@ class FileCache:
         Update the last run time on the project for each file
         to the current time. Using this object as a contextmanager is
         preferred (that will automatically call this method on exit).
+
+        Only the entries that changed since the cache was loaded are written
+        to the database.
         """
         for file in self.to_untrack:
             if file in self.data:
                 del self.data[file]
-        for file_name in self.data:
-            self.data[file_name] = self.current_time
-        pickle_dump(
-            None,
-            self.project_dir,
-            {'time': self.current_time, 'files': self.data})
+        if self.content_hash:
+            for file_name in list(self.data):
+                try:
+                    self.data[file_name] = (
+                        self.fingerprints.get(file_name) or
+                        self._get_fingerprint(file_name))
+                except OSError:
+                    del self.data[file_name]
+        else:
+            for file_name in self.data:
+                self.data[file_name] = self.current_time
+
+        data = {file: None if value == self.current_time else value
+                for file, value in self.data.items()}
+        changed_data = {file: value
+                        for file, value in data.items()
+                        if file not in self.stored_data or
+                        self.stored_data[file] != value}
+        deleted_files = self.stored_data.keys() - data.keys()
+
+        if (self.changed_ignore_lines and
+                db_update(None, self.ignore_namespace,
+                          self.changed_ignore_lines)):
+            self.changed_ignore_lines = {}
+        # Write the files first: if writing the project time fails, the
+        # files are only considered older than they are. If writing the files
+        # fails, the project time must not be updated, as the entries stored
+        # as ``None`` would be considered checked at the current time.
+        if db_update(None, self.files_namespace, changed_data, deleted_files):
+            self.stored_data = data
+            db_update(None,
+                      'projects',
+                      {self.project_dir: {'time': self.current_time,
+                                          'content_hash': self.content_hash}})
 
     def __exit__(self, type, value, traceback):
         """
@@ -161,6 +267,38 @@ class FileCache:
             if file not in self.data:
                 self.data[file] = -1
 
+    def get_ignore_lines(self, file, digest):
+        """
+        Returns the ignore comments found in a file when its content had the
+        given digest.
+
+        :param file:   The file to get the ignore comments of.
+        :param digest: The digest of the current content of the file.
+        :return:       The ignore comments as returned by
+                       ``coalib.processes.Processing.get_ignore_lines``, or
+                       ``None`` if they are not cached for this content.
+        """
+        if file not in self.ignore_lines:
+            self.ignore_lines[file] = db_get(None, self.ignore_namespace, file)
+
+        cached = self.ignore_lines[file]
+        if cached is None or cached[0] != digest:
+            return None
+        return cached[1]
+
+    def set_ignore_lines(self, file, digest, ignore_lines):
+        """
+        Remembers the ignore comments found in a file, they are written to
+        the database with the cache.
+
+        :param file:         The file the comments were found in.
+        :param digest:       The digest of the content of the file.
+        :param ignore_lines: The ignore comments as returned by
+                             ``coalib.processes.Processing.get_ignore_lines``.
+        """
+        self.ignore_lines[file] = self.changed_ignore_lines[file] = (
+            digest, ignore_lines)
+
     def get_uncached_files(self, files):
         """
         Returns the set of files that are not in the cache yet or have been
@@ -173,12 +311,635 @@ class FileCache:
             # The first run on this project. So all files are new
             # and must be returned irrespective of whether caching is turned on.
             return files
+        elif self.content_hash:
+            return {file for file in files if self._content_changed(file)}
         else:
             return {file
                     for file in files
                     if (file not in self.data or
                         int(os.path.getmtime(file)) > self.data[file])}
 
+    def _content_changed(self, file):
+        """
+        Checks whether the content of the given file changed since the last
+        run. The computed fingerprint is remembered for ``write()``.
+
+        :param file: The file to check.
+        :return:     True if the file is uncached or its content changed.
+        """
+        cached = self.data.get(file, -1)
+        # ``_get_fingerprint`` may refresh the modification time in the cache
+        self.fingerprints[file] = self._get_fingerprint(file)
+        return cached == -1 or self.fingerprints[file] != self.data[file]
+
+    def _get_fingerprint(self, file):
+        """
+        Returns the current fingerprint of the given file.
+
+        The content of the file is only hashed if its size or modification
+        time differs from the fingerprint stored in the cache. If the stored
+        fingerprint only differs in the modification time, it is updated so
+        that the file is not hashed again in the next run.
+
+        :param file: The file to get the fingerprint of.
+        :return:     A tuple of the size, the modification time in
+                     nanoseconds and the hash of the content of the file, or
+                     -1 if the file was modified after this run started.
+        """
+        stat = os.stat(file)
+        if stat.st_mtime_ns > self.current_time_ns:
+            # The file was modified during this run, its content might not
+            # be the one that was analyzed.
+            return -1
+
+        cached = self.data.get(file, -1)
+        if cached != -1:
+            size, mtime_ns, digest = cached
+            if size == stat.st_size and mtime_ns == stat.st_mtime_ns:
+                return cached
+            if size == stat.st_size and hash_file(file) == digest:
+                self.data[file] = (size, stat.st_mtime_ns, digest)
+                return self.data[file]
+
+        return stat.st_size, stat.st_mtime_ns, hash_file(file)
+
+
+class ResultCache:
+    """
+    This object is a disk-backed store of the results of local bears, so
+    results for unchanged files can be replayed instead of running the bear
+    again. Example/Tutorial:
+
+    >>> import logging
+    >>> from coalib.bears.LocalBear import LocalBear
+    >>> from coalib.results.Result import Result
+    >>> from coalib.settings.Section import Section
+    >>> from coalib.settings.Setting import Setting
+    >>> logging.getLogger().setLevel(logging.CRITICAL)
+
+    >>> class SomeBear(LocalBear):
+    ...     def run(self, filename, file, max_length: int = 80):
+    ...         yield Result.from_values(self, 'message', filename)
+
+    To initialize the cache create an instance for the project:
+
+    >>> cache = ResultCache(None, "test", flush_cache=True)
+
+    Results are stored for the bear (including its settings), the file name
+    and the content of the file:
+
+    >>> bear = SomeBear(Section('name'), None)
+    >>> file = ('line\\n',)
+    >>> cache.get(bear, 'a.c', file) is None
+    True
+    >>> cache.set(bear, 'a.c', file, list(bear.run('a.c', file)))
+    >>> cache.get(bear, 'a.c', file)[0].message
+    'message'
+
+    A change of either of those invalidates the cached results:
+
+    >>> cache.get(bear, 'a.c', ('other line\\n',)) is None
+    True
+    >>> bear.section.append(Setting('max_length', '100'))
+    >>> cache.get(bear, 'a.c', file) is None
+    True
+
+    The results are also outdated once the source files of the bear or the
+    version of coala change.
+
+    Every entry is written to its own file, so processes running bears in
+    parallel can use the cache without any further synchronization.
+    """
+
+    _source_hashes = {}
+
+    @enforce_signature
+    def __init__(
+            self,
+            log_printer,
+            project_dir: str,
+            flush_cache: bool = False):
+        """
+        Initialize ResultCache.
+
+        :param log_printer: An object to use for logging.
+        :param project_dir: The root directory of the project to be used
+                            as a key identifier.
+        :param flush_cache: Flush the cache and rebuild it.
+        """
+        self.project_dir = project_dir
+        # ``None`` if the user data directory is not accessible, the error
+        # is already logged by ``get_data_path``.
+        self.cache_dir = get_data_path(None, 'results:' + project_dir)
+
+        if flush_cache:
+            self.flush_cache()
+
+    def flush_cache(self):
+        """
+        Flushes the cache and deletes all stored results.
+        """
+        if self.cache_dir is not None:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+            logging.debug('The result cache was successfully flushed.')
+
+    @staticmethod
+    def get_settings_hash(bear):
+        """
+        Computes a hash of the settings the given bear is run with.
+
+        :param bear: The bear instance.
+        :return:     A MD5 hash unique to the bear class, its source files,
+                     the version of coala and the settings.
+        """
+        bear_type = type(bear)
+        # The source files are hashed once per process, the bears that run
+        # are the ones that were imported then.
+        if bear_type not in ResultCache._source_hashes:
+            ResultCache._source_hashes[bear_type] = get_source_hash(bear_type)
+
+        metadata = bear.get_metadata()
+        params = sorted(set(metadata.non_optional_params) |
+                        set(metadata.optional_params))
+        settings = [(param, str(bear.section[param]))
+                    for param in params if param in bear.section]
+        return hash_id(repr((bear_type.__module__,
+                             bear_type.__qualname__,
+                             ResultCache._source_hashes[bear_type],
+                             settings)))
+
+    def _get_entry_path(self, bear, filename):
+        return os.path.join(self.cache_dir,
+                            hash_id(repr((bear.__class__.__module__,
+                                          bear.__class__.__qualname__,
+                                          filename))))
+
+    def get(self, bear, filename, file):
+        """
+        Returns the cached results of a bear for a file.
+
+        :param bear:     The local bear instance.
+        :param filename: The name of the file.
+        :param file:     The lines of the file.
+        :return:         The list of cached results or ``None`` if no
+                         results are cached for this version of the file
+                         and these settings of the bear.
+        """
+        if self.cache_dir is None or file is None:
+            return None
+
+        try:
+            with open(self._get_entry_path(bear, filename), 'rb') as f:
+                settings_hash, file_hash, results = pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError,
+                AttributeError, ImportError, ValueError):
+            return None
+
+        if (settings_hash != self.get_settings_hash(bear) or
+                file_hash != hash_id(''.join(file))):
+            return None
+
+        return results
+
+    def set(self, bear, filename, file, results):
+        """
+        Stores the results of a bear for a file.
+
+        Only one version of the results is kept per bear and file, so the
+        cache does not grow with the number of runs.
+
+        :param bear:     The local bear instance.
+        :param filename: The name of the file.
+        :param file:     The lines of the file the bear was run on.
+        :param results:  The list of results the bear yielded.
+        """
+        if self.cache_dir is None or file is None:
+            return
+
+        entry = (self.get_settings_hash(bear), hash_id(''.join(file)),
+                 results)
+        temp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            # Write to a temporary file first, so concurrent readers never
+            # see a partially written entry.
+            with tempfile.NamedTemporaryFile(
+                    dir=self.cache_dir, delete=False) as f:
+                temp_path = f.name
+                pickle.dump(entry, f)
+            os.replace(temp_path, self._get_entry_path(bear, filename))
+        except (OSError, pickle.PicklingError, AttributeError,
+                TypeError) as exception:
+            logging.debug('Failed to cache the results of {} for {}: {}'
+                          .format(bear.name, filename, exception))
+            if temp_path is not None and os.path.isfile(temp_path):
+                os.remove(temp_path)
+
+
+class TimingCache:
+    """
+    This object stores how long local bears take per byte of a file, so the
+    time they take on a file can be estimated. Example/Tutorial:
+
+    >>> import logging
+    >>> logging.getLogger().setLevel(logging.CRITICAL)
+
+    >>> cache = TimingCache(None, flush_cache=True)
+
+    Bears without timings are estimated to take as long as the other bears
+    on average, or 1 second per byte if no timings are known at all:
+
+    >>> cache.get_seconds_per_byte('SomeBear')
+    1
+
+    Timings are added as a dict of lists of the seconds a bear took and the
+    bytes it checked in that time, with the bear names as keys. They are
+    used once they are written:
+
+    >>> cache.add({'SomeBear': [0.5, 1000], 'OtherBear': [0.1, 1000]})
+    >>> cache.add({'SomeBear': [0.5, 1000]})
+    >>> cache.write()
+    >>> cache.get_seconds_per_byte('SomeBear')
+    0.0005
+    >>> round(cache.get_seconds_per_byte('NewBear'), 6)
+    0.0003
+
+    Later timings are averaged with the stored ones, so a single slow run
+    does not dominate the estimates:
+
+    >>> cache.add({'SomeBear': [1.5, 1000]})
+    >>> cache.write()
+    >>> TimingCache(None).get_seconds_per_byte('SomeBear')
+    0.001
+    """
+
+    NAMESPACE = 'bear_timings'
+
+    def __init__(self, log_printer, flush_cache: bool = False):
+        """
+        Initialize TimingCache.
+
+        :param log_printer: An object to use for logging.
+        :param flush_cache: Flush the cache and rebuild it.
+        """
+        if flush_cache:
+            db_delete(None, self.NAMESPACE)
+            self.data = {}
+        else:
+            self.data = db_load(None, self.NAMESPACE, fallback={})
+        self.timings = {}
+
+    def get_seconds_per_byte(self, bear_name):
+        """
+        Estimates the time a bear takes for each byte of a file.
+
+        :param bear_name: The name of the bear.
+        :return:          The estimated number of seconds.
+        """
+        if bear_name in self.data:
+            return self.data[bear_name]
+
+        if self.data:
+            return sum(self.data.values()) / len(self.data)
+
+        return 1
+
+    def add(self, timings):
+        """
+        Adds timings of bears, to be stored with the next ``write``.
+
+        :param timings: A dict of lists of the seconds a bear took and the
+                        number of bytes it checked, with the bear names as
+                        keys.
+        """
+        for bear_name, (seconds, size) in timings.items():
+            timing = self.timings.setdefault(bear_name, [0, 0])
+            timing[0] += seconds
+            timing[1] += size
+
+    def write(self):
+        """
+        Updates the stored timings with the added ones.
+        """
+        updated = {}
+        for bear_name, (seconds, size) in self.timings.items():
+            if size > 0:
+                seconds_per_byte = seconds / size
+                if bear_name in self.data:
+                    seconds_per_byte = (
+                        self.data[bear_name] + seconds_per_byte) / 2
+                updated[bear_name] = seconds_per_byte
+
+        self.timings = {}
+        if updated:
+            self.data.update(updated)
+            db_update(None, self.NAMESPACE, updated)
+
+
+class _BearResultTable:
+    """
+    The cache-table of a bear type in a ``TaskResultCache``.
+    """
+
+    def __init__(self, cache, bear_type):
+        self.cache = cache
+        self.bear_type = bear_type
+
+    def get(self, fingerprint, fallback=None):
+        return self.cache.get(self.bear_type, fingerprint, fallback)
+
+    def __contains__(self, fingerprint):
+        return self.get(fingerprint) is not None
+
+    def __getitem__(self, fingerprint):
+        results = self.get(fingerprint)
+        if results is None:
+            raise KeyError(fingerprint)
+        return results
+
+    def __setitem__(self, fingerprint, results):
+        self.cache.set(self.bear_type, fingerprint, results)
+
+
+class TaskResultCache:
+    """
+    This object is a disk-backed, size-bounded cache for the results of the
+    tasks of ``coalib.core`` bears, to be passed as ``cache`` to
+    ``coalib.core.Core.run``. Example/Tutorial:
+
+    >>> import logging
+    >>> from coalib.core.Bear import Bear
+    >>> logging.getLogger().setLevel(logging.CRITICAL)
+
+    >>> class SomeBear(Bear):
+    ...     pass
+
+    >>> cache = TaskResultCache(None, flush_cache=True)
+
+    Like the caches the core expects, it maps the bear types to their
+    cache-tables, which map the fingerprints of the tasks to their results:
+
+    >>> cache[SomeBear][b'fingerprint'] = ['result']
+    >>> cache[SomeBear][b'fingerprint']
+    ['result']
+    >>> b'other fingerprint' in cache[SomeBear]
+    False
+
+    The results are stored in the cache database with ``write``, so they are
+    available in later runs:
+
+    >>> cache.write()
+    >>> TaskResultCache(None)[SomeBear].get(b'fingerprint')
+    ['result']
+
+    Hits and misses are counted:
+
+    >>> cache.hits, cache.misses
+    (1, 1)
+
+    The results of a bear are invalidated when the source files of the bear
+    (see ``coalib.core.Bear.get_source_files``) or the version of coala
+    change. Once the stored results are larger than ``max_size``, the least
+    recently used ones are removed.
+    """
+
+    TABLE = 'task_results'
+
+    def __init__(self, log_printer, max_size: int = 100 * 1024 ** 2,
+                 flush_cache: bool = False):
+        """
+        Initialize TaskResultCache.
+
+        :param log_printer: An object to use for logging.
+        :param max_size:    The maximum number of bytes the pickled results
+                            may take in the cache database.
+        :param flush_cache: Flush the cache and rebuild it.
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._init_state()
+
+        if flush_cache:
+            self.flush_cache()
+
+    def _init_state(self):
+        self._lock = threading.RLock()
+        self._connection = None
+        self._connection_pid = None
+        self._versions = {}
+        # The entries to insert and the times entries were last used, with
+        # ``(bear_key, fingerprint)`` as keys.
+        self._new_entries = {}
+        self._used_entries = {}
+
+    def __getstate__(self):
+        # The connection can't be shared with other processes, each process
+        # opens its own one.
+        return {'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses}
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._init_state()
+
+    def _get_connection(self):
+        """
+        :return: The connection to the cache database of this process or
+                 ``None`` if the database is not accessible.
+        """
+        if self._connection_pid != os.getpid():
+            self._connection_pid = os.getpid()
+            self._connection = None
+            db_path = get_data_path(None, 'cache_db')
+            if db_path is None:
+                return None
+
+            try:
+                self._connection = sqlite3.connect(db_path, timeout=60,
+                                                   check_same_thread=False)
+                with self._connection:
+                    self._connection.execute(
+                        'CREATE TABLE IF NOT EXISTS {} ('
+                        'bear TEXT NOT NULL, '
+                        'fingerprint BLOB NOT NULL, '
+                        'version TEXT NOT NULL, '
+                        'results BLOB NOT NULL, '
+                        'size INTEGER NOT NULL, '
+                        'last_used REAL NOT NULL, '
+                        'PRIMARY KEY (bear, fingerprint))'
+                        .format(self.TABLE))
+            except sqlite3.Error as exception:
+                logging.warning('Unable to open the cache database: {}. '
+                                'Continuing without caching the results of '
+                                'the core.'.format(exception))
+                self._connection = None
+
+        return self._connection
+
+    @staticmethod
+    def _get_bear_key(bear_type):
+        return bear_type.__module__ + '.' + bear_type.__qualname__
+
+    def _get_version(self, bear_type):
+        """
+        :return: A hash of the version of coala and the source files of the
+                 bear type.
+        """
+        if bear_type not in self._versions:
+            self._versions[bear_type] = get_source_hash(bear_type)
+        return self._versions[bear_type]
+
+    def flush_cache(self):
+        """
+        Deletes all stored results.
+        """
+        with self._lock:
+            self._new_entries.clear()
+            self._used_entries.clear()
+            connection = self._get_connection()
+            if connection is not None:
+                try:
+                    with connection:
+                        connection.execute('DELETE FROM ' + self.TABLE)
+                    logging.debug('The task result cache was successfully '
+                                  'flushed.')
+                except sqlite3.Error as exception:
+                    logging.warning('Unable to flush the task result cache: '
+                                    '{}'.format(exception))
+
+    def __contains__(self, bear_type):
+        # There is a cache-table for every bear type.
+        return True
+
+    def __getitem__(self, bear_type):
+        return _BearResultTable(self, bear_type)
+
+    def get(self, bear_type, fingerprint, fallback=None):
+        """
+        Returns the cached results of a task.
+
+        :param bear_type:   The type of the bear the task belongs to.
+        :param fingerprint: The fingerprint of the task.
+        :param fallback:    The value to return if nothing is cached.
+        :return:            The results of the task.
+        """
+        key = self._get_bear_key(bear_type), fingerprint
+        with self._lock:
+            version = self._get_version(bear_type)
+            if key in self._new_entries:
+                blob = self._new_entries[key][1]
+            else:
+                blob = None
+                connection = self._get_connection()
+                if connection is not None:
+                    try:
+                        row = connection.execute(
+                            'SELECT results FROM {} WHERE bear = ? AND '
+                            'fingerprint = ? AND version = ?'
+                            .format(self.TABLE),
+                            key + (version,)).fetchone()
+                    except sqlite3.Error as exception:
+                        logging.warning('Unable to read from the cache '
+                                        'database: {}'.format(exception))
+                        row = None
+                    blob = None if row is None else row[0]
+
+            if blob is not None:
+                try:
+                    results = pickle.loads(blob)
+                except (pickle.UnpicklingError, EOFError, AttributeError,
+                        ImportError, ValueError):
+                    results = None
+                if results is not None:
+                    self.hits += 1
+                    self._used_entries[key] = time.time()
+                    return results
+
+            self.misses += 1
+            return fallback
+
+    def set(self, bear_type, fingerprint, results):
+        """
+        Stores the results of a task, to be written with ``write``.
+
+        :param bear_type:   The type of the bear the task belongs to.
+        :param fingerprint: The fingerprint of the task.
+        :param results:     The results of the task.
+        """
+        try:
+            blob = pickle.dumps(results, protocol=4)
+        except (pickle.PicklingError, AttributeError, TypeError) as exception:
+            logging.debug('Failed to cache the results of {}: {}'
+                          .format(bear_type.name, exception))
+            return
+
+        key = self._get_bear_key(bear_type), fingerprint
+        with self._lock:
+            # The bear type is needed to write the entry with its version.
+            self._get_version(bear_type)
+            self._new_entries[key] = bear_type, blob
+            self._used_entries.pop(key, None)
+
+    def write(self):
+        """
+        Writes the stored results and removes the outdated and least
+        recently used ones.
+        """
+        with self._lock:
+            new_entries, self._new_entries = self._new_entries, {}
+            used_entries, self._used_entries = self._used_entries, {}
+            logging.debug('The task result cache had {} hits and {} misses.'
+                          .format(self.hits, self.misses))
+
+            connection = self._get_connection()
+            if connection is None:
+                return
+
+            now = time.time()
+            try:
+                with connection:
+                    connection.executemany(
+                        'INSERT OR REPLACE INTO {} VALUES (?, ?, ?, ?, ?, ?)'
+                        .format(self.TABLE),
+                        (key + (self._get_version(bear_type),
+                                blob, len(blob), now)
+                         for key, (bear_type, blob) in new_entries.items()))
+                    connection.executemany(
+                        'UPDATE {} SET last_used = ? WHERE bear = ? AND '
+                        'fingerprint = ?'.format(self.TABLE),
+                        ((last_used,) + key
+                         for key, last_used in used_entries.items()))
+                    connection.executemany(
+                        'DELETE FROM {} WHERE bear = ? AND version != ?'
+                        .format(self.TABLE),
+                        ((self._get_bear_key(bear_type), version)
+                         for bear_type, version in self._versions.items()))
+                    self._evict(connection)
+            except sqlite3.Error as exception:
+                logging.warning('Unable to write to the cache database: {}'
+                                .format(exception))
+
+    def _evict(self, connection):
+        size, = connection.execute(
+            'SELECT TOTAL(size) FROM ' + self.TABLE).fetchone()
+        if size <= self.max_size:
+            return
+
+        evicted = []
+        for rowid, entry_size in connection.execute(
+                'SELECT rowid, size FROM {} ORDER BY last_used'
+                .format(self.TABLE)):
+            if size <= self.max_size:
+                break
+            evicted.append((rowid,))
+            size -= entry_size
+        connection.executemany(
+            'DELETE FROM {} WHERE rowid = ?'.format(self.TABLE), evicted)
+        logging.debug('Removed {} results from the task result cache.'
+                      .format(len(evicted)))
+
 
 class FileDictFileCache(FileCache, FileDictGenerator):
     """
@@ -245,6 +1006,22 @@ class ProxyMapFileCache(FileCache, FileDictGenerator):
     >>> file_dict = proxycache.get_file_dict([file.name])
     >>> file_dict[file.name]
     ('coala',)
+
+    A file also counts as changed if its proxy was updated since the cache
+    was last written:
+
+    >>> proxycache.track_files({file.name})
+    >>> proxycache.write()
+    >>> proxycache.get_uncached_files({file.name})
+    set()
+    >>> proxy.replace('coala-update', 1)
+    True
+    >>> proxycache.get_uncached_files({file.name}) == {file.name}
+    True
+
+    Unlike other file caches, it can be used for several runs, e.g. by a
+    process that keeps the proxy map: the time of the next run starts when
+    the cache gets written.
     """
 
     def __init__(self, *args, **kargs):
@@ -253,6 +1030,8 @@ class ProxyMapFileCache(FileCache, FileDictGenerator):
         """
         super().__init__(*args, **kargs)
         self.__proxymap = None
+        # The versions of the proxies when the cache was last written.
+        self.__versions = {}
 
     @enforce_signature
     def set_proxymap(self, fileproxy_map: FileProxyMap):
@@ -266,6 +1045,44 @@ class ProxyMapFileCache(FileCache, FileDictGenerator):
         """
         self.__proxymap = fileproxy_map
 
+    def __check_proxymap(self):
+        if self.__proxymap is None:
+            raise ValueError('set_proxymap() should be called to set proxymap'
+                             'of ProxyMapFileCache instance')
+
+    def get_uncached_files(self, files):
+        """
+        Returns the set of files that are not in the cache yet, have been
+        untracked or whose proxies were updated since the cache was written.
+
+        :param files: The list of collected files.
+        :return:      A set of files that are uncached.
+        """
+        self.__check_proxymap()
+
+        uncached_files = set(super().get_uncached_files(files))
+        for file in files:
+            proxy = self.__proxymap.get(file)
+            if (proxy is not None and
+                    proxy.version != self.__versions.get(proxy.filename, -1)):
+                uncached_files.add(file)
+        return uncached_files
+
+    def write(self):
+        """
+        Updates the cache like ``FileCache.write()`` and starts the next run.
+        """
+        self.__check_proxymap()
+
+        super().write()
+        self.__versions = {proxy.filename: proxy.version
+                           for proxy in self.__proxymap}
+
+        self.to_untrack = set()
+        self.fingerprints = {}
+        self.current_time = int(time.time())
+        self.current_time_ns = int(time.time() * 10**9)
+
     def get_file_dict(self, filename_list, allow_raw_files=False):
         """
         Builds a file dictionary from filename to lines of the file
@@ -277,9 +1094,7 @@ class ProxyMapFileCache(FileCache, FileDictGenerator):
         :return:                Reads the content of each file into dictionary
                                 with filenames as keys.
         """
-        if self.__proxymap is None:
-            raise ValueError('set_proxymap() should be called to set proxymap'
-                             'of ProxyMapFileCache instance')
+        self.__check_proxymap()
 
         file_dict = {}
         for filename in filename_list:
@@ -1,7 +1,9 @@
+from contextlib import closing, contextmanager
 import hashlib
 import logging
 import os
 import pickle
+import sqlite3
 
 import appdirs
 
@@ -122,6 +124,196 @@ def pickle_dump(log_printer, identifier, data):
     return True
 
 
+@contextmanager
+def cache_db_connection(log_printer):
+    """
+    Opens a connection to the cache database in the user's data directory.
+
+    The database is a sqlite database, which takes care of locking: any
+    number of coala processes may read from it while another one writes
+    to it. All entries are stored in one table and grouped by namespaces.
+
+    :param log_printer: A LogPrinter object to use for logging.
+    :return:            A context manager yielding the ``sqlite3.Connection``
+                        or ``None`` if the database is not accessible.
+    """
+    db_path = get_data_path(None, 'cache_db')
+    if db_path is None:
+        yield None
+        return
+
+    try:
+        connection = sqlite3.connect(db_path, timeout=60)
+    except sqlite3.Error as exception:
+        logging.warning("Unable to open the cache database '{}': {}. "
+                        'Continuing without caching.'
+                        .format(db_path, exception))
+        yield None
+        return
+
+    with closing(connection):
+        try:
+            connection.execute('CREATE TABLE IF NOT EXISTS cache ('
+                               'namespace TEXT NOT NULL, '
+                               'key TEXT NOT NULL, '
+                               'value BLOB, '
+                               'PRIMARY KEY (namespace, key))')
+            yield connection
+        except sqlite3.DatabaseError as exception:
+            # Any other error (e.g. a lock timeout) is left to the caller.
+            if not isinstance(exception, sqlite3.OperationalError):
+                logging.warning('The cache database is corrupted and will '
+                                'be removed.')
+                connection.close()
+                os.remove(db_path)
+            raise
+
+
+def _dump_value(value):
+    return None if value is None else pickle.dumps(value)
+
+
+def _load_value(blob):
+    return None if blob is None else pickle.loads(blob)
+
+
+def db_load(log_printer, namespace, fallback=None):
+    """
+    Load all entries stored in the ``namespace`` of the cache database.
+
+    Example usage:
+
+    >>> db_update(None, 'test_load', {'answer': 42, 'question': None})
+    True
+    >>> sorted(db_load(None, 'test_load').items())
+    [('answer', 42), ('question', None)]
+    >>> db_load(None, 'nonexistent_namespace', fallback={})
+    {}
+
+    :param log_printer: A LogPrinter object to use for logging.
+    :param namespace:   The namespace of the entries.
+    :param fallback:    Return value to fallback to in case the namespace
+                        has no entries or the database is not accessible.
+    :return:            A dict with all entries of the namespace.
+    """
+    try:
+        with cache_db_connection(None) as connection:
+            if connection is None:
+                return fallback
+            rows = connection.execute(
+                'SELECT key, value FROM cache WHERE namespace = ?',
+                (namespace,)).fetchall()
+            return ({key: _load_value(value) for key, value in rows}
+                    if rows else fallback)
+    except (sqlite3.Error, pickle.UnpicklingError, EOFError) as exception:
+        logging.warning('Unable to read from the cache database: {}'
+                        .format(exception))
+        return fallback
+
+
+def db_get(log_printer, namespace, key, fallback=None):
+    """
+    Load a single entry from the cache database.
+
+    >>> db_update(None, 'test_namespace', {'answer': 42})
+    True
+    >>> db_get(None, 'test_namespace', 'answer')
+    42
+    >>> db_get(None, 'test_namespace', 'nonexistent_key', fallback=1)
+    1
+
+    :param log_printer: A LogPrinter object to use for logging.
+    :param namespace:   The namespace of the entry.
+    :param key:         The key of the entry.
+    :param fallback:    Return value to fallback to in case the entry
+                        doesn't exist.
+    :return:            The value of the entry.
+    """
+    try:
+        with cache_db_connection(None) as connection:
+            if connection is None:
+                return fallback
+            row = connection.execute(
+                'SELECT value FROM cache WHERE namespace = ? AND key = ?',
+                (namespace, key)).fetchone()
+            return fallback if row is None else _load_value(row[0])
+    except (sqlite3.Error, pickle.UnpicklingError, EOFError) as exception:
+        logging.warning('Unable to read from the cache database: {}'
+                        .format(exception))
+        return fallback
+
+
+def db_update(log_printer, namespace, data, deleted_keys=()):
+    """
+    Insert or replace the given entries in the ``namespace`` of the cache
+    database and delete the entries with the given keys. Only those entries
+    are written, all other entries of the namespace are left untouched.
+    All changes are applied in a single transaction.
+
+    >>> db_delete(None, 'test_update')
+    True
+    >>> db_update(None, 'test_update', {'a': 1, 'b': 2})
+    True
+    >>> db_update(None, 'test_update', {'c': 3}, deleted_keys=['a'])
+    True
+    >>> sorted(db_load(None, 'test_update'))
+    ['b', 'c']
+
+    :param log_printer:  A LogPrinter object to use for logging.
+    :param namespace:    The namespace of the entries.
+    :param data:         A dict of the entries to insert or replace. The
+                         values are serialized with pickle.
+    :param deleted_keys: An iterable of keys to delete.
+    :return:             True if the write was successful, False otherwise.
+    """
+    try:
+        with cache_db_connection(None) as connection:
+            if connection is None:
+                return False
+            with connection:
+                connection.executemany(
+                    'INSERT OR REPLACE INTO cache VALUES (?, ?, ?)',
+                    ((namespace, key, _dump_value(value))
+                     for key, value in data.items()))
+                connection.executemany(
+                    'DELETE FROM cache WHERE namespace = ? AND key = ?',
+                    ((namespace, key) for key in deleted_keys))
+            return True
+    except (sqlite3.Error, pickle.PicklingError, AttributeError,
+            TypeError) as exception:
+        logging.warning('Unable to write to the cache database: {}'
+                        .format(exception))
+        return False
+
+
+def db_delete(log_printer, namespace):
+    """
+    Delete all entries in the ``namespace`` of the cache database.
+
+    >>> db_update(None, 'test_namespace', {'answer': 42})
+    True
+    >>> db_delete(None, 'test_namespace')
+    True
+    >>> db_load(None, 'test_namespace')
+
+    :param log_printer: A LogPrinter object to use for logging.
+    :param namespace:   The namespace to delete.
+    :return:            True if the deletion was successful, False otherwise.
+    """
+    try:
+        with cache_db_connection(None) as connection:
+            if connection is None:
+                return False
+            with connection:
+                connection.execute('DELETE FROM cache WHERE namespace = ?',
+                                   (namespace,))
+            return True
+    except sqlite3.Error as exception:
+        logging.warning('Unable to write to the cache database: {}'
+                        .format(exception))
+        return False
+
+
 def hash_id(text):
     """
     Hashes the given text.
@@ -132,6 +324,24 @@ def hash_id(text):
     return hashlib.md5(text.encode('utf-8')).hexdigest()
 
 
+def hash_file(file_path, chunk_size=1 << 16):
+    """
+    Hashes the contents of the given file.
+
+    The file is read in chunks, so even huge files are never loaded into
+    memory completely.
+
+    :param file_path:  The path of the file to be hashed.
+    :param chunk_size: The number of bytes to read at once.
+    :return:           A SHA1 hash of the contents of the file.
+    """
+    file_hash = hashlib.sha1()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            file_hash.update(chunk)
+    return file_hash.hexdigest()
+
+
 def get_settings_hash(sections,
                       targets=[],
                       ignore_settings: list = ['disable_caching']):
@@ -170,15 +380,14 @@ def settings_changed(log_printer, settings_hash):
     """
     project_hash = hash_id(os.getcwd())
 
-    settings_hash_db = pickle_load(None, 'settings_hash_db', {})
-    if project_hash not in settings_hash_db:
+    last_settings_hash = db_get(None, 'settings_hash_db', project_hash)
+    if last_settings_hash is None:
         # This is the first time coala is run on this project, so the cache
         # will be flushed automatically.
         return False
 
-    result = settings_hash_db[project_hash] != settings_hash
+    result = last_settings_hash != settings_hash
     if result:
-        del settings_hash_db[project_hash]
         logging.debug('Since the configuration settings have changed since '
                       'the last run, the cache will be flushed and rebuilt.')
 
@@ -194,6 +403,4 @@ def update_settings_db(log_printer, settings_hash):
     """
     project_hash = hash_id(os.getcwd())
 
-    settings_hash_db = pickle_load(None, 'settings_hash_db', {})
-    settings_hash_db[project_hash] = settings_hash
-    pickle_dump(None, 'settings_hash_db', settings_hash_db)
+    db_update(None, 'settings_hash_db', {project_hash: settings_hash})
@@ -1,10 +1,17 @@
 import logging
+import sys
 import traceback
 
 from coalib.misc import Constants
 from coalib.output.printers.LOG_LEVEL import LOG_LEVEL
 
-from pkg_resources import VersionConflict
+
+def _is_version_conflict(exception):
+    # pkg_resources is slow to import. If it was not imported yet, nothing
+    # could have raised a VersionConflict.
+    pkg_resources = sys.modules.get('pkg_resources')
+    return (pkg_resources is not None and
+            isinstance(exception, pkg_resources.VersionConflict))
 
 
 def get_exitcode(exception, log_printer=None):
@@ -16,7 +23,7 @@ def get_exitcode(exception, log_printer=None):
         exitcode = 0
     elif isinstance(exception, SystemExit):
         exitcode = exception.code
-    elif isinstance(exception, VersionConflict):
+    elif _is_version_conflict(exception):
         log_message = Constants.VERSION_CONFLICT_MESSAGE % str(exception.req)
         log_exception(log_message, exception)
         exitcode = 13
@@ -1,4 +1,7 @@
+import asyncio
 from contextlib import contextmanager
+from functools import partial
+import locale
 import platform
 import shlex
 from subprocess import PIPE, Popen
@@ -47,6 +50,28 @@ class ShellCommandResult(tuple):
         self.code = code
 
 
+def _split_command(command, shell=False):
+    """
+    Splits a command given as string into its arguments, unless it is run by
+    the shell.
+
+    :param command: The command as string or sequence of arguments.
+    :param shell:   Whether the command is run by the shell.
+    :return:        The command as list of arguments.
+    """
+    if not shell and isinstance(command, str):
+        command = shlex.split(command)
+    else:
+        command = list(command)
+
+    if platform.system() == 'Windows':  # pragma: no cover
+        # subprocess doesn't implicitly look for .bat and .cmd scripts when
+        # running commands under Windows
+        command[0] = which(command[0])
+
+    return command
+
+
 @contextmanager
 def run_interactive_shell_command(command, **kwargs):
     """
@@ -94,15 +119,7 @@ def run_interactive_shell_command(command, **kwargs):
     :return:        A context manager yielding the process started from the
                     command.
     """
-    if not kwargs.get('shell', False) and isinstance(command, str):
-        command = shlex.split(command)
-    else:
-        command = list(command)
-
-    if platform.system() == 'Windows':  # pragma: no cover
-        # subprocess doesn't implicitly look for .bat and .cmd scripts when
-        # running commands under Windows
-        command[0] = which(command[0])
+    command = _split_command(command, kwargs.get('shell', False))
 
     args = {'stdout': PIPE,
             'stderr': PIPE,
@@ -146,3 +163,91 @@ def run_shell_command(command, stdin=None, **kwargs):
     with run_interactive_shell_command(command, **kwargs) as p:
         ret = p.communicate(stdin)
     return ShellCommandResult(p.returncode, *ret)
+
+
+def _decode_output(data):
+    """
+    Decodes the output of a process like ``subprocess.Popen`` does with
+    ``universal_newlines=True``.
+
+    >>> _decode_output(b'line\\r\\nother line\\r')
+    'line\\nother line\\n'
+    """
+    return (data.decode(locale.getpreferredencoding(False))
+            .replace('\r\n', '\n').replace('\r', '\n'))
+
+
+@asyncio.coroutine
+def run_shell_command_async(command, stdin=None, loop=None, **kwargs):
+    """
+    Runs a single command like ``run_shell_command()``, but as a coroutine
+    on an asyncio event loop. The loop can run other tasks while the process
+    runs, e.g. start other processes.
+
+    Not all event loops can run processes, e.g. only the
+    ``ProactorEventLoop`` on Windows. For other loops, ``run_shell_command()``
+    is run in the default executor of the loop instead.
+
+    On Unix, the child watcher needs to be attached to the loop (see
+    ``asyncio.get_child_watcher()``), which ``asyncio.set_event_loop()`` does
+    for the main thread:
+
+    >>> loop = asyncio.new_event_loop()
+    >>> asyncio.set_event_loop(loop)
+    >>> loop.run_until_complete(run_shell_command_async(['echo', 'TEXT']))
+    ('TEXT\\n', '')
+    >>> asyncio.set_event_loop(None)
+    >>> loop.close()
+
+    :param command: The command to run on shell. This parameter can either
+                    be a sequence of arguments that are directly passed to
+                    the process or a string. A string gets splitted beforehand
+                    using ``shlex.split()``.
+    :param stdin:   Initial input to send to the process.
+    :param loop:    The event loop to run the process on, the current one by
+                    default.
+    :param kwargs:  Additional keyword arguments to pass to
+                    ``asyncio.create_subprocess_exec()``, or to
+                    ``asyncio.create_subprocess_shell()`` if ``shell=True``
+                    is given.
+    :return:        A ``ShellCommandResult`` with the ``(stdoutstring,
+                    stderrstring)`` tuple.
+    """
+    loop = asyncio.get_event_loop() if loop is None else loop
+    shell = kwargs.pop('shell', False)
+    universal_newlines = kwargs.pop('universal_newlines', True)
+    if not shell:
+        command = _split_command(command)
+    elif not isinstance(command, str):
+        command = ' '.join(shlex.quote(arg) for arg in command)
+
+    args = {'stdout': PIPE,
+            'stderr': PIPE,
+            'stdin': PIPE,
+            'loop': loop}
+    args.update(kwargs)
+
+    try:
+        if shell:
+            process = yield from asyncio.create_subprocess_shell(command,
+                                                                 **args)
+        else:
+            process = yield from asyncio.create_subprocess_exec(*command,
+                                                                **args)
+    except NotImplementedError:  # pragma: no cover
+        del args['loop']
+        result = yield from loop.run_in_executor(None, partial(
+            run_shell_command, command, stdin,
+            shell=shell, universal_newlines=universal_newlines, **args))
+        return result
+
+    if universal_newlines and stdin is not None:
+        stdin = stdin.encode(locale.getpreferredencoding(False))
+
+    stdout, stderr = yield from process.communicate(stdin)
+
+    if universal_newlines:
+        stdout = None if stdout is None else _decode_output(stdout)
+        stderr = None if stderr is None else _decode_output(stderr)
+
+    return ShellCommandResult(process.returncode, stdout, stderr)
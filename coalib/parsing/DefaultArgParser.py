@@ -9,6 +9,13 @@ from coalib.parsing.filters import available_filters
 argcomplete = None
 
 
+def _argcomplete_bears_names(*args, **kwargs):
+    # Collecting bears is slow, so it is only imported when the names of the
+    # bears get completed.
+    from coalib.collecting.Collectors import get_all_bears_names
+    return get_all_bears_names()
+
+
 class CustomFormatter(argparse.RawDescriptionHelpFormatter):
     """
     A Custom Formatter that will keep the metavars in the usage but remove them
@@ -151,6 +158,14 @@ To run coala without user interaction, run the `coala --non-interactive`,
     config_group.add_argument(
         '--flush-cache', const=True, action='store_const',
         help='rebuild the file cache')
+    config_group.add_argument(
+        '--cache-by-content', const=True, action='store_const',
+        help='detect changed files by their content instead of their '
+             'modification time')
+    config_group.add_argument(
+        '--cache-results', const=True, action='store_const',
+        help='reuse results of local bears (of all bears with --core) for '
+             'unchanged files instead of skipping those files')
     config_group.add_argument(
         '--no-autoapply-warn', const=True, action='store_const',
         help='turn off warning about patches not being auto applicable')
@@ -278,6 +293,11 @@ To run coala without user interaction, run the `coala --non-interactive`,
         '-j', '--jobs', type=int,
         help='number of jobs to use in parallel')
 
+    misc_group.add_argument(
+        '--core', const=True, action='store_const',
+        help='run bears with the task scheduler of coalib.core instead of '
+             'bear processes')
+
     misc_group.add_argument(
         '-n', '--no-orig', const=True, action='store_const',
         help="don't create .orig backup files before patching")
@@ -299,17 +319,9 @@ To run coala without user interaction, run the `coala --non-interactive`,
             # Auto completion should be optional, because of somewhat
             # complicated setup.
             import argcomplete
+            bears.completer = _argcomplete_bears_names
             argcomplete.autocomplete(arg_parser)
         except ImportError:
             argcomplete = False
 
-        if argcomplete:
-            try:
-                from coalib.collecting.Collectors import (
-                    _argcomplete_bears_names)
-            except ImportError:
-                pass
-            else:
-                bears.completer = _argcomplete_bears_names
-
     return arg_parser
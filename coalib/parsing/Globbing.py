@@ -158,6 +158,10 @@ def translate(pattern):
     :param pattern: Glob pattern with wildcards
     :return:        Regular expression with the same meaning
     """
+    return '(?ms)' + _translate(pattern) + '\\Z'
+
+
+def _translate(pattern):
     index, length = 0, len(pattern)
     regex = ''
     while index < length:
@@ -191,7 +195,7 @@ def translate(pattern):
                 regex += '[' + sequence + ']'
         else:
             regex = regex + re.escape(char)
-    return '(?ms)' + regex + '\\Z'
+    return regex
 
 
 def fnmatch(name, globs):
@@ -223,18 +227,54 @@ def fnmatch(name, globs):
     if len(globs) == 0:
         return True
 
-    name = os.path.normcase(name)
-
-    return any(compiled_pattern.match(name)
-               for glob in globs
-               for compiled_pattern in _compile_pattern(glob))
+    return _compile_globs(globs).match(name)
 
 
 @lru_cache()
-def _compile_pattern(pattern):
-    return tuple(re.compile(translate(os.path.normcase(
-                     os.path.expanduser(pat))))
-                 for pat in _iter_alternatives(pattern))
+def _compile_globs(globs):
+    return GlobSet(globs)
+
+
+class GlobSet:
+    """
+    A list of globs compiled into a single regular expression, so that a
+    name is checked against all of them with one match.
+
+    >>> globs = GlobSet(['*.py', '(docs|tests)/**'])
+    >>> globs.match('setup.py')
+    True
+    >>> globs.match(os.path.join('docs', 'index.rst'))
+    True
+    >>> globs.match('README.rst')
+    False
+
+    The syntax of the globs is equal to that of ``fnmatch``, but unlike it,
+    an empty list of globs matches nothing:
+
+    >>> GlobSet([]).match('anything')
+    False
+    """
+
+    def __init__(self, globs):
+        """
+        :param globs: Glob string with wildcards or list of globs
+        """
+        self.globs = (globs,) if isinstance(globs, str) else tuple(globs)
+        regexes = [_translate(os.path.normcase(os.path.expanduser(pattern)))
+                   for glob in self.globs
+                   for pattern in _iter_alternatives(glob)]
+        self._match = re.compile(
+            '(?ms)(?:' + '|'.join(regexes) + ')\\Z').match if regexes else None
+
+    def match(self, name):
+        """
+        Tests whether name matches one of the globs.
+
+        :param name: File or directory name
+        :return:     Boolean: Whether or not name is matched by any glob
+        """
+        return (self._match is not None and
+                self._match(os.path.normcase(name)) is not None)
 
 
 def _absolute_flat_glob(pattern):
@@ -408,3 +448,199 @@ def glob(pattern):
     :return:        List of all file names that match pattern
     """
     return list(iglob(pattern))
+
+
+class _PathGlob:
+    """
+    A glob pattern without alternatives, matching paths like ``iglob`` finds
+    them: ``**`` as a whole path component matches any number of
+    directories, including none.
+    """
+
+    def __init__(self, pattern, glob):
+        """
+        :param pattern: The glob pattern without alternatives.
+        :param glob:    The glob the pattern was created from.
+        """
+        self.glob = glob
+        parts = os.path.normcase(os.path.expanduser(pattern)).split(os.sep)
+
+        # The root is the longest leading path without wildcards.
+        index = 0
+        while index < len(parts) and not has_wildcard(parts[index]):
+            index += 1
+        self.root = os.sep.join(parts[:index])
+        if parts[:index] == ['']:
+            self.root = os.sep
+        self.prefix = (self.root
+                       if self.root in ('', os.sep) else
+                       self.root + os.sep)
+
+        self.parts = parts[index:]
+        self.part_patterns = [re.compile('(?ms)' + _translate(part) + '\\Z')
+                              for part in self.parts]
+        separator = re.escape(os.sep)
+        regex = ''
+        for index, part in enumerate(self.parts, 1):
+            last = index == len(self.parts)
+            if part == '**':
+                regex += '.*' if last else '(?:.*' + separator + ')?'
+            else:
+                regex += _translate(part) + ('' if last else separator)
+        self.match_relative = re.compile('(?ms)' + regex + '\\Z').match
+
+    def match(self, path):
+        """
+        :param path: A normalized path.
+        :return:     Whether the pattern matches the path.
+        """
+        if not self.parts:
+            return path == self.root or path + os.sep == self.root
+
+        return (path.startswith(self.prefix) and
+                self.match_relative(path[len(self.prefix):]) is not None)
+
+    def may_match_below(self, directory):
+        """
+        :param directory: A normalized path of a directory.
+        :return:          Whether the pattern may match paths inside the
+                          directory.
+        """
+        directory += os.sep
+        if self.prefix.startswith(directory):
+            # The directory contains the root.
+            return True
+        if not directory.startswith(self.prefix):
+            return False
+
+        names = directory[len(self.prefix):].split(os.sep)[:-1]
+        for index, name in enumerate(names):
+            part = self.parts[index]
+            if '**' in part:
+                # Matches through directories.
+                return True
+            if (index == len(self.parts) - 1 or
+                    not self.part_patterns[index].match(name)):
+                # The last part can only match the files in the directory
+                # above.
+                return False
+
+        return True
+
+
+def _is_inside(path, directory):
+    """
+    :param path:      A normalized path.
+    :param directory: A normalized path of a directory, the empty string
+                      for the current directory.
+    :return:          Whether the path is inside of the directory.
+    """
+    if not directory:
+        return not os.path.isabs(path)
+    return path.startswith(directory.rstrip(os.sep) + os.sep)
+
+
+def _iter_entries(directory):
+    """
+    Lists a directory.
+
+    :param directory: Directory name
+    :return:          Iterator that yields tuples of the name of each entry
+                      and whether it is a directory and a file. Symbolic links
+                      are followed.
+    """
+    try:
+        scandir = os.scandir
+    except AttributeError:  # pragma: no cover
+        # Python 3.4
+        try:
+            names = os.listdir(directory)
+        except OSError:
+            return
+        for name in names:
+            path = os.path.join(directory, name)
+            yield name, os.path.isdir(path), os.path.isfile(path)
+        return
+
+    try:
+        entries = list(scandir(directory))
+    except OSError:
+        return
+    for entry in entries:
+        # Uses the file types read with the directory, if the system
+        # provides them, instead of calling stat for each entry.
+        try:
+            is_dir = entry.is_dir()
+            yield entry.name, is_dir, not is_dir and entry.is_file()
+        except OSError:
+            continue
+
+
+def iglob_files(globs, ignored_globs=None):
+    """
+    Iterates all files that get matched by any of the glob patterns. Each
+    directory is listed at most once for all of the globs, and directories
+    that get matched by an ignored glob or where no glob could match
+    anything are not entered at all.
+
+    Syntax is equal to that of fnmatch. A directory being ignored also
+    ignores everything in it.
+
+    :param globs:         Glob pattern with wildcards or list of such
+    :param ignored_globs: List of glob patterns matching files and
+                          directories to leave out
+    :return:              Iterator that yields tuples of the name of a matching
+                          file and the glob of ``globs`` that matches it
+    """
+    globs = (globs,) if isinstance(globs, str) else globs
+    matchers = [_PathGlob(pattern, glob)
+                for glob in globs
+                for pattern in _iter_alternatives(glob)]
+    ignores = [_PathGlob(pattern, glob)
+               for glob in (ignored_globs or ())
+               for pattern in _iter_alternatives(glob)]
+
+    def is_ignored(path, is_dir):
+        return any(ignore.match(path) or
+                   is_dir and ignore.match(path + os.sep)
+                   for ignore in ignores)
+
+    def is_in_ignored_dir(path):
+        parent = os.path.dirname(path)
+        while parent and parent != path:
+            if is_ignored(parent, True):
+                return True
+            path, parent = parent, os.path.dirname(parent)
+        return False
+
+    def walk(directory):
+        for name, is_dir, is_file in _iter_entries(directory or os.curdir):
+            path = os.path.join(directory, name)
+            if is_dir:
+                if (not is_ignored(path, True) and
+                        any(matcher.may_match_below(path)
+                            for matcher in wildcard_matchers)):
+                    yield from walk(path)
+            elif is_file and not is_ignored(path, False):
+                for matcher in wildcard_matchers:
+                    if matcher.match(path):
+                        yield path, matcher.glob
+
+    for matcher in matchers:
+        if not matcher.parts and os.path.isfile(matcher.root):
+            if not (is_ignored(matcher.root, False) or
+                    is_in_ignored_dir(matcher.root)):
+                yield matcher.root, matcher.glob
+
+    wildcard_matchers = [matcher for matcher in matchers if matcher.parts]
+    roots = sorted(set(matcher.root for matcher in wildcard_matchers))
+    walked_roots = []
+    for root in roots:
+        # Roots inside of other roots are walked with them.
+        if any(_is_inside(root, walked_root) for walked_root in walked_roots):
+            continue
+        walked_roots.append(root)
+
+        if not root or not (is_ignored(root, True) or
+                            is_in_ignored_dir(root)):
+            yield from walk(root)
@@ -1,4 +1,7 @@
+from collections import OrderedDict
+import os
 import queue
+import time
 import traceback
 
 from coalib.bears.BEAR_KIND import BEAR_KIND
@@ -167,11 +170,16 @@ def run_local_bear(message_queue,
                    file_dict,
                    bear_instance,
                    filename,
-                   debug=False):
+                   debug=False,
+                   result_cache=None,
+                   timings=None):
     """
     Runs an instance of a local bear. Checks if bear_instance is of type
     LocalBear and then passes it to the run_bear to execute.
 
+    If a result cache is given and it holds results of the bear for the
+    current content of the file, those are returned without running the bear.
+
     :param message_queue:     A queue that contains messages of type
                               errors/warnings/debug statements to be printed in
                               the Log.
@@ -183,6 +191,11 @@ def run_local_bear(message_queue,
     :param file_dict:         Dictionary containing contents of file.
     :param bear_instance:     Instance of LocalBear the run.
     :param filename:          Name of the file to run it on.
+    :param result_cache:      An instance of ``misc.Caching.ResultCache`` to
+                              replay and store results from, or ``None``.
+    :param timings:           A dict to add the time the bear took and the
+                              size of the file to, as a list of seconds and
+                              bytes with the bear name as key, or ``None``.
     :return:                  Returns a list of results generated by the passed
                               bear_instance.
     """
@@ -197,16 +210,38 @@ def run_local_bear(message_queue,
 
         return None
 
+    if result_cache is not None:
+        results = result_cache.get(bear_instance,
+                                   filename,
+                                   file_dict[filename])
+        if results is not None:
+            return results
+
     kwargs = {'dependency_results':
               get_local_dependency_results(local_result_list,
                                            bear_instance),
               'debug': debug}
-    return run_bear(message_queue,
-                    timeout,
-                    bear_instance,
-                    filename,
-                    file_dict[filename],
-                    **kwargs)
+    start_time = time.perf_counter()
+    results = run_bear(message_queue,
+                       timeout,
+                       bear_instance,
+                       filename,
+                       file_dict[filename],
+                       **kwargs)
+
+    if timings is not None:
+        try:
+            size = os.path.getsize(filename)
+        except OSError:
+            size = 0
+        timing = timings.setdefault(bear_instance.name, [0, 0])
+        timing[0] += time.perf_counter() - start_time
+        timing[1] += size
+
+    if result_cache is not None and results is not None:
+        result_cache.set(bear_instance, filename, file_dict[filename], results)
+
+    return results
 
 
 def run_global_bear(message_queue,
@@ -257,9 +292,10 @@ def run_local_bears_on_file(message_queue,
                             file_dict,
                             local_bear_list,
                             local_result_dict,
-                            control_queue,
                             filename,
-                            debug=False):
+                            debug=False,
+                            result_cache=None,
+                            timings=None):
     """
     This method runs a list of local bears on one file.
 
@@ -271,15 +307,15 @@ def run_local_bears_on_file(message_queue,
                               the timeout it returns queue Full exception.
     :param file_dict:         Dictionary that contains contents of files.
     :param local_bear_list:   List of local bears to run on file.
-    :param local_result_dict: A Manager.dict that will be used to store local
-                              bear results. A list of all local bear results
-                              will be stored with the filename as key.
-    :param control_queue:     If any result gets written to the result_dict a
-                              tuple containing a CONTROL_ELEMENT (to indicate
-                              what kind of event happened) and either a bear
-                              name(for global results) or a file name to
-                              indicate the result will be put to the queue.
+    :param local_result_dict: A ``ResultBatcher`` that will be used to send
+                              local bear results. A list of all local bear
+                              results will be stored with the filename as
+                              key.
     :param filename:          The name of file on which to run the bears.
+    :param result_cache:      An instance of ``misc.Caching.ResultCache`` to
+                              replay and store results from, or ``None``.
+    :param timings:           A dict to add the time the bears took to, see
+                              ``run_local_bear``.
     """
     if filename not in file_dict:
         send_msg(message_queue,
@@ -303,12 +339,13 @@ def run_local_bears_on_file(message_queue,
                                 file_dict,
                                 bear_instance,
                                 filename,
-                                debug=debug)
+                                debug=debug,
+                                result_cache=result_cache,
+                                timings=timings)
         if result is not None:
             local_result_list.extend(result)
 
     local_result_dict[filename] = local_result_list
-    control_queue.put((CONTROL_ELEMENT.LOCAL, filename))
 
 
 def get_global_dependency_results(global_result_dict, bear_instance):
@@ -342,39 +379,6 @@ def get_global_dependency_results(global_result_dict, bear_instance):
     return dependency_results
 
 
-def get_next_global_bear(timeout,
-                         global_bear_queue,
-                         global_bear_list,
-                         global_result_dict):
-    """
-    Retrieves the next global bear.
-
-    :param timeout:            The queue blocks at most timeout seconds for a
-                               free slot to execute the put operation on. After
-                               the timeout it returns queue Full exception.
-    :param global_bear_queue:  queue (read, write) of indexes of global bear
-                               instances in the global_bear_list.
-    :param global_bear_list:   A list containing all global bears to be
-                               executed.
-    :param global_result_dict: A Manager.dict that will be used to store global
-                               results. The list of results of one global bear
-                               will be stored with the bear name as key.
-    :return:                   (bear, bearname, dependency_results)
-    """
-    dependency_results = False
-
-    while dependency_results is False:
-        bear_id = global_bear_queue.get(timeout=timeout)
-        bear = global_bear_list[bear_id]
-
-        dependency_results = (
-            get_global_dependency_results(global_result_dict, bear))
-        if dependency_results is False:
-            global_bear_queue.put(bear_id)
-
-    return bear, dependency_results
-
-
 def task_done(obj):
     """
     Invokes task_done if the given queue provides this operation. Otherwise
@@ -386,19 +390,51 @@ def task_done(obj):
         obj.task_done()
 
 
+def prepare_batch(local_bear_list, filenames, file_dict, result_cache=None):
+    """
+    Tells the local bears with a ``BATCH_SIZE`` greater than 1 which of the
+    given files they are going to be run on.
+
+    :param local_bear_list: The local bear instances.
+    :param filenames:       The names of the files of the batch.
+    :param file_dict:       Dictionary that contains contents of files.
+    :param result_cache:    An instance of ``misc.Caching.ResultCache``. Files
+                            the cached results of a bear are replayed for
+                            are left out of its batch.
+    """
+    filenames = [filename for filename in filenames if filename in file_dict]
+    for bear_instance in local_bear_list:
+        if getattr(bear_instance, 'BATCH_SIZE', 1) == 1:
+            continue
+
+        bear_instance.prepare_batch(OrderedDict(
+            (filename, file_dict[filename])
+            for filename in filenames
+            if result_cache is None or
+            result_cache.get(bear_instance,
+                             filename,
+                             file_dict[filename]) is None))
+
+
 def run_local_bears(filename_queue,
                     message_queue,
                     timeout,
                     file_dict,
                     local_bear_list,
                     local_result_dict,
-                    control_queue,
-                    debug=False):
+                    debug=False,
+                    result_cache=None,
+                    timings=None):
     """
     Run local bears on all the files given.
 
     :param filename_queue:    queue (read) of file names to check with
-                              local bears.
+                              all local bears, or of tuples of a file name
+                              and a list of indexes of the local bears in the
+                              local_bear_list to check it with. Instead of a
+                              file name, a tuple of file names can be given to
+                              check a batch of files, see ``prepare_batch``.
+                              ``None`` marks its end.
     :param message_queue:     A queue that contains messages of type
                               errors/warnings/debug statements to be printed
                               in the Log.
@@ -407,26 +443,43 @@ def run_local_bears(filename_queue,
                               the timeout it returns queue Full exception.
     :param file_dict:         Dictionary that contains contents of files.
     :param local_bear_list:   List of local bears to run.
-    :param local_result_dict: A Manager.dict that will be used to store local
-                              bear results. A list of all local bear results
-                              will be stored with the filename as key.
-    :param control_queue:     If any result gets written to the result_dict a
-                              tuple containing a CONTROL_ELEMENT (to indicate
-                              what kind of event happened) and either a bear
-                              name(for global results) or a file name to
-                              indicate the result will be put to the queue.
+    :param local_result_dict: A ``ResultBatcher`` that will be used to send
+                              local bear results. A list of all local bear
+                              results will be stored with the filename as
+                              key.
+    :param result_cache:      An instance of ``misc.Caching.ResultCache`` to
+                              replay and store results from, or ``None``.
+    :param timings:           A dict to add the time the bears took to, see
+                              ``run_local_bear``.
     """
     try:
         while True:
-            filename = filename_queue.get(timeout=timeout)
-            run_local_bears_on_file(message_queue,
-                                    timeout,
-                                    file_dict,
-                                    local_bear_list,
-                                    local_result_dict,
-                                    control_queue,
-                                    filename,
-                                    debug=debug)
+            task = filename_queue.get(timeout=timeout)
+            if task is None:
+                task_done(filename_queue)
+                return
+
+            if isinstance(task, str):
+                filenames, bears = task, local_bear_list
+            else:
+                filenames, bear_ids = task
+                bears = [local_bear_list[bear_id] for bear_id in bear_ids]
+
+            if isinstance(filenames, str):
+                filenames = (filenames,)
+            else:
+                prepare_batch(bears, filenames, file_dict, result_cache)
+
+            for filename in filenames:
+                run_local_bears_on_file(message_queue,
+                                        timeout,
+                                        file_dict,
+                                        bears,
+                                        local_result_dict,
+                                        filename,
+                                        debug=debug,
+                                        result_cache=result_cache,
+                                        timings=timings)
             task_done(filename_queue)
     except queue.Empty:
         return
@@ -448,33 +501,50 @@ def run_global_bears(message_queue,
     :param timeout:            The queue blocks at most timeout seconds for a
                                free slot to execute the put operation on. After
                                the timeout it returns queue Full exception.
-    :param global_bear_queue:  queue (read, write) of indexes of global bear
-                               instances in the global_bear_list.
+    :param global_bear_queue:  queue (read) of lists of indexes of global
+                               bear instances in the global_bear_list. The
+                               bears of one list are run one after another and
+                               come after the bears they depend on. ``None``
+                               marks the end of the queue.
     :param global_bear_list:   list of global bear instances
-    :param global_result_dict: A Manager.dict that will be used to store global
-                               results. The list of results of one global bear
+    :param global_result_dict: A dict that will be used to store global
+                               results for the dependency resolution of global
+                               bears. The list of results of one global bear
                                will be stored with the bear name as key.
-    :param control_queue:      If any result gets written to the result_dict a
-                               tuple containing a CONTROL_ELEMENT (to indicate
-                               what kind of event happened) and either a bear
-                               name(for global results) or a file name to
-                               indicate the result will be put to the queue.
+    :param control_queue:      If a global bear yields results, a tuple
+                               containing ``CONTROL_ELEMENT.GLOBAL`` and a
+                               tuple of the bear name and the results will be
+                               put to the queue.
     """
     try:
         while True:
-            bear, dep_results = (
-                get_next_global_bear(timeout,
-                                     global_bear_queue,
-                                     global_bear_list,
-                                     global_result_dict))
-            bearname = bear.__class__.__name__
-            result = run_global_bear(message_queue, timeout, bear, dep_results,
-                                     debug=debug)
-            if result:
-                global_result_dict[bearname] = result
-                control_queue.put((CONTROL_ELEMENT.GLOBAL, bearname))
-            else:
-                global_result_dict[bearname] = None
+            bear_ids = global_bear_queue.get(timeout=timeout)
+            if bear_ids is None:
+                task_done(global_bear_queue)
+                return
+
+            for bear_id in bear_ids:
+                bear = global_bear_list[bear_id]
+                bearname = bear.__class__.__name__
+                dep_results = get_global_dependency_results(
+                    global_result_dict, bear)
+                if dep_results is False:
+                    send_msg(message_queue,
+                             timeout,
+                             LOG_LEVEL.WARNING,
+                             'The dependencies of the global bear {} are '
+                             'not met. Leaving it out...'.format(bearname))
+                    result = None
+                else:
+                    result = run_global_bear(message_queue, timeout, bear,
+                                             dep_results, debug=debug)
+
+                if result:
+                    global_result_dict[bearname] = result
+                    control_queue.put((CONTROL_ELEMENT.GLOBAL,
+                                       (bearname, result)))
+                else:
+                    global_result_dict[bearname] = None
             task_done(global_bear_queue)
     except queue.Empty:
         return
@@ -490,7 +560,8 @@ def run(file_name_queue,
         message_queue,
         control_queue,
         timeout=0,
-        debug=False):
+        debug=False,
+        result_cache=None):
     """
     This is the method that is actually runs by processes.
 
@@ -510,46 +581,59 @@ def run(file_name_queue,
                                bears. Each invocation of the run method needs
                                one such queue which it checks with all the
                                local bears. The queue could be empty.
-                               (Repeat until queue empty.)
+                               (Repeat until queue empty or ``None`` is
+                               read.) See ``run_local_bears`` for checking
+                               files with only some of the bears.
     :param local_bear_list:    List of local bear instances.
     :param global_bear_list:   List of global bear instances.
-    :param global_bear_queue:  queue (read, write) of indexes of global bear
-                               instances in the global_bear_list.
+    :param global_bear_queue:  queue (read) of lists of indexes of global bear
+                               instances in the global_bear_list, ending with
+                               ``None``. See ``run_global_bears``.
     :param file_dict:          dict of all files as {filename:file}, file as in
                                file.readlines().
-    :param local_result_dict:  A Manager.dict that will be used to store local
-                               results. A list of all local results.
+    :param local_result_dict:  A ``ResultBatcher`` that will be used to send
+                               local results. A list of all local results
                                will be stored with the filename as key.
-    :param global_result_dict: A Manager.dict that will be used to store global
-                               results. The list of results of one global bear
+    :param global_result_dict: A dict that will be used to store global
+                               results for the dependency resolution of global
+                               bears. The list of results of one global bear
                                will be stored with the bear name as key.
     :param message_queue:      queue (write) for debug/warning/error
                                messages (type LogMessage)
-    :param control_queue:      queue (write). If any result gets written to the
-                               result_dict a tuple containing a CONTROL_ELEMENT
-                               (to indicate what kind of event happened) and
-                               either a bear name (for global results) or a
-                               file name to indicate the result will be put to
-                               the queue. If the run method finished all its
-                               local bears it will put
-                               (CONTROL_ELEMENT.LOCAL_FINISHED, None) to the
-                               queue, if it finished all global ones,
+    :param control_queue:      queue (write). Results are sent through it as
+                               tuple containing a CONTROL_ELEMENT (to indicate
+                               what kind of event happened) and the results.
+                               For local results, these are batches of
+                               (filename, results) tuples sent by the
+                               ``local_result_dict``, for global results a
+                               (bearname, results) tuple. If the run method
+                               finished all its local bears it will put
+                               (CONTROL_ELEMENT.LOCAL_FINISHED, timings) to
+                               the queue, with the time the local bears took
+                               as described in ``run_local_bear``. If it
+                               finished all global ones,
                                (CONTROL_ELEMENT.GLOBAL_FINISHED, None) will
                                be put there.
     :param timeout:            The queue blocks at most timeout seconds for a
                                free slot to execute the put operation on. After
                                the timeout it returns queue Full exception.
+    :param result_cache:       An instance of ``misc.Caching.ResultCache`` that
+                               local bear results are replayed from and stored
+                               to, or ``None`` to always run the local bears.
     """
     try:
+        timings = {}
         run_local_bears(file_name_queue,
                         message_queue,
                         timeout,
                         file_dict,
                         local_bear_list,
                         local_result_dict,
-                        control_queue,
-                        debug=debug)
-        control_queue.put((CONTROL_ELEMENT.LOCAL_FINISHED, None))
+                        debug=debug,
+                        result_cache=result_cache,
+                        timings=timings)
+        local_result_dict.flush()
+        control_queue.put((CONTROL_ELEMENT.LOCAL_FINISHED, timings))
 
         run_global_bears(message_queue,
                          timeout,
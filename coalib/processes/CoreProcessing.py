@@ -0,0 +1,444 @@
+"""
+Runs sections of legacy bears (``coalib.bears.LocalBear`` and
+``coalib.bears.GlobalBear``) with the scheduler of ``coalib.core.Core``
+instead of the bear processes of ``coalib.processes.Processing``.
+"""
+
+import asyncio
+from collections import OrderedDict
+import concurrent.futures
+import logging
+import queue
+
+from coalib.bearlib.abstractions.LinterClass import LinterClass
+from coalib.bears.BEAR_KIND import BEAR_KIND
+from coalib.core import Core
+from coalib.core.Bear import Bear
+from coalib.core.PersistentHash import get_content_digests, structural_hash
+from coalib.misc.Caching import ResultCache, TaskResultCache
+from coalib.processes import DebugProcessing
+from coalib.processes.BearRunning import (
+    run_global_bear, run_local_bear, validate_results)
+from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
+from coalib.processes.Processing import (
+    get_cpu_count, get_local_file_dict, get_section_files, get_use_raw_files,
+    instantiate_bears, process_queues)
+from coalib.processes.communication.LogMessage import LogMessage
+from coalib.processes.communication.ResultBatcher import ResultBatcher
+from coalib.results.Result import Result
+
+
+_adapters = {}
+
+
+def adapt_legacy_bear(bear_class):
+    """
+    Creates a bear class for the core running the given legacy bear class.
+
+    The adapter has the name of the legacy bear and depends on the adapters
+    of its dependencies. Adapters are created once per legacy bear class:
+
+    >>> from coalib.bears.LocalBear import LocalBear
+    >>> class SomeBear(LocalBear):
+    ...     pass
+    >>> class SomeOtherBear(LocalBear):
+    ...     BEAR_DEPS = {SomeBear}
+    >>> adapter = adapt_legacy_bear(SomeOtherBear)
+    >>> adapter.name
+    'SomeOtherBear'
+    >>> adapter.BEAR_DEPS == {adapt_legacy_bear(SomeBear)}
+    True
+    >>> issubclass(adapter, LegacyLocalBearAdapter)
+    True
+
+    Local ``linter`` bears without dependencies are adapted by a
+    ``LegacyLinterAdapter``.
+
+    :param bear_class: The ``LocalBear`` or ``GlobalBear`` class.
+    :return:           A subclass of ``LegacyLocalBearAdapter`` or
+                       ``LegacyGlobalBearAdapter``.
+    """
+    if bear_class not in _adapters:
+        if bear_class.kind() != BEAR_KIND.LOCAL:
+            base = LegacyGlobalBearAdapter
+        elif issubclass(bear_class, LinterClass) and not bear_class.BEAR_DEPS:
+            base = LegacyLinterAdapter
+        else:
+            base = LegacyLocalBearAdapter
+        _adapters[bear_class] = type(
+            bear_class.name,
+            (base,),
+            {'LEGACY_BEAR': bear_class,
+             'BEAR_DEPS': {adapt_legacy_bear(dependency)
+                           for dependency in bear_class.BEAR_DEPS},
+             '__module__': __name__})
+
+    return _adapters[bear_class]
+
+
+def _load_adapter(bear_class):
+    # Adapter classes are created at runtime, so they are looked up again
+    # when unpickling them.
+    return Bear.__new__(adapt_legacy_bear(bear_class))
+
+
+class LegacyBearAdapter(Bear):
+    """
+    A bear for the core running an instance of a legacy bear.
+
+    The tasks return lists of ``(bear_name, filename, item)`` tuples. The
+    items are the results and the ``LogMessage`` objects of the legacy bear,
+    so the messages are logged by the main process. ``filename`` is ``None``
+    for global bears.
+    """
+
+    LEGACY_BEAR = None
+
+    def __init__(self, section, file_dict, legacy_bear=None):
+        """
+        :param section:
+            The section object where bear settings are contained.
+        :param file_dict:
+            The file-dictionary the tasks are generated from.
+        :param legacy_bear:
+            The instance of ``LEGACY_BEAR`` to run. If ``None``, it is
+            instantiated with the given section.
+        :raises RuntimeError:
+            Raised when the requirements of the legacy bear are not fulfilled.
+        """
+        Bear.__init__(self, section, file_dict)
+
+        if legacy_bear is None:
+            legacy_bear = self.instantiate_legacy_bear(
+                section, file_dict, DebugProcessing.Queue())
+        # The messages are collected per task when the bear is run.
+        legacy_bear.message_queue = None
+        self.legacy_bear = legacy_bear
+        # The settings are part of the tasks, so results cached by the core
+        # are not reused for other settings.
+        self.settings_hash = ResultCache.get_settings_hash(legacy_bear)
+
+    @classmethod
+    def check_prerequisites(cls):
+        # Checked when instantiating the legacy bear.
+        return True
+
+    def __reduce__(self):
+        state = {'section': self.section,
+                 'file_dict': {},
+                 'legacy_bear': self.legacy_bear,
+                 'settings_hash': self.settings_hash}
+        return _load_adapter, (self.LEGACY_BEAR,), state
+
+    @classmethod
+    def instantiate_legacy_bear(cls, section, file_dict, message_queue):
+        """
+        Instantiates ``LEGACY_BEAR`` like ``Processing.instantiate_bears``.
+
+        :param section:       The section of the bear.
+        :param file_dict:     The file-dictionary given to global bears.
+        :param message_queue: The queue the legacy bear puts its messages
+                              in.
+        :return:              The instance of the legacy bear.
+        """
+        if cls.LEGACY_BEAR.kind() == BEAR_KIND.LOCAL:
+            return cls.LEGACY_BEAR(section, message_queue)
+        return cls.LEGACY_BEAR(file_dict, section, message_queue)
+
+    @classmethod
+    def get_source_files(cls):
+        # The legacy bear is no base class of the adapter.
+        return (super().get_source_files() |
+                cls.LEGACY_BEAR.get_source_files())
+
+    def get_dependency_results(self, filename=None):
+        """
+        Collects the results of the dependencies of the legacy bear.
+
+        :param filename: The file to collect the results for. If ``None``,
+                         the results of all files are collected.
+        :return:         A dictionary with the names of the dependencies as
+                         keys and the lists of their results as values.
+        """
+        return {bear_type.name: [item
+                                 for name, item_filename, item in items
+                                 if isinstance(item, Result) and (
+                                     filename is None or
+                                     item_filename == filename)]
+                for bear_type, items in self.dependency_results.items()}
+
+    def run_legacy_bear(self, filename, run_function, *args):
+        """
+        Runs the legacy bear, collecting its messages.
+
+        :param filename:     The filename to return the items with.
+        :param run_function: ``BearRunning.run_local_bear`` or
+                             ``BearRunning.run_global_bear``.
+        :param args:         The arguments passed to ``run_function`` after
+                             the message queue and the timeout.
+        :return:             The list of ``(bear_name, filename, item)``
+                             tuples.
+        """
+        message_queue = queue.Queue()
+        self.legacy_bear.message_queue = message_queue
+        results = run_function(message_queue, 0, *args)
+        return self.collect_items(filename, message_queue, results)
+
+    def collect_items(self, filename, message_queue, results):
+        """
+        Collects the messages and the results of the legacy bear.
+
+        :param filename:      The filename to return the items with.
+        :param message_queue: The queue the legacy bear put its messages in.
+        :param results:       The results of the legacy bear or ``None``.
+        :return:              The list of ``(bear_name, filename, item)``
+                              tuples.
+        """
+        items = []
+        while not message_queue.empty():
+            items.append(message_queue.get())
+        items.extend(results or [])
+        return [(self.name, filename, item) for item in items]
+
+
+class LegacyLocalBearAdapter(LegacyBearAdapter):
+    """
+    Runs a ``LocalBear`` on each file, like ``coalib.core.FileBear``.
+    """
+
+    def generate_tasks(self):
+        return (((self.settings_hash,
+                  filename,
+                  file,
+                  [result
+                   for results in self.get_dependency_results(filename)
+                   .values()
+                   for result in results]),
+                 {})
+                for filename, file in self.file_dict.items())
+
+    def execute_task(self, args, kwargs):
+        settings_hash, filename, file, dependency_results = args
+        return self.run_legacy_bear(filename,
+                                    run_local_bear,
+                                    dependency_results,
+                                    {filename: file},
+                                    self.legacy_bear,
+                                    filename)
+
+
+class LegacyLinterAdapter(LegacyLocalBearAdapter):
+    """
+    Runs a local ``linter`` bear on each file like
+    ``LegacyLocalBearAdapter``, but its tasks are coroutines running the
+    executable on the event loop of the core. So the processes of many files
+    run at the same time without occupying the executor.
+    """
+
+    @asyncio.coroutine
+    def execute_task(self, args, kwargs):
+        settings_hash, filename, file, dependency_results = args
+        # The tasks run concurrently, so they share one queue. The messages
+        # are collected by the next task that finishes.
+        if self.legacy_bear.message_queue is None:
+            self.legacy_bear.message_queue = queue.Queue()
+        message_queue = self.legacy_bear.message_queue
+
+        results = yield from self.legacy_bear.execute_async(filename, file)
+        results = validate_results(message_queue, 0, results,
+                                   self.name, (filename, file), {})
+        return self.collect_items(filename, message_queue, results)
+
+
+class LegacyGlobalBearAdapter(LegacyBearAdapter):
+    """
+    Runs a ``GlobalBear`` once, like ``coalib.core.ProjectBear``.
+    """
+
+    def generate_tasks(self):
+        dependency_results = (self.get_dependency_results()
+                              if self.BEAR_DEPS else
+                              None)
+        # The legacy bear gets the files on instantiation, their hash makes
+        # cached results of the task depend on them.
+        files_hash = structural_hash(
+            self.file_dict, get_content_digests([self.file_dict]))
+        return ((self.settings_hash, files_hash, dependency_results), {}),
+
+    def execute_task(self, args, kwargs):
+        settings_hash, files_hash, dependency_results = args
+        return self.run_legacy_bear(None,
+                                    run_global_bear,
+                                    self.legacy_bear,
+                                    dependency_results)
+
+
+def get_runnable_bears(bears):
+    """
+    Leaves out the bears whose dependencies are not in the given bears, e.g.
+    because their requirements are not fulfilled.
+
+    :param bears: The adapter instances.
+    :return:      The list of adapter instances that can be run.
+    """
+    bears = list(bears)
+    while True:
+        bear_types = {type(bear) for bear in bears}
+        unmet = [bear for bear in bears if bear.BEAR_DEPS - bear_types]
+        if not unmet:
+            return bears
+
+        for bear in unmet:
+            logging.warning('The dependencies of the bear {} are not met. '
+                            'Leaving it out...'.format(bear.name))
+            bears.remove(bear)
+
+
+def run_core(bears, control_queue, cache=None, executor=None):
+    """
+    Runs the given adapters with ``coalib.core.Core`` and puts their results
+    into the control queue like the bear processes do.
+
+    :param bears:         The adapter instances to run.
+    :param control_queue: The queue (write) to put the results into.
+    :param cache:         The cache passed to ``Core.run``. A
+                          ``TaskResultCache`` is written afterwards.
+    :param executor:      The executor passed to ``Core.run``.
+    """
+    local_result_dict = ResultBatcher(control_queue)
+    global_result_dict = OrderedDict(
+        (bear.name, [])
+        for bear in bears
+        if isinstance(bear, LegacyGlobalBearAdapter))
+
+    def result_callback(item):
+        bear_name, filename, result = item
+        if isinstance(result, LogMessage):
+            logging.log(result.log_level, result.message)
+        elif filename is None:
+            global_result_dict[bear_name].append(result)
+        else:
+            local_result_dict[filename] = [result]
+
+    try:
+        Core.run(bears, result_callback, cache, executor)
+    finally:
+        if isinstance(cache, TaskResultCache):
+            cache.write()
+        local_result_dict.flush()
+        # The results are processed once the core is done, so the global
+        # results are put before finishing the local ones to have them
+        # processed together.
+        for bear_name, results in global_result_dict.items():
+            control_queue.put((CONTROL_ELEMENT.GLOBAL, (bear_name, results)))
+        control_queue.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
+        control_queue.put((CONTROL_ELEMENT.LOCAL_FINISHED, None))
+
+
+def execute_section_with_core(section,
+                              global_bear_list,
+                              local_bear_list,
+                              print_results,
+                              cache,
+                              log_printer,
+                              console_printer,
+                              apply_single=False,
+                              task_cache=None):
+    """
+    Executes the section with the given bears like
+    ``Processing.execute_section``, but runs the bears with the scheduler of
+    ``coalib.core.Core``. The tasks of all bears are run in parallel as soon
+    as their dependencies are done, and their results are shown once all
+    bears finished.
+
+    :param section:          The section to execute.
+    :param global_bear_list: List of global bears belonging to the section.
+                             Dependencies are already resolved.
+    :param local_bear_list:  List of local bears belonging to the section.
+                             Dependencies are already resolved.
+    :param print_results:    Prints all given results appropriate to the
+                             output medium.
+    :param cache:            An instance of ``misc.Caching.FileCache`` to use as
+                             a file cache buffer.
+    :param log_printer:      The log_printer to warn to.
+    :param console_printer:  Object to print messages on the console.
+    :param apply_single:     The action that should be applied for all results.
+                             If it's not selected, has a value of False.
+    :param task_cache:       The cache of task results passed to ``Core.run``,
+                             or ``None``.
+    :return:                 Tuple containing a bool (True if results were
+                             yielded, False otherwise), a dict containing
+                             all local results (filenames are key) and a
+                             dict containing all global bear results (bear
+                             names are key) as well as the file dictionary.
+    """
+    try:
+        job_count = int(section['jobs'])
+    except ValueError:
+        logging.warning("Unable to convert setting 'jobs' into a number. "
+                        'Falling back to CPU count.')
+        job_count = get_cpu_count()
+    except IndexError:
+        job_count = get_cpu_count()
+
+    use_raw_files = get_use_raw_files(global_bear_list + local_bear_list)
+    if use_raw_files is None:
+        return ((), {}, {}, {})
+
+    filename_list, complete_file_dict = get_section_files(section,
+                                                          cache,
+                                                          use_raw_files)
+
+    # The messages of the bears are logged when they are instantiated here.
+    local_bears, global_bears = instantiate_bears(section,
+                                                  local_bear_list,
+                                                  global_bear_list,
+                                                  complete_file_dict,
+                                                  DebugProcessing.Queue(),
+                                                  console_printer)
+
+    file_dict = get_local_file_dict(
+        filename_list,
+        complete_file_dict,
+        cache if (len(local_bears) == len(local_bear_list) and
+                  not use_raw_files) else None,
+        task_cache)
+
+    bears = get_runnable_bears(
+        [adapt_legacy_bear(type(bear))(section, file_dict, bear)
+         for bear in local_bears] +
+        [adapt_legacy_bear(type(bear))(section, complete_file_dict, bear)
+         for bear in global_bears])
+
+    control_queue = queue.Queue()
+    # Every file is in the results, even if no local bear yields results
+    # for it.
+    control_queue.put((CONTROL_ELEMENT.LOCAL,
+                       [(filename, []) for filename in file_dict]))
+    # Runs the core when started, as the bears are run by the executor.
+    runner = DebugProcessing.Process(
+        target=run_core,
+        kwargs={'bears': bears,
+                'control_queue': control_queue,
+                'cache': task_cache,
+                'executor': concurrent.futures.ProcessPoolExecutor(
+                    max_workers=job_count)})
+    runner.start()
+
+    local_result_dict = {}
+    global_result_dict = {}
+    return (process_queues([runner],
+                           control_queue,
+                           local_result_dict,
+                           global_result_dict,
+                           file_dict,
+                           print_results,
+                           section,
+                           cache,
+                           None,
+                           console_printer=console_printer,
+                           debug=True,
+                           apply_single=apply_single),
+            local_result_dict,
+            global_result_dict,
+            file_dict)
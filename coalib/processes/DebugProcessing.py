@@ -9,20 +9,7 @@ from functools import partial
 
 from coalib.processes.communication.LogMessage import LogMessage
 
-__all__ = ['Manager', 'Process', 'Queue']
-
-
-class Manager:
-    """
-    A debug replacement for ``multiprocessing.Manager``, just offering
-    ``builtins.dict`` as ``.dict`` member.
-    """
-
-    def __init__(self):
-        """
-        Just add ``dict`` as instance member.
-        """
-        self.dict = dict
+__all__ = ['Process', 'Queue']
 
 
 class Process(partial):
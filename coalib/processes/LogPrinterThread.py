@@ -8,8 +8,9 @@ from coalib.processes.communication.LogMessage import LogMessage
 class LogPrinterThread(threading.Thread):
     """
     This is the Thread object that outputs all log messages it gets from
-    its message_queue. Setting obj.running = False will stop within the next
-    0.1 seconds.
+    its message_queue. Putting ``None`` into the message_queue stops it once
+    all messages before are output. Setting obj.running = False will stop
+    within the next 0.1 seconds.
     """
 
     def __init__(self, message_queue, log_printer=None):
@@ -21,7 +22,9 @@ class LogPrinterThread(threading.Thread):
         while self.running:
             try:
                 elem = self.message_queue.get(timeout=0.1)
-                if isinstance(elem, LogMessage):
+                if elem is None:
+                    break
+                elif isinstance(elem, LogMessage):
                     logging.log(elem.log_level, elem.message)
                 else:
                     logging.info(elem)
@@ -0,0 +1,167 @@
+import io
+import multiprocessing
+import pickle
+
+from coalib.processes.BearRunning import run
+from coalib.processes.LogPrinterThread import LogPrinterThread
+
+
+QUEUE_NAMES = ('file_name_queue',
+               'global_bear_queue',
+               'message_queue',
+               'control_queue')
+
+
+def dump_job(run_kwargs, queues):
+    """
+    Pickles the arguments of ``BearRunning.run`` for a process of a pool.
+
+    Queues can only be shared with processes when they are created. The
+    given queues are pickled as their names instead, wherever they are
+    referenced (e.g. by bears).
+
+    :param run_kwargs: The keyword arguments for ``BearRunning.run``.
+    :param queues:     A dict of the queues the processes of the pool
+                       received, with their names as keys.
+    :return:           The pickled arguments as ``bytes``.
+    """
+    names = {id(queue): name for name, queue in queues.items()}
+    buffer = io.BytesIO()
+    pickler = pickle.Pickler(buffer, pickle.HIGHEST_PROTOCOL)
+    pickler.persistent_id = lambda obj: names.get(id(obj))
+    pickler.dump(run_kwargs)
+    return buffer.getvalue()
+
+
+def load_job(job, queues):
+    """
+    Unpickles the arguments pickled by ``dump_job``.
+
+    >>> import queue
+    >>> queues = {'message_queue': queue.Queue()}
+    >>> job = dump_job({'message_queue': queues['message_queue'],
+    ...                 'timeout': 0.1},
+    ...                queues)
+    >>> kwargs = load_job(job, queues)
+    >>> kwargs['message_queue'] is queues['message_queue']
+    True
+    >>> kwargs['timeout']
+    0.1
+
+    :param job:    The ``bytes`` returned by ``dump_job``.
+    :param queues: A dict of the queues with their names as keys.
+    :return:       The keyword arguments for ``BearRunning.run``.
+    """
+    unpickler = pickle.Unpickler(io.BytesIO(job))
+    unpickler.persistent_load = queues.__getitem__
+    return unpickler.load()
+
+
+def work(job_queue, **queues):
+    """
+    Runs the jobs of a pool until ``None`` is read from the job queue.
+
+    :param job_queue: The queue (read) of jobs pickled by ``dump_job``.
+    :param queues:    The queues referenced by the jobs.
+    """
+    try:
+        while True:
+            job = job_queue.get()
+            if job is None:
+                return
+
+            run(**load_job(job, queues))
+    except KeyboardInterrupt:
+        return
+
+
+class ProcessPool:
+    """
+    Processes running bears, kept alive to run the bears of one section after
+    another. Bear modules are only imported and processes are only started
+    once for all sections.
+
+    The processes are started by the first call of ``run``. A section needing
+    a different number of processes or holding objects that can't be pickled
+    is run by new processes instead, like without a pool.
+    """
+
+    def __init__(self):
+        self.job_queue = multiprocessing.Queue()
+        self.queues = {name: multiprocessing.Queue() for name in QUEUE_NAMES}
+        self.logger_thread = LogPrinterThread(self.queues['message_queue'])
+        self.processes = []
+        self.temporary_processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def run(self, job_count, run_kwargs):
+        """
+        Runs ``BearRunning.run`` in ``job_count`` processes.
+
+        :param job_count:  The number of processes to run it in.
+        :param run_kwargs: The keyword arguments for ``BearRunning.run``.
+                           Its queues have to be the ones of this pool.
+        :return:           The list of processes running it.
+        """
+        self.join_temporary_processes()
+
+        if not self.processes or len(self.processes) == job_count:
+            try:
+                job = dump_job(run_kwargs, self.queues)
+            except (pickle.PicklingError, AttributeError, RuntimeError,
+                    TypeError):
+                job = None
+
+            if job is not None:
+                if not self.processes:
+                    self.processes = [
+                        multiprocessing.Process(target=work,
+                                                args=(self.job_queue,),
+                                                kwargs=self.queues)
+                        for i in range(job_count)]
+                    for process in self.processes:
+                        process.start()
+
+                for i in range(job_count):
+                    self.job_queue.put(job)
+                self.start_logger_thread()
+                return self.processes
+
+        self.temporary_processes = [
+            multiprocessing.Process(target=run, kwargs=run_kwargs)
+            for i in range(job_count)]
+        for process in self.temporary_processes:
+            process.start()
+        self.start_logger_thread()
+        return self.temporary_processes
+
+    def start_logger_thread(self):
+        # The thread is started after the processes, so they are not forked
+        # while it holds a lock.
+        if not self.logger_thread.is_alive():
+            self.logger_thread.start()
+
+    def join_temporary_processes(self):
+        for process in self.temporary_processes:
+            process.join()
+        self.temporary_processes = []
+
+    def close(self):
+        """
+        Stops all processes and the logger thread once they are done.
+        """
+        for process in self.processes:
+            self.job_queue.put(None)
+        for process in self.processes:
+            process.join()
+        self.processes = []
+        self.join_temporary_processes()
+
+        if self.logger_thread.is_alive():
+            self.queues['message_queue'].put(None)
+            self.logger_thread.join()
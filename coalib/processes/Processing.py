@@ -1,3 +1,6 @@
+from bisect import bisect_left
+from collections import OrderedDict
+from collections.abc import ItemsView, ValuesView
 from itertools import chain
 import logging
 import os
@@ -8,14 +11,17 @@ import subprocess
 from coala_utils.string_processing.StringConverter import StringConverter
 
 from coalib.collecting.Collectors import collect_files
+from coalib.core.PersistentHash import hash_contents
 from coalib.misc.Exceptions import log_exception
 from coalib.output.printers.LOG_LEVEL import LOG_LEVEL
 from coalib.processes.BearRunning import run
 from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
 from coalib.processes.LogPrinterThread import LogPrinterThread
+from coalib.processes.communication.ResultBatcher import ResultBatcher
 from coalib.results.Result import Result
 from coalib.results.result_actions.DoNothingAction import DoNothingAction
-from coalib.results.result_actions.ApplyPatchAction import ApplyPatchAction
+from coalib.results.result_actions.ApplyPatchAction import (
+    ApplyPatchAction, DeferredFileDiffDict)
 from coalib.results.result_actions.IgnoreResultAction import IgnoreResultAction
 from coalib.results.result_actions.ShowAppliedPatchesAction import (
     ShowAppliedPatchesAction)
@@ -27,7 +33,7 @@ from coalib.results.result_actions.ShowPatchAction import ShowPatchAction
 from coalib.results.RESULT_SEVERITY import RESULT_SEVERITY
 from coalib.results.SourceRange import SourceRange
 from coalib.settings.Setting import glob_list, typed_list
-from coalib.parsing.Globbing import fnmatch
+from coalib.parsing.Globbing import fnmatch, GlobSet
 from coalib.io.FileProxy import FileDictGenerator
 from coalib.io.File import File
 
@@ -57,6 +63,135 @@ def fill_queue(queue_fill, any_list):
         queue_fill.put(elem)
 
 
+def get_bear_groups(bear_list):
+    """
+    Groups the bears that depend on each other, so one process can run each
+    group without waiting for the results of other processes.
+
+    >>> from queue import Queue
+    >>> from coalib.bears.GlobalBear import GlobalBear
+    >>> from coalib.settings.Section import Section
+    >>> class ABear(GlobalBear): pass
+    >>> class BBear(GlobalBear): BEAR_DEPS = {ABear}
+    >>> class CBear(GlobalBear): pass
+    >>> get_bear_groups([bear({}, Section('name'), Queue())
+    ...                  for bear in (BBear, CBear, ABear)])
+    [[2, 0], [1]]
+
+    :param bear_list: The list of bear instances.
+    :return:          A list of lists of indexes into the ``bear_list``.
+                      Within each list, bears come after the bears they
+                      depend on.
+    """
+    indexes = {bear.__class__.__name__: index
+               for index, bear in enumerate(bear_list)}
+    dependencies = [sorted(indexes[dep.__name__]
+                           for dep in getattr(bear, 'BEAR_DEPS', None) or ()
+                           if dep.__name__ in indexes)
+                    for bear in bear_list]
+
+    order = []
+
+    def visit(index):
+        if index not in order:
+            for dependency in dependencies[index]:
+                visit(dependency)
+            order.append(index)
+
+    for index in range(len(bear_list)):
+        visit(index)
+
+    # Bears depending on each other directly or indirectly share a group
+    group_of = list(range(len(bear_list)))
+    for index in order:
+        for dependency in dependencies[index]:
+            old, new = group_of[index], group_of[dependency]
+            group_of = [new if group == old else group for group in group_of]
+
+    groups = OrderedDict()
+    for index in order:
+        groups.setdefault(group_of[index], []).append(index)
+
+    return list(groups.values())
+
+
+def get_local_tasks(filename_list, local_bear_list, timing_cache=None):
+    """
+    Splits running the local bears into tasks of one file and one group of
+    bears depending on each other. The tasks are sorted by the time they are
+    estimated to take, so the longest ones are started first.
+
+    >>> from queue import Queue
+    >>> from coalib.bears.LocalBear import LocalBear
+    >>> from coalib.settings.Section import Section
+    >>> class ABear(LocalBear): pass
+    >>> class BBear(LocalBear): pass
+    >>> bears = [bear(Section('name'), Queue()) for bear in (ABear, BBear)]
+    >>> get_local_tasks(['non_existent_file', __file__], bears)
+    ... # doctest: +NORMALIZE_WHITESPACE
+    [('...Processing.py', [0]), ('...Processing.py', [1]),
+     ('non_existent_file', [0]), ('non_existent_file', [1])]
+
+    Groups with a bear that has a ``BATCH_SIZE`` greater than 1 check
+    batches of files in one task:
+
+    >>> class CBear(LocalBear): BATCH_SIZE = 2
+    >>> get_local_tasks(['a', 'b', 'c'], [CBear(Section('name'), Queue())])
+    [(('a', 'b'), [0]), (('c',), [0])]
+
+    :param filename_list:   The names of the files to run the bears on.
+    :param local_bear_list: The list of local bear instances.
+    :param timing_cache:    A ``misc.Caching.TimingCache`` to estimate the
+                            time of the tasks with, or ``None`` to estimate
+                            it by the size of the files only.
+    :return:                A list of tuples of a file name, or of a tuple
+                            of file names for batches, and a list of
+                            indexes into the ``local_bear_list``.
+    """
+    # Without local bears, one task per file still reports no results for it
+    groups = get_bear_groups(local_bear_list) or [[]]
+    group_speeds = [
+        sum(timing_cache.get_seconds_per_byte(local_bear_list[index].name)
+            if timing_cache is not None else 1
+            for index in group)
+        for group in groups]
+    batch_sizes = [max([getattr(local_bear_list[index], 'BATCH_SIZE', 1)
+                        for index in group] or [1])
+                   for group in groups]
+
+    sizes = {}
+    for filename in filename_list:
+        try:
+            sizes[filename] = os.path.getsize(filename)
+        except OSError:
+            sizes[filename] = 0
+
+    tasks = []
+    for filename in filename_list:
+        tasks.extend((sizes[filename] * speed, filename, group)
+                     for speed, group, batch_size in zip(group_speeds,
+                                                         groups,
+                                                         batch_sizes)
+                     if batch_size == 1)
+
+    # Batches of files of similar size take a similar time.
+    filenames = sorted(filename_list,
+                       key=lambda filename: sizes[filename],
+                       reverse=True)
+    for speed, group, batch_size in zip(group_speeds, groups, batch_sizes):
+        if batch_size == 1:
+            continue
+
+        for start in range(0, len(filenames), batch_size):
+            batch = tuple(filenames[start:start+batch_size])
+            tasks.append((sum(sizes[filename] for filename in batch) * speed,
+                          batch,
+                          group))
+
+    tasks.sort(key=lambda task: task[0], reverse=True)
+    return [(filename, group) for cost, filename, group in tasks]
+
+
 def get_running_processes(processes):
     return sum((1 if process.is_alive() else 0) for process in processes)
 
@@ -173,6 +308,187 @@ def autoapply_actions(results,
     return not_processed_results
 
 
+def _get_line_span(range):
+    """
+    :return: The first and the last line of the range, ``None`` lines are
+             replaced by the beginning or the end of the file.
+    """
+    return (0 if range.start.line is None else range.start.line,
+            float('inf') if range.end.line is None else range.end.line)
+
+
+class _IgnoreRangeGroup:
+    """
+    The ignore ranges of a file that apply to the same bears. The ranges
+    are merged into disjoint spans of lines, sorted by their lines, so only
+    the ranges in the spans a result touches have to be checked.
+    """
+
+    def __init__(self):
+        self.ranges = []
+        self.span_starts = None
+        self.span_ends = None
+        self.span_ranges = None
+
+    def add(self, range):
+        self.ranges.append(range)
+        self.span_starts = None
+
+    def _build_spans(self):
+        self.span_starts, self.span_ends, self.span_ranges = [], [], []
+        for range in sorted(self.ranges, key=_get_line_span):
+            start, end = _get_line_span(range)
+            if self.span_ends and start <= self.span_ends[-1]:
+                self.span_ends[-1] = max(self.span_ends[-1], end)
+                self.span_ranges[-1].append(range)
+            else:
+                self.span_starts.append(start)
+                self.span_ends.append(end)
+                self.span_ranges.append([range])
+
+    def overlaps(self, range):
+        """
+        :param range: A ``SourceRange`` of the same file.
+        :return:      True if any ignore range overlaps with it.
+        """
+        if self.span_starts is None:
+            self._build_spans()
+
+        start, end = _get_line_span(range)
+        index = bisect_left(self.span_ends, start)
+        while (index < len(self.span_starts) and
+               self.span_starts[index] <= end):
+            for ignore_range in self.span_ranges[index]:
+                if _get_line_span(ignore_range)[0] > end:
+                    break
+                if ignore_range.overlaps(range):
+                    return True
+            index += 1
+
+        return False
+
+
+class IgnoreRangeIndex:
+    """
+    Indexes ignore ranges as yielded by ``yield_ignore_ranges`` by their
+    files and the bears they apply to, so checking whether a result has to
+    be ignored only looks at the ranges near its affected code.
+
+    >>> index = IgnoreRangeIndex([
+    ...     (['pep8bear', 'py*'], SourceRange.from_values('f', 1, 1, 2, 9)),
+    ...     ([], SourceRange.from_values('f', 10, 1, 10, 9))])
+    >>> index.is_ignored(Result.from_values('PyLintBear', '', 'f', 2))
+    True
+    >>> index.is_ignored(Result.from_values('LineLengthBear', '', 'f', 2))
+    False
+    >>> index.is_ignored(Result.from_values('LineLengthBear', '', 'f', 10))
+    True
+
+    Given a file dictionary, the ignore comments of a file are only scanned
+    when a result affects the file for the first time:
+
+    >>> index = IgnoreRangeIndex(file_dict={'f': ('a  # noqa\\n',)})
+    >>> index.is_ignored(Result.from_values('PyLintBear', '', 'f', 1))
+    True
+    """
+
+    def __init__(self, ignore_ranges=(), file_dict=None, cache=None):
+        """
+        :param ignore_ranges: An iterable of tuples, each containing a list of
+                              lower cased bear names or globs and a
+                              ``SourceRange`` to ignore, see ``add``.
+        :param file_dict:     A file dictionary whose files are scanned for
+                              ignore comments lazily, or ``None``.
+        :param cache:         A ``misc.Caching.FileCache`` to remember the
+                              ignore comments of the files of ``file_dict``
+                              in, or ``None``.
+        """
+        # Maps the files to dicts of the bears and their range groups.
+        self.groups = {}
+        self.bear_matchers = {}
+        self.origin_matches = {}
+        for bears, range in ignore_ranges:
+            self.add(bears, range)
+
+        self.file_dict = file_dict
+        self.cache = cache
+        # Maps the absolute paths of the files to their keys in the file
+        # dictionary, built when a file is not found by its path.
+        self.filenames = None
+        self.scanned_files = set()
+
+    def add(self, bears, range):
+        """
+        Adds an ignore range.
+
+        :param bears: A list of lower cased bear names or globs the range
+                      applies to. If it is empty, it applies to all bears.
+        :param range: The ``SourceRange`` to ignore.
+        """
+        bears = tuple(sorted(set(bears)))
+        if bears not in self.bear_matchers:
+            self.bear_matchers[bears] = GlobSet(bears)
+        file_groups = self.groups.setdefault(range.file, {})
+        if bears not in file_groups:
+            file_groups[bears] = _IgnoreRangeGroup()
+        file_groups[bears].add(range)
+
+    def _matches_origin(self, bears, origin):
+        key = bears, origin
+        if key not in self.origin_matches:
+            self.origin_matches[key] = (
+                not bears or
+                origin in bears or
+                self.bear_matchers[bears].match(origin))
+        return self.origin_matches[key]
+
+    def _scan_file(self, file):
+        """
+        Adds the ignore ranges of a file of the file dictionary, unless they
+        were already added.
+
+        :param file: The absolute path of the file.
+        """
+        self.scanned_files.add(file)
+        filename = file
+        if filename not in self.file_dict:
+            if self.filenames is None:
+                self.filenames = {os.path.abspath(name): name
+                                  for name in self.file_dict}
+            filename = self.filenames.get(file)
+
+        lines = self.file_dict.get(filename) if filename is not None else None
+        # Do not process raw files
+        if lines is None:
+            return
+
+        for bears, range in get_file_ignore_ranges(filename, lines,
+                                                   self.cache):
+            self.add(bears, range)
+
+    def is_ignored(self, result):
+        """
+        Determines if the result has to be ignored, see
+        ``check_result_ignore``.
+
+        :param result: The result that needs to be checked.
+        :return:       True if the result has to be ignored.
+        """
+        if self.file_dict is not None:
+            for range in result.affected_code:
+                if range.file not in self.scanned_files:
+                    self._scan_file(range.file)
+
+        origin = result.origin.lower().split(' ')[0]
+        for range in result.affected_code:
+            for bears, group in self.groups.get(range.file, {}).items():
+                if (self._matches_origin(bears, origin) and
+                        group.overlaps(range)):
+                    return True
+
+        return False
+
+
 def check_result_ignore(result, ignore_ranges):
     """
     Determines if the result has to be ignored.
@@ -185,20 +501,18 @@ def check_result_ignore(result, ignore_ranges):
     just `# Ignore CSecurityBear`.
 
     :param result:        The result that needs to be checked.
-    :param ignore_ranges: A list of tuples, each containing a list of lower
-                          cased affected bearnames and a SourceRange to
-                          ignore. If any of the bearname lists is empty, it
-                          is considered an ignore range for all bears.
-                          This may be a list of globbed bear wildcards.
+    :param ignore_ranges: An ``IgnoreRangeIndex`` or a list of tuples, each
+                          containing a list of lower cased affected bearnames
+                          and a SourceRange to ignore. If any of the bearname
+                          lists is empty, it is considered an ignore range
+                          for all bears. This may be a list of globbed bear
+                          wildcards.
     :return:              True if the result has to be ignored.
     """
-    for bears, range in ignore_ranges:
-        orig = result.origin.lower().split(' ')[0]
-        if (result.overlaps(range) and
-                (len(bears) == 0 or orig in bears or fnmatch(orig, bears))):
-            return True
+    if not isinstance(ignore_ranges, IgnoreRangeIndex):
+        ignore_ranges = IgnoreRangeIndex(ignore_ranges)
 
-    return False
+    return ignore_ranges.is_ignored(result)
 
 
 def print_result(results,
@@ -226,8 +540,8 @@ def print_result(results,
                            to the output medium.
     :param file_diff_dict: A dictionary that contains filenames as keys and
                            diff objects as values.
-    :param ignore_ranges:  A list of SourceRanges. Results that affect code in
-                           any of those ranges will be ignored.
+    :param ignore_ranges:  An ``IgnoreRangeIndex`` of the ranges to ignore,
+                           see ``check_result_ignore``.
     :param apply_single:   The action that should be applied for all results,
                            If it's not selected, has a value of False.
     :param console_printer: Object to print messages on the console.
@@ -261,6 +575,9 @@ def get_file_dict(filename_list, log_printer=None, allow_raw_files=False):
     """
     Reads all files into a dictionary.
 
+    The files are only checked to be UTF-8 encoded here, their lines are
+    read lazily when they are accessed for the first time.
+
     :param filename_list:   List of names of paths to files to get contents of.
     :param log_printer:     The logger which logs errors.
     :param allow_raw_files: Allow the usage of raw files (non text files),
@@ -271,20 +588,13 @@ def get_file_dict(filename_list, log_printer=None, allow_raw_files=False):
     file_dict = FileDict()
     for filename in filename_list:
         try:
-            file_dict[filename] = File(filename)
-            # This is a workaround to purposely raise a
-            # ``UnicodeDecodeError`` to move into the
-            # except clause.
-            File(filename).string
+            file = File(filename)
+            file.check_encoding()
+            file_dict[filename] = file
         except UnicodeDecodeError:
             if allow_raw_files:
                 file_dict[filename] = None
                 continue
-            else:
-                # In case raw files are not allowed the
-                # ``File`` object created for it
-                # needs to be evicted from the dictionary.
-                del file_dict[filename]
             logging.warning("Failed to read file '{}'. It seems to contain "
                             'non-unicode characters. Leaving it out.'
                             .format(filename))
@@ -297,6 +607,107 @@ def get_file_dict(filename_list, log_printer=None, allow_raw_files=False):
     return file_dict
 
 
+def get_use_raw_files(bears):
+    """
+    Checks whether the given bears use raw files (non text files).
+
+    :param bears: The bear classes of a section.
+    :return:      Whether the bears use raw files, or ``None`` if bears using
+                  raw files are mixed with bears using text files.
+    """
+    use_raw_files = set(bear.USE_RAW_FILES for bear in bears)
+
+    if len(use_raw_files) > 1:
+        logging.error("Bears that uses raw files can't be mixed with Bears "
+                      'that uses text files. Please move the following bears '
+                      'to their own section: ' +
+                      ', '.join(bear.name for bear in bears
+                                if not bear.USE_RAW_FILES))
+        return None
+
+    # use_raw_files is expected to be only one object.
+    # The if statement is to ensure this doesn't fail when
+    # it's running on an empty run
+    return use_raw_files.pop() if len(use_raw_files) > 0 else False
+
+
+def get_section_files(section, cache, use_raw_files=False):
+    """
+    Collects the files of a section and creates a file dictionary of them.
+
+    :param section:       The section to collect the files of.
+    :param cache:         An instance of ``misc.Caching.FileCache`` to use as
+                          a file cache buffer, or ``None``.
+    :param use_raw_files: Allow the usage of raw files (non text files).
+    :return:              A tuple containing the list of collected filenames
+                          and the file dictionary of all of them.
+    """
+    filename_list = collect_files(
+        glob_list(section.get('files', '')),
+        None,
+        ignored_file_paths=glob_list(section.get('ignore', '')),
+        limit_file_paths=glob_list(section.get('limit_files', '')),
+        section_name=section.name)
+
+    # This stores all matched files irrespective of whether coala is run
+    # only on changed files or not. Global bears require all the files
+    complete_filename_list = filename_list
+
+    file_dict_generator = get_file_dict
+    if cache is not None and isinstance(cache, FileDictGenerator):
+        file_dict_generator = cache.get_file_dict
+
+    complete_file_dict = file_dict_generator(complete_filename_list,
+                                             allow_raw_files=use_raw_files)
+
+    logging.debug('Files that will be checked:\n' +
+                  '\n'.join(complete_file_dict.keys()))
+
+    return complete_filename_list, complete_file_dict
+
+
+def get_local_file_dict(filename_list,
+                        complete_file_dict,
+                        cache=None,
+                        result_cache=None):
+    """
+    Creates the file dictionary local bears are run on.
+
+    :param filename_list:      The list of collected filenames.
+    :param complete_file_dict: The file dictionary of all collected files.
+    :param cache:              An instance of ``misc.Caching.FileCache`` to
+                               start tracking all files with. Only the changed
+                               files are kept then, unless a result cache is
+                               given. If ``None``, all files are kept.
+    :param result_cache:       An instance of ``misc.Caching.ResultCache``
+                               or ``misc.Caching.TaskResultCache`` replaying
+                               the results of unchanged files, or ``None``.
+    :return:                   The file dictionary of the files to run local
+                               bears on.
+    """
+    if cache:
+        cache.track_files(set(filename_list))
+        # With a result cache, results of unchanged files are replayed
+        # instead, so all results are shown again.
+        if result_cache is None:
+            # If caching is enabled then the local bears should process only
+            # the changed files.
+            logging.debug("coala is run only on changed files, bears' log "
+                          'messages from previous runs may not appear. You '
+                          'may use the `--flush-cache` flag to see them.')
+            filename_list = cache.get_uncached_files(set(filename_list))
+
+    if isinstance(complete_file_dict, FileDict):
+        # Keep the files lazy, so only bears accessing them read them. The
+        # processes running the bears then map the files themselves instead
+        # of receiving a copy of all contents.
+        return complete_file_dict.subset(filename_list)
+
+    return {filename: complete_file_dict[filename]
+            for filename in filename_list
+            if filename in complete_file_dict}
+
+
 def instantiate_bears(section,
                       local_bear_list,
                       global_bear_list,
@@ -352,7 +763,10 @@ def instantiate_processes(section,
                           console_printer,
                           debug=False,
                           use_raw_files=False,
-                          debug_bears=False):
+                          debug_bears=False,
+                          result_cache=None,
+                          pool=None,
+                          timing_cache=None):
     """
     Instantiate the number of processes that will run bears which will be
     responsible for running bears in a multiprocessing environment.
@@ -369,42 +783,38 @@ def instantiate_processes(section,
                              for bears, not catching any exceptions on running
                              them.
     :param use_raw_files:    Allow the usage of raw files (non text files)
+    :param result_cache:     An instance of ``misc.Caching.ResultCache`` to
+                             replay results of local bears from. If given,
+                             local bears are run on all files instead of only
+                             the changed ones.
+    :param pool:             A ``ProcessPool`` to run the bears in. Its
+                             processes are returned already running.
+    :param timing_cache:     A ``misc.Caching.TimingCache`` to estimate the
+                             time local bears take on each file with, so the
+                             longest ones are started first.
     :return:                 A tuple containing a list of processes,
                              and the arguments passed to each process which are
                              the same for each object.
     """
-    filename_list = collect_files(
-        glob_list(section.get('files', '')),
-        None,
-        ignored_file_paths=glob_list(section.get('ignore', '')),
-        limit_file_paths=glob_list(section.get('limit_files', '')),
-        section_name=section.name)
-
-    # This stores all matched files irrespective of whether coala is run
-    # only on changed files or not. Global bears require all the files
-    complete_filename_list = filename_list
-
-    file_dict_generator = get_file_dict
-    if cache is not None and isinstance(cache, FileDictGenerator):
-        file_dict_generator = cache.get_file_dict
-
-    complete_file_dict = file_dict_generator(complete_filename_list,
-                                             allow_raw_files=use_raw_files)
-
-    logging.debug('Files that will be checked:\n' +
-                  '\n'.join(complete_file_dict.keys()))
+    filename_list, complete_file_dict = get_section_files(section,
+                                                          cache,
+                                                          use_raw_files)
 
     if debug or debug_bears:
         from . import DebugProcessing as processing
     else:
         import multiprocessing as processing
-    manager = processing.Manager()
-    global_bear_queue = processing.Queue()
-    filename_queue = processing.Queue()
-    local_result_dict = manager.dict()
-    global_result_dict = manager.dict()
-    message_queue = processing.Queue()
-    control_queue = processing.Queue()
+    if pool is not None:
+        filename_queue = pool.queues['file_name_queue']
+        global_bear_queue = pool.queues['global_bear_queue']
+        message_queue = pool.queues['message_queue']
+        control_queue = pool.queues['control_queue']
+    else:
+        global_bear_queue = processing.Queue()
+        filename_queue = processing.Queue()
+        message_queue = processing.Queue()
+        control_queue = processing.Queue()
+    local_result_dict = ResultBatcher(control_queue)
 
     loaded_local_bears_count = len(local_bear_list)
     local_bear_list[:], global_bear_list[:] = instantiate_bears(
@@ -416,30 +826,23 @@ def instantiate_processes(section,
         console_printer=console_printer,
         debug=debug)
     loaded_valid_local_bears_count = len(local_bear_list)
-    # Note: the complete file dict is given as the file dict to bears and
-    # the whole project is accessible to every bear. However, local bears are
-    # run only for the changed files if caching is enabled.
-
-    # Start tracking all the files
-    if cache and (loaded_valid_local_bears_count == loaded_local_bears_count
-                  and not use_raw_files):
-        cache.track_files(set(complete_filename_list))
-        changed_files = cache.get_uncached_files(
-            set(filename_list)) if cache else filename_list
-
-        # If caching is enabled then the local bears should process only the
-        # changed files.
-        logging.debug("coala is run only on changed files, bears' log "
-                      'messages from previous runs may not appear. You may '
-                      'use the `--flush-cache` flag to see them.')
-        filename_list = changed_files
 
     # Note: the complete file dict is given as the file dict to bears and
     # the whole project is accessible to every bear. However, local bears are
     # run only for the changed files if caching is enabled.
-    file_dict = {filename: complete_file_dict[filename]
-                 for filename in filename_list
-                 if filename in complete_file_dict}
+    file_dict = get_local_file_dict(
+        filename_list,
+        complete_file_dict,
+        cache if (loaded_valid_local_bears_count == loaded_local_bears_count
+                  and not use_raw_files) else None,
+        result_cache)
+    if isinstance(file_dict, FileDict) and (
+            global_bear_list or len(get_bear_groups(local_bear_list)) > 1):
+        # Patches for results of local bears are applied while other bears
+        # may still be running: global bears, and the other tasks of a file
+        # if its bears are split into several ones. So the files local bears
+        # run on are loaded before to give all bears the same contents.
+        file_dict.load()
 
     bear_runner_args = {'file_name_queue': filename_queue,
                         'local_bear_list': local_bear_list,
@@ -447,14 +850,29 @@ def instantiate_processes(section,
                         'global_bear_queue': global_bear_queue,
                         'file_dict': file_dict,
                         'local_result_dict': local_result_dict,
-                        'global_result_dict': global_result_dict,
+                        # Global bears depending on each other are run by
+                        # the same process, so their results are only
+                        # needed there.
+                        'global_result_dict': {},
                         'message_queue': message_queue,
                         'control_queue': control_queue,
                         'timeout': 0.1,
-                        'debug': debug}
-
-    fill_queue(filename_queue, file_dict.keys())
-    fill_queue(global_bear_queue, range(len(global_bear_list)))
+                        'debug': debug,
+                        'result_cache': result_cache}
+
+    # Each process stops when reading None from the queues, so it does not
+    # need to wait for a timeout to notice they are empty.
+    fill_queue(filename_queue,
+               chain(get_local_tasks(file_dict.keys(),
+                                     local_bear_list,
+                                     timing_cache),
+                     [None] * job_count))
+    fill_queue(global_bear_queue,
+               chain(get_bear_groups(global_bear_list),
+                     [None] * job_count))
+
+    if pool is not None:
+        return pool.run(job_count, bear_runner_args), bear_runner_args
 
     return ([processing.Process(target=run, kwargs=bear_runner_args)
              for i in range(job_count)],
@@ -477,6 +895,85 @@ def get_ignore_scope(line, keyword):
         return list(StringConverter(toignore, list_delimiters=', '))
 
 
+def get_ignore_lines(file):
+    """
+    Scans a file for ignore comments.
+
+    >>> get_ignore_lines(['x = 1  # noqa\\n', 'y = 2\\n', 'z = 3\\n'])
+    [([], 1, 2)]
+    >>> get_ignore_lines(['# Start ignoring PEP8Bear, Py*\\n', 'y = 2\\n'])
+    [(['pep8bear', 'py*'], 1, 2)]
+
+    :param file: The lines of the file.
+    :return:     A list of tuples, each containing the lower cased names or
+                 globs of the affected bears, and the first and the last line
+                 to ignore.
+    """
+    ignore_lines = []
+    start = None
+    bears = []
+    stop_ignoring = False
+
+    for line_number, line in enumerate(file, start=1):
+        # Before lowering all lines ever read, first look for the biggest
+        # common substring, case sensitive: I*gnor*e, start i*gnor*ing,
+        # N*oqa*.
+        if 'gnor' in line or 'oqa' in line:
+            line = line.lower()
+            if 'start ignoring ' in line:
+                start = line_number
+                bears = get_ignore_scope(line, 'start ignoring ')
+            elif 'stop ignoring' in line:
+                stop_ignoring = True
+                if start:
+                    ignore_lines.append((bears, start, line_number))
+
+            else:
+                for ignore_stmt in ['ignore ', 'noqa ', 'noqa']:
+                    if ignore_stmt in line:
+                        ignore_lines.append(
+                            (get_ignore_scope(line, ignore_stmt),
+                             line_number,
+                             min(line_number + 1, len(file))))
+                        break
+
+    if stop_ignoring is False and start is not None:
+        ignore_lines.append((bears, start, len(file)))
+
+    return ignore_lines
+
+
+def get_file_ignore_ranges(filename, file, cache=None):
+    """
+    Gets the ranges of a file to ignore.
+
+    :param filename: The name of the file.
+    :param file:     The lines of the file.
+    :param cache:    A ``misc.Caching.FileCache`` remembering the ignore
+                     comments of the files by a digest of their contents, so
+                     unchanged files are not scanned again, or ``None``.
+    :return:         A list of tuples of affected bears and a SourceRange
+                     that shall be ignored for those, see
+                     ``yield_ignore_ranges``.
+    """
+    if cache is None:
+        ignore_lines = get_ignore_lines(file)
+    else:
+        digest = hash_contents(file)
+        ignore_lines = cache.get_ignore_lines(filename, digest)
+        if ignore_lines is None:
+            ignore_lines = get_ignore_lines(file)
+            cache.set_ignore_lines(filename, digest, ignore_lines)
+
+    return [(bears,
+             SourceRange.from_values(filename,
+                                     start_line,
+                                     1,
+                                     end_line,
+                                     len(file[end_line-1])))
+            for bears, start_line, end_line in ignore_lines]
+
+
 def yield_ignore_ranges(file_dict):
     """
     Yields tuples of affected bears and a SourceRange that shall be ignored for
@@ -485,52 +982,11 @@ def yield_ignore_ranges(file_dict):
     :param file_dict: The file dictionary.
     """
     for filename, file in file_dict.items():
-        start = None
-        bears = []
-        stop_ignoring = False
-
         # Do not process raw files
         if file is None:
             continue
 
-        for line_number, line in enumerate(file, start=1):
-            # Before lowering all lines ever read, first look for the biggest
-            # common substring, case sensitive: I*gnor*e, start i*gnor*ing,
-            # N*oqa*.
-            if 'gnor' in line or 'oqa' in line:
-                line = line.lower()
-                if 'start ignoring ' in line:
-                    start = line_number
-                    bears = get_ignore_scope(line, 'start ignoring ')
-                elif 'stop ignoring' in line:
-                    stop_ignoring = True
-                    if start:
-                        yield (bears,
-                               SourceRange.from_values(
-                                   filename,
-                                   start,
-                                   1,
-                                   line_number,
-                                   len(file[line_number-1])))
-
-                else:
-                    for ignore_stmt in ['ignore ', 'noqa ', 'noqa']:
-                        if ignore_stmt in line:
-                            end_line = min(line_number + 1, len(file))
-                            yield (get_ignore_scope(line, ignore_stmt),
-                                   SourceRange.from_values(
-                                       filename,
-                                       line_number, 1,
-                                       end_line, len(file[end_line-1])))
-                            break
-
-        if stop_ignoring is False and start is not None:
-            yield (bears,
-                   SourceRange.from_values(filename,
-                                           start,
-                                           1,
-                                           len(file),
-                                           len(file[-1])))
+        yield from get_file_ignore_ranges(filename, file)
 
 
 def get_file_list(results):
@@ -557,7 +1013,8 @@ def process_queues(processes,
                    console_printer,
                    debug=False,
                    apply_single=False,
-                   debug_bears=False):
+                   debug_bears=False,
+                   timing_cache=None):
     """
     Iterate the control queue and send the results received to the print_result
     method so that they can be presented to the user.
@@ -565,16 +1022,14 @@ def process_queues(processes,
     :param processes:          List of processes which can be used to run
                                Bears.
     :param control_queue:      Containing control elements that indicate
-                               whether there is a result available and which
-                               bear it belongs to.
-    :param local_result_dict:  Dictionary containing results respective to
-                               local bears. It is modified by the processes
-                               i.e. results are added to it by multiple
-                               processes.
-    :param global_result_dict: Dictionary containing results respective to
-                               global bears. It is modified by the processes
-                               i.e. results are added to it by multiple
-                               processes.
+                               whether there are results available, together
+                               with the results and the files or bears they
+                               belong to.
+    :param local_result_dict:  Dictionary the results respective to local
+                               bears are stored in with the filename as key.
+    :param global_result_dict: Dictionary the results respective to global
+                               bears are stored in with the bear name as
+                               key.
     :param file_dict:          Dictionary containing file contents with
                                filename as keys.
     :param print_results:      Prints all given results appropriate to the
@@ -586,10 +1041,46 @@ def process_queues(processes,
     :param apply_single:       The action that should be applied for all
                                results. If it's not selected, has a value of
                                False.
+    :param timing_cache:       A ``misc.Caching.TimingCache`` to add the time
+                               the local bears took to.
     :return:                   Return True if all bears execute successfully and
                                Results were delivered to the user. Else False.
     """
-    file_diff_dict = {}
+    # The patched files are written once, after all results were processed.
+    file_diff_dict = DeferredFileDiffDict()
+    try:
+        return _process_queues(processes,
+                               control_queue,
+                               local_result_dict,
+                               global_result_dict,
+                               file_dict,
+                               print_results,
+                               section,
+                               cache,
+                               console_printer,
+                               debug,
+                               apply_single,
+                               debug_bears,
+                               timing_cache,
+                               file_diff_dict)
+    finally:
+        file_diff_dict.write()
+
+
+def _process_queues(processes,
+                    control_queue,
+                    local_result_dict,
+                    global_result_dict,
+                    file_dict,
+                    print_results,
+                    section,
+                    cache,
+                    console_printer,
+                    debug,
+                    apply_single,
+                    debug_bears,
+                    timing_cache,
+                    file_diff_dict):
     retval = False
     # Number of processes working on local/global bears. They are count down
     # when the last queue element of that process is processed which may be
@@ -598,7 +1089,8 @@ def process_queues(processes,
     global_processes = len(processes)
     global_result_buffer = []
     result_files = set()
-    ignore_ranges = list(yield_ignore_ranges(file_dict))
+    # Only the files results are yielded for are scanned for ignore comments.
+    ignore_ranges = IgnoreRangeIndex(file_dict=file_dict, cache=cache)
 
     # One process is the logger thread (if not in debug mode)
     while local_processes > (1 if not (debug or debug_bears) else 0):
@@ -607,23 +1099,27 @@ def process_queues(processes,
 
             if control_elem == CONTROL_ELEMENT.LOCAL_FINISHED:
                 local_processes -= 1
+                if timing_cache is not None and index:
+                    timing_cache.add(index)
             elif control_elem == CONTROL_ELEMENT.GLOBAL_FINISHED:
                 global_processes -= 1
             elif control_elem == CONTROL_ELEMENT.LOCAL:
                 assert local_processes != 0
-                result_files.update(get_file_list(local_result_dict[index]))
-                retval, res = print_result(local_result_dict[index],
-                                           file_dict,
-                                           retval,
-                                           print_results,
-                                           section,
-                                           None,
-                                           file_diff_dict,
-                                           ignore_ranges,
-                                           console_printer=console_printer,
-                                           apply_single=apply_single
-                                           )
-                local_result_dict[index] = res
+                for filename, results in index:
+                    result_files.update(get_file_list(results))
+                    retval, res = print_result(results,
+                                               file_dict,
+                                               retval,
+                                               print_results,
+                                               section,
+                                               None,
+                                               file_diff_dict,
+                                               ignore_ranges,
+                                               console_printer=console_printer,
+                                               apply_single=apply_single
+                                               )
+                    # The bears of a file may run in different tasks
+                    local_result_dict.setdefault(filename, []).extend(res)
             else:
                 assert control_elem == CONTROL_ELEMENT.GLOBAL
                 global_result_buffer.append(index)
@@ -634,9 +1130,9 @@ def process_queues(processes,
                 break
 
     # Flush global result buffer
-    for elem in global_result_buffer:
-        result_files.update(get_file_list(global_result_dict[elem]))
-        retval, res = print_result(global_result_dict[elem],
+    for elem, results in global_result_buffer:
+        result_files.update(get_file_list(results))
+        retval, res = print_result(results,
                                    file_dict,
                                    retval,
                                    print_results,
@@ -654,8 +1150,9 @@ def process_queues(processes,
             control_elem, index = control_queue.get(timeout=0.1)
 
             if control_elem == CONTROL_ELEMENT.GLOBAL:
-                result_files.update(get_file_list(global_result_dict[index]))
-                retval, res = print_result(global_result_dict[index],
+                bearname, results = index
+                result_files.update(get_file_list(results))
+                retval, res = print_result(results,
                                            file_dict,
                                            retval,
                                            print_results,
@@ -665,7 +1162,7 @@ def process_queues(processes,
                                            ignore_ranges,
                                            console_printer,
                                            apply_single)
-                global_result_dict[index] = res
+                global_result_dict[bearname] = res
             else:
                 assert control_elem == CONTROL_ELEMENT.GLOBAL_FINISHED
                 global_processes -= 1
@@ -716,9 +1213,12 @@ def execute_section(section,
                     log_printer,
                     console_printer,
                     debug=False,
-                    apply_single=False):
+                    apply_single=False,
+                    result_cache=None,
+                    pool=None,
+                    timing_cache=None):
     # type: (object, object, object, object, object, object, object, object,
-    # object) -> object
+    # object, object, object, object) -> object
     """
     Executes the section with the given bears.
 
@@ -746,12 +1246,19 @@ def execute_section(section,
                              not catching any exceptions.
     :param apply_single:     The action that should be applied for all results.
                              If it's not selected, has a value of False.
+    :param result_cache:     An instance of ``misc.Caching.ResultCache`` to
+                             replay and store results of local bears.
+    :param pool:             A ``ProcessPool`` to run the bears in instead of
+                             starting processes for this section. It is not
+                             used in debug mode.
+    :param timing_cache:     A ``misc.Caching.TimingCache`` to order the tasks
+                             of local bears with and to add the time they
+                             took to.
     :return:                 Tuple containing a bool (True if results were
-                             yielded, False otherwise), a Manager.dict
-                             containing all local results(filenames are key)
-                             and a Manager.dict containing all global bear
-                             results (bear names are key) as well as the
-                             file dictionary.
+                             yielded, False otherwise), a dict containing
+                             all local results (filenames are key) and a
+                             dict containing all global bear results (bear
+                             names are key) as well as the file dictionary.
     """
     debug_bears = (False
                    if 'debug_bears' not in section or (
@@ -760,6 +1267,7 @@ def execute_section(section,
 
     if debug or debug_bears:
         running_processes = 1
+        pool = None
     else:
         try:
             running_processes = int(section['jobs'])
@@ -770,22 +1278,10 @@ def execute_section(section,
         except IndexError:
             running_processes = get_cpu_count()
 
-    bears = global_bear_list + local_bear_list
-    use_raw_files = set(bear.USE_RAW_FILES for bear in bears)
-
-    if len(use_raw_files) > 1:
-        logging.error("Bears that uses raw files can't be mixed with Bears "
-                      'that uses text files. Please move the following bears '
-                      'to their own section: ' +
-                      ', '.join(bear.name for bear in bears
-                                if not bear.USE_RAW_FILES))
+    use_raw_files = get_use_raw_files(global_bear_list + local_bear_list)
+    if use_raw_files is None:
         return ((), {}, {}, {})
 
-    # use_raw_files is expected to be only one object.
-    # The if statement is to ensure this doesn't fail when
-    # it's running on an empty run
-    use_raw_files = use_raw_files.pop() if len(use_raw_files) > 0 else False
-
     processes, arg_dict = instantiate_processes(section,
                                                 local_bear_list,
                                                 global_bear_list,
@@ -795,23 +1291,34 @@ def execute_section(section,
                                                 console_printer=console_printer,
                                                 debug=debug,
                                                 use_raw_files=use_raw_files,
-                                                debug_bears=debug_bears)
-
-    logger_thread = LogPrinterThread(arg_dict['message_queue'])
-    # Start and join the logger thread along with the processes to run bears
-    if not (debug or debug_bears):
-        # in debug mode the logging messages are directly processed by the
-        # message_queue
-        processes.append(logger_thread)
+                                                debug_bears=debug_bears,
+                                                result_cache=result_cache,
+                                                pool=pool,
+                                                timing_cache=timing_cache)
+
+    if pool is not None:
+        # The processes of the pool are already running
+        logger_thread = pool.logger_thread
+        processes = processes + [logger_thread]
+    else:
+        logger_thread = LogPrinterThread(arg_dict['message_queue'])
+        # Start and join the logger thread along with the processes to run
+        # bears
+        if not (debug or debug_bears):
+            # in debug mode the logging messages are directly processed by the
+            # message_queue
+            processes.append(logger_thread)
 
-    for runner in processes:
-        runner.start()
+        for runner in processes:
+            runner.start()
 
+    local_result_dict = {}
+    global_result_dict = {}
     try:
         return (process_queues(processes,
                                arg_dict['control_queue'],
-                               arg_dict['local_result_dict'],
-                               arg_dict['global_result_dict'],
+                               local_result_dict,
+                               global_result_dict,
                                arg_dict['file_dict'],
                                print_results,
                                section,
@@ -820,18 +1327,23 @@ def execute_section(section,
                                console_printer=console_printer,
                                debug=debug,
                                apply_single=apply_single,
-                               debug_bears=debug_bears),
-                arg_dict['local_result_dict'],
-                arg_dict['global_result_dict'],
+                               debug_bears=debug_bears,
+                               timing_cache=timing_cache),
+                local_result_dict,
+                global_result_dict,
                 arg_dict['file_dict'])
     finally:
-        if not (debug or debug_bears):
+        # The pool stops its processes when it is closed
+        if pool is None and not (debug or debug_bears):
             # in debug mode multiprocessing and logger_thread are disabled
             # ==> no need for following actions
-            logger_thread.running = False
-
             for runner in processes:
-                runner.join()
+                if runner is not logger_thread:
+                    runner.join()
+
+            # The logger thread stops after printing all messages left
+            arg_dict['message_queue'].put(None)
+            logger_thread.join()
 
 
 class FileDict(dict):
@@ -839,11 +1351,47 @@ class FileDict(dict):
     Acts as a middleware to provide the bears with the
     actual file contents instead of the `File`
     objects.
+
+    The lines of a file are read when they are accessed for the first time,
+    so files no bear looks at are never read. Values that are no ``File``
+    objects (e.g. ``None`` for raw files) are returned as they are.
     """
 
+    @staticmethod
+    def _lines(val):
+        return val.lines if isinstance(val, File) else val
+
     def __getitem__(self, key):
-        val = super().__getitem__(key)
-        if val is None:
-            return val
-        else:
-            return val.lines
+        return self._lines(super().__getitem__(key))
+
+    def get(self, key, default=None):
+        return self[key] if key in self else default
+
+    def items(self):
+        return ItemsView(self)
+
+    def values(self):
+        return ValuesView(self)
+
+    def load(self):
+        """
+        Reads the lines of all files that are not loaded yet.
+        """
+        for _ in self.values():
+            pass
+
+    def __reduce__(self):
+        # Pickle the File objects instead of reading their lines
+        return FileDict, (list(super().items()),)
+
+    def subset(self, keys):
+        """
+        Creates a ``FileDict`` holding only the given keys, without reading
+        any files.
+
+        :param keys: The keys to keep. Keys that are not in this dict are
+                     ignored.
+        :return:     A new ``FileDict``.
+        """
+        return FileDict((key, super(FileDict, self).__getitem__(key))
+                        for key in keys if key in self)
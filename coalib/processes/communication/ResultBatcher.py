@@ -0,0 +1,71 @@
+import time
+
+from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
+
+
+class ResultBatcher:
+    """
+    Sends the results of local bears from a bear process to the main process
+    in batches.
+
+    Results are stored like in a dictionary with the filename as key. Instead
+    of keeping them, they are collected and put into the control queue
+    together as ``(CONTROL_ELEMENT.LOCAL, [(filename, results), ...])``, so
+    they are pickled once per batch and not sent through a manager process.
+
+    >>> import queue
+    >>> control_queue = queue.Queue()
+    >>> batcher = ResultBatcher(control_queue, max_results=2)
+    >>> batcher['a.py'] = ['first result']
+    >>> control_queue.empty()
+    True
+    >>> batcher['b.py'] = ['second result']
+    >>> control_elem, batch = control_queue.get()
+    >>> control_elem == CONTROL_ELEMENT.LOCAL
+    True
+    >>> batch
+    [('a.py', ['first result']), ('b.py', ['second result'])]
+
+    Remaining results are sent when flushing:
+
+    >>> batcher['c.py'] = []
+    >>> batcher.flush()
+    >>> control_queue.get()[1]
+    [('c.py', [])]
+    """
+
+    def __init__(self, control_queue, max_results=1000, max_delay=0.1):
+        """
+        :param control_queue: The queue (write) to put the batches into.
+        :param max_results:   The number of results after which a batch is
+                              sent.
+        :param max_delay:     The number of seconds after which a batch is
+                              sent once more results arrive, so results are
+                              shown without waiting for the whole batch.
+        """
+        self.control_queue = control_queue
+        self.max_results = max_results
+        self.max_delay = max_delay
+        self.batch = []
+        self.result_count = 0
+        self.batch_start = None
+
+    def __setitem__(self, filename, results):
+        if not self.batch:
+            self.batch_start = time.monotonic()
+
+        self.batch.append((filename, results))
+        self.result_count += len(results)
+
+        if (self.result_count >= self.max_results or
+                time.monotonic() - self.batch_start >= self.max_delay):
+            self.flush()
+
+    def flush(self):
+        """
+        Sends all collected results.
+        """
+        if self.batch:
+            self.control_queue.put((CONTROL_ELEMENT.LOCAL, self.batch))
+            self.batch = []
+            self.result_count = 0
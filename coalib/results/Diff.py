@@ -1,3 +1,4 @@
+from bisect import insort
 import copy
 import difflib
 import logging
@@ -5,6 +6,7 @@ import logging
 from unidiff import PatchSet
 
 from coalib.results.LineDiff import LineDiff, ConflictError
+from coalib.results.PatienceDiff import get_opcodes
 from coalib.results.SourceRange import SourceRange
 from coalib.results.TextRange import TextRange
 from coala_utils.decorators import enforce_signature, generate_eq
@@ -14,30 +16,50 @@ from coala_utils.decorators import enforce_signature, generate_eq
 class Diff:
     """
     A Diff result represents a difference for one file.
+
+    The changes are kept per line of the original file, together with the
+    sorted numbers of the changed lines, so the unchanged lines in between
+    can be copied in slices. The original file is shared with other diffs of
+    it instead of being copied, and changes are copied before they are
+    modified, so diffs can share them as well.
     """
 
+    # The original and the modified file with linebreaks, computed when they
+    # are needed. They are not pickled.
+    _original_cache = None
+    _modified_cache = None
+
     def __init__(self, file_list, rename=False, delete=False):
         """
         Creates an empty diff for the given file.
 
         :param file_list: The original (unmodified) file as a list of its
-                          lines.
+                          lines. A tuple is used as it is, without copying.
         :param rename:    False or str containing new name of file.
         :param delete:    True if file is set to be deleted.
         """
         self._changes = {}
-        self._file = list(file_list)
-        self._original = self._generate_linebreaks(self._file)
+        # The keys of ``_changes`` in ascending order.
+        self._change_lines = []
+        self._file = (file_list if isinstance(file_list, tuple)
+                      else tuple(file_list))
         self.rename = rename
         self.delete = delete
 
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_original_cache', None)
+        state.pop('_modified_cache', None)
+        return state
+
     @classmethod
     def from_string_arrays(cls, file_array_1, file_array_2, rename=False):
         """
         Creates a Diff object from two arrays containing strings.
 
         If this Diff is applied to the original array, the second array will be
-        created.
+        created. The differences are computed with
+        ``coalib.results.PatienceDiff``.
 
         :param file_array_1: Original array
         :param file_array_2: Array to compare
@@ -45,29 +67,27 @@ class Diff:
         """
         result = cls(file_array_1, rename=rename)
 
-        matcher = difflib.SequenceMatcher(None, file_array_1, file_array_2)
-        # We use this because its faster (generator) and doesn't yield as much
-        # useless information as get_opcodes.
-        for change_group in matcher.get_grouped_opcodes(1):
-            for (tag,
-                 a_index_1,
-                 a_index_2,
-                 b_index_1,
-                 b_index_2) in change_group:
-                if tag == 'delete':
-                    for index in range(a_index_1+1, a_index_2+1):
-                        result.delete_line(index)
-                elif tag == 'insert':
-                    # We add after line, they add before, so dont add 1 here
-                    result.add_lines(a_index_1,
-                                     file_array_2[b_index_1:b_index_2])
-                elif tag == 'replace':
-                    result.modify_line(a_index_1+1,
-                                       file_array_2[b_index_1])
-                    result.add_lines(a_index_1+1,
-                                     file_array_2[b_index_1+1:b_index_2])
-                    for index in range(a_index_1+2, a_index_2+1):
-                        result.delete_line(index)
+        # The patience diff is much faster than ``difflib`` on large files
+        # with many repeated lines.
+        for (tag,
+             a_index_1,
+             a_index_2,
+             b_index_1,
+             b_index_2) in get_opcodes(file_array_1, file_array_2):
+            if tag == 'delete':
+                for index in range(a_index_1+1, a_index_2+1):
+                    result.delete_line(index)
+            elif tag == 'insert':
+                # We add after line, they add before, so dont add 1 here
+                result.add_lines(a_index_1,
+                                 file_array_2[b_index_1:b_index_2])
+            elif tag == 'replace':
+                result.modify_line(a_index_1+1,
+                                   file_array_2[b_index_1])
+                result.add_lines(a_index_1+1,
+                                 file_array_2[b_index_1+1:b_index_2])
+                for index in range(a_index_1+2, a_index_2+1):
+                    result.delete_line(index)
 
         return result
 
@@ -156,12 +176,24 @@ class Diff:
         return diff
 
     def _get_change(self, line_nr, min_line=1):
+        """
+        Returns a copy of the change of the given line, which may be shared
+        with other diffs. Store it with ``_set_change()`` after modifying it.
+        """
         if not isinstance(line_nr, int):
             raise TypeError('line_nr needs to be an integer.')
         if line_nr < min_line:
             raise IndexError('The given line number is not allowed.')
 
-        return self._changes.get(line_nr, LineDiff())
+        if line_nr in self._changes:
+            return copy.copy(self._changes[line_nr])
+        return LineDiff()
+
+    def _set_change(self, line_nr, linediff):
+        if line_nr not in self._changes:
+            insort(self._change_lines, line_nr)
+        self._changes[line_nr] = linediff
+        self._modified_cache = None
 
     def stats(self):
         """
@@ -214,13 +246,16 @@ class Diff:
         :param delete: True if file is set to be deleted, False otherwise.
         """
         self._delete = delete
+        self._modified_cache = None
 
     @property
     def original(self):
         """
         Retrieves the original file.
         """
-        return self._original
+        if self._original_cache is None:
+            self._original_cache = self._generate_linebreaks(self._file)
+        return self._original_cache
 
     def _raw_modified(self):
         """
@@ -235,7 +270,7 @@ class Diff:
 
         # Note that line_nr counts from _1_ although 0 is possible when
         # inserting lines before everything
-        for line_nr in sorted(self._changes):
+        for line_nr in self._change_lines:
             result.extend(self._file[current_line:max(line_nr-1, 0)])
             linediff = self._changes[line_nr]
             if not linediff.delete and not linediff.change and line_nr > 0:
@@ -261,7 +296,16 @@ class Diff:
         If no newline was present at the end of file before, this state will
         be preserved, except if the last line is deleted.
         """
-        return self._generate_linebreaks(self._raw_modified())
+        return list(self._get_modified())
+
+    def _get_modified(self):
+        """
+        Returns the cached result of ``modified``, which must not be changed.
+        """
+        if self._modified_cache is None:
+            self._modified_cache = self._generate_linebreaks(
+                self._raw_modified())
+        return self._modified_cache
 
     @property
     def unified_diff(self):
@@ -344,14 +388,14 @@ class Diff:
 
         last_line = -1
         this_diff = Diff(self._file, rename=self.rename, delete=self.delete)
-        for line in sorted(self._changes.keys()):
+        for line in self._change_lines:
             if line > last_line + distance + 1 and len(this_diff._changes) > 0:
                 yield this_diff
                 this_diff = Diff(self._file, rename=self.rename,
                                  delete=self.delete)
 
             last_line = line
-            this_diff._changes[line] = self._changes[line]
+            this_diff._set_change(line, self._changes[line])
 
         # If the diff contains no line changes, the loop above will not be run
         # else, this_diff will never be empty and thus this has to be yielded
@@ -378,8 +422,8 @@ class Diff:
         if len(self._changes) == 0:
             return SourceRange.from_values(filename)
 
-        start = min(self._changes.keys())
-        end = max(self._changes.keys())
+        start = self._change_lines[0]
+        end = self._change_lines[-1]
         return SourceRange.from_values(filename,
                                        start_line=max(1, start),
                                        end_line=max(1, end))
@@ -396,12 +440,25 @@ class Diff:
                                                          other.rename):
             raise ConflictError('Diffs contain conflicting renamings.')
 
-        result = copy.deepcopy(self)
+        # The changes are shared, see ``_get_change()``.
+        result = copy.copy(self)
+        result._changes = dict(self._changes)
+        result._change_lines = list(self._change_lines)
         result.rename = self.rename or other.rename
         result.delete = self.delete or other.delete
 
-        for line_nr in other._changes:
+        # Changes of lines this diff does not change are taken over as they
+        # are if both diffs are of the same file, the sorted line numbers are
+        # merged at once then.
+        same_file = other._file is self._file or other._file == self._file
+        new_lines = []
+        for line_nr in other._change_lines:
             change = other._changes[line_nr]
+            if same_file and line_nr not in result._changes:
+                result._changes[line_nr] = change
+                new_lines.append(line_nr)
+                continue
+
             if change.delete is True:
                 result.delete_line(line_nr)
             if change.add_after is not False:
@@ -409,6 +466,9 @@ class Diff:
             if change.change is not False:
                 result.modify_line(line_nr, change.change[1])
 
+        if new_lines:
+            # Both lists are sorted, which makes sorting them linear.
+            result._change_lines = sorted(result._change_lines + new_lines)
         return result
 
     def __bool__(self):
@@ -426,7 +486,8 @@ class Diff:
         """
         return (self.rename is not False or
                 self.delete is True or
-                self.modified != self.original)
+                (bool(self._changes) and
+                 self._get_modified() != self.original))
 
     def delete_line(self, line_nr):
         """
@@ -439,7 +500,7 @@ class Diff:
 
         linediff = self._get_change(line_nr)
         linediff.delete = True
-        self._changes[line_nr] = linediff
+        self._set_change(line_nr, linediff)
 
     def delete_lines(self, line_nr_start, line_nr_end):
         """
@@ -468,7 +529,7 @@ class Diff:
                                 'there are already lines.')
 
         linediff.add_after = lines
-        self._changes[line_nr_before] = linediff
+        self._set_change(line_nr_before, linediff)
 
     def add_line(self, line_nr_before, line):
         """
@@ -525,7 +586,7 @@ class Diff:
             replacement = ''.join((orig_diff + new_diff)._raw_modified())
 
         linediff.change = (self._file[line_nr-1], replacement)
-        self._changes[line_nr] = linediff
+        self._set_change(line_nr, linediff)
 
     def change_line(self, line_nr, original_line, replacement):
         logging.debug('Use of change_line method is deprecated. Instead '
@@ -635,7 +696,7 @@ class Diff:
         :param lines: A list of strings, representing lines.
         """
 
-        if lines == []:
+        if not lines:
             return []
 
         return Diff._add_linebreaks(lines[:-1]) + [lines[-1]]
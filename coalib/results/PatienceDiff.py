@@ -0,0 +1,248 @@
+"""
+Computes the differences between two sequences, usually the lines of two
+versions of a file, with the patience diff algorithm.
+
+Unlike ``difflib.SequenceMatcher``, which takes quadratic time on large
+files with many repeated lines, the sequences are split at elements that
+occur exactly once in both of them. Regions without such elements are
+compared with Myers' O(ND) algorithm, in linear space. Common prefixes and
+suffixes are matched right away.
+
+As the O(ND) algorithm is quadratic on ranges that differ completely, like
+reindented or reordered files, it gives up once the edit script gets too
+long, like the "too expensive" heuristic of git, and the whole range is
+replaced.
+"""
+
+from bisect import bisect_left
+from math import sqrt
+
+# The search for a middle snake gives up after as many steps as the square
+# root of the size of the ranges, but not before ``MIN_MAX_COST`` steps. This
+# keeps the time it takes about linear in the size.
+MIN_MAX_COST = 64
+
+
+def _match_prefix_and_suffix(a, alo, ahi, b, blo, bhi, blocks):
+    """
+    Matches the common prefix and suffix of two ranges of the sequences.
+
+    :return: The ranges without the matched elements, and the size of the
+             matched suffix.
+    """
+    start = alo
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        alo += 1
+        blo += 1
+    if alo > start:
+        blocks.append((start, blo - (alo - start), alo - start))
+
+    suffix = 0
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+        suffix += 1
+
+    return alo, ahi, blo, bhi, suffix
+
+
+def _get_unique_anchors(a, alo, ahi, b, blo, bhi):
+    """
+    Finds the longest increasing sequence of pairs of indices of elements
+    that occur exactly once in both ranges, using patience sorting.
+
+    :return: A list of pairs of indices into ``a`` and ``b``.
+    """
+    counts = {}
+    for index in range(alo, ahi):
+        line = a[index]
+        counts[line] = index if line not in counts else None
+    b_indices = {}
+    for index in range(blo, bhi):
+        line = b[index]
+        if counts.get(line) is not None:
+            b_indices[line] = index if line not in b_indices else None
+
+    pairs = sorted((counts[line], index)
+                   for line, index in b_indices.items()
+                   if index is not None)
+    if not pairs:
+        return []
+
+    # The last b indices of the piles and the pairs on top of them, each
+    # pair links to the top of the previous pile when it was put down.
+    pile_tops = []
+    top_pairs = []
+    links = []
+    for number, (_, b_index) in enumerate(pairs):
+        pile = bisect_left(pile_tops, b_index)
+        links.append(top_pairs[pile - 1] if pile else None)
+        if pile == len(pile_tops):
+            pile_tops.append(b_index)
+            top_pairs.append(number)
+        else:
+            pile_tops[pile] = b_index
+            top_pairs[pile] = number
+
+    anchors = []
+    number = top_pairs[-1]
+    while number is not None:
+        anchors.append(pairs[number])
+        number = links[number]
+    anchors.reverse()
+    return anchors
+
+
+def _find_middle_snake(a, alo, ahi, b, blo, bhi, max_cost):
+    """
+    Finds the middle snake of a shortest edit script of the two ranges with
+    the linear space variant of Myers' algorithm.
+
+    :param max_cost: The maximum number of steps to take from both ends.
+    :return:         The start and the end of the snake in ``a`` and ``b``,
+                     relative to the start of the ranges, or ``None`` if it
+                     was not found within ``max_cost`` steps.
+    """
+    n = ahi - alo
+    m = bhi - blo
+    delta = n - m
+    odd = delta & 1
+    max_d = min((n + m + 1) // 2, max_cost)
+    offset = max_d + 1
+    forward = [0] * (2 * offset + 1)
+    backward = [0] * (2 * offset + 1)
+
+    for d in range(max_d + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and
+                           forward[offset + k - 1] < forward[offset + k + 1]):
+                x = forward[offset + k + 1]
+            else:
+                x = forward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[offset + k] = x
+            if (odd and delta - d < k < delta + d and
+                    x + backward[offset + delta - k] >= n):
+                return start_x, start_y, x, y
+
+        # The backward paths run from the ends of the ranges.
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and
+                           backward[offset + k - 1] <
+                           backward[offset + k + 1]):
+                x = backward[offset + k + 1]
+            else:
+                x = backward[offset + k - 1] + 1
+            y = x - k
+            start_x, start_y = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            backward[offset + k] = x
+            if (not odd and -d <= delta - k <= d and
+                    x + forward[offset + delta - k] >= n):
+                return n - x, m - y, n - start_x, m - start_y
+
+    return None
+
+
+def _match(a, alo, ahi, b, blo, bhi, blocks, use_anchors=True):
+    """
+    Appends the matching blocks of two ranges of the sequences to
+    ``blocks``, ordered by their indices.
+    """
+    alo, ahi, blo, bhi, suffix = _match_prefix_and_suffix(
+        a, alo, ahi, b, blo, bhi, blocks)
+
+    if alo < ahi and blo < bhi:
+        anchors = (_get_unique_anchors(a, alo, ahi, b, blo, bhi)
+                   if use_anchors else [])
+        if anchors:
+            for a_index, b_index in anchors:
+                _match(a, alo, a_index, b, blo, b_index, blocks)
+                blocks.append((a_index, b_index, 1))
+                alo, blo = a_index + 1, b_index + 1
+            _match(a, alo, ahi, b, blo, bhi, blocks)
+        else:
+            max_cost = max(MIN_MAX_COST, int(sqrt(ahi - alo + bhi - blo)))
+            snake = _find_middle_snake(a, alo, ahi, b, blo, bhi, max_cost)
+            # Without a snake the ranges are replaced as a whole. Otherwise,
+            # as the prefixes and suffixes differ, it splits the ranges into
+            # two smaller ones.
+            if snake is not None:
+                x, y, u, v = snake
+                _match(a, alo, alo + x, b, blo, blo + y, blocks, False)
+                if u > x:
+                    blocks.append((alo + x, blo + y, u - x))
+                _match(a, alo + u, ahi, b, blo + v, bhi, blocks, False)
+
+    if suffix:
+        blocks.append((ahi, bhi, suffix))
+
+
+def get_matching_blocks(a, b):
+    """
+    Finds the matching blocks of two sequences.
+
+    >>> get_matching_blocks('abxcd', 'abcyd')
+    [(0, 0, 2), (3, 2, 1), (4, 4, 1)]
+
+    :param a: The first sequence.
+    :param b: The second sequence. The elements of both sequences have to be
+              hashable.
+    :return:  A list of tuples ``(i, j, size)``, meaning that
+              ``a[i:i+size] == b[j:j+size]``, ordered by ``i`` and ``j``.
+              Adjacent blocks are merged.
+    """
+    blocks = []
+    _match(a, 0, len(a), b, 0, len(b), blocks)
+
+    merged = []
+    for i, j, size in blocks:
+        if merged:
+            last_i, last_j, last_size = merged[-1]
+            if last_i + last_size == i and last_j + last_size == j:
+                merged[-1] = last_i, last_j, last_size + size
+                continue
+        merged.append((i, j, size))
+    return merged
+
+
+def get_opcodes(a, b):
+    """
+    Describes how to turn one sequence into another, like
+    ``difflib.SequenceMatcher.get_opcodes()``.
+
+    >>> for opcode in get_opcodes(['a', 'b', 'c', 'd'], ['b', 'x', 'd', 'e']):
+    ...     print(opcode)
+    ('delete', 0, 1, 0, 0)
+    ('equal', 1, 2, 0, 1)
+    ('replace', 2, 3, 1, 2)
+    ('equal', 3, 4, 2, 3)
+    ('insert', 4, 4, 3, 4)
+
+    :param a: The first sequence.
+    :param b: The second sequence.
+    :return:  A list of tuples ``(tag, i1, i2, j1, j2)``, where ``tag`` is
+              ``'equal'``, ``'replace'``, ``'delete'`` or ``'insert'``,
+              meaning what to do with ``a[i1:i2]`` to get ``b[j1:j2]``.
+    """
+    opcodes = []
+    i = j = 0
+    for block_i, block_j, size in get_matching_blocks(a, b) + [
+            (len(a), len(b), 0)]:
+        if i < block_i and j < block_j:
+            opcodes.append(('replace', i, block_i, j, block_j))
+        elif i < block_i:
+            opcodes.append(('delete', i, block_i, j, j))
+        elif j < block_j:
+            opcodes.append(('insert', i, i, j, block_j))
+        if size:
+            opcodes.append(('equal', block_i, block_i + size,
+                            block_j, block_j + size))
+        i, j = block_i + size, block_j + size
+    return opcodes
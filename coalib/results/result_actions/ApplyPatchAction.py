@@ -1,4 +1,6 @@
+import os
 import shutil
+import tempfile
 from os.path import isfile
 from os import remove
 
@@ -8,6 +10,78 @@ from coalib.results.result_actions.ShowPatchAction import ShowPatchAction
 from coalib.results.result_actions.ResultAction import ResultAction
 
 
+def write_patched_file(diff, pre_patch_filename):
+    """
+    Writes the modified contents of a diff to the disk. The contents are
+    written to a temporary file first that replaces the file then, so the
+    file is never left half written.
+
+    :param diff:               The diff from the original contents of the
+                               file, which may rename or delete it.
+    :param pre_patch_filename: The name of the file on the disk.
+    """
+    if not diff.delete:
+        new_filename = (diff.rename
+                        if diff.rename is not False
+                        else pre_patch_filename)
+        encoding = (detect_encoding(pre_patch_filename)
+                    if isfile(pre_patch_filename) else 'utf-8')
+        directory, basename = os.path.split(os.path.abspath(new_filename))
+        handle, temp_filename = tempfile.mkstemp(prefix='.' + basename + '.',
+                                                 dir=directory)
+        try:
+            with open(handle, mode='w', encoding=encoding) as file:
+                file.writelines(diff.modified)
+            if isfile(pre_patch_filename):
+                shutil.copymode(pre_patch_filename, temp_filename)
+            os.replace(temp_filename, new_filename)
+        except BaseException:
+            remove(temp_filename)
+            raise
+
+    if diff.delete or diff.rename:
+        if diff.rename != pre_patch_filename and isfile(pre_patch_filename):
+            remove(pre_patch_filename)
+
+
+class DeferredFileDiffDict(dict):
+    """
+    A file diff dictionary for which ``ApplyPatchAction`` does not write the
+    patched files after every result. The patches applied to a file are
+    collected instead and the file is written once by ``write()``.
+
+    >>> from coalib.results.Diff import Diff
+    >>> from coalib.results.Result import Result
+    >>> file_diff_dict = DeferredFileDiffDict()
+    >>> diff = Diff(['a\\n'])
+    >>> diff.change_line(1, 'a\\n', 'b\\n')
+    >>> _ = ApplyPatchAction().apply(Result('origin', 'msg',
+    ...                                     diffs={'file': diff}),
+    ...                              {'file': ['a\\n']},
+    ...                              file_diff_dict,
+    ...                              no_orig=True)
+    >>> file_diff_dict.pending
+    {'file': 'file'}
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Maps the files with unwritten patches to their names on the disk.
+        self.pending = {}
+
+    def write(self, filenames=None):
+        """
+        Writes the files with pending patches.
+
+        :param filenames: The files to write if they have pending patches,
+                          all files by default.
+        """
+        for filename in (list(self.pending) if filenames is None
+                         else [filename for filename in filenames
+                               if filename in self.pending]):
+            write_patched_file(self[filename], self.pending.pop(filename))
+
+
 class ApplyPatchAction(ResultAction):
 
     SUCCESS_MESSAGE = 'Patch applied successfully.'
@@ -24,6 +98,7 @@ class ApplyPatchAction(ResultAction):
 
         :param no_orig: Whether or not to create .orig backup files
         """
+        deferred = isinstance(file_diff_dict, DeferredFileDiffDict)
         for filename in result.diffs:
             pre_patch_filename = filename
             if filename in file_diff_dict:
@@ -31,6 +106,9 @@ class ApplyPatchAction(ResultAction):
                 pre_patch_filename = (diff.rename
                                       if diff.rename is not False
                                       else filename)
+                if deferred:
+                    pre_patch_filename = file_diff_dict.pending.get(
+                        filename, pre_patch_filename)
                 file_diff_dict[filename] += result.diffs[filename]
             else:
                 file_diff_dict[filename] = result.diffs[filename]
@@ -41,19 +119,10 @@ class ApplyPatchAction(ResultAction):
                     shutil.copy2(pre_patch_filename,
                                  pre_patch_filename + '.orig')
 
-            diff = file_diff_dict[filename]
-
-            if not diff.delete:
-                new_filename = (diff.rename
-                                if diff.rename is not False
-                                else filename)
-                with open(new_filename, mode='w',
-                          encoding=detect_encoding(pre_patch_filename)) as file:
-                    file.writelines(diff.modified)
-
-            if diff.delete or diff.rename:
-                if diff.rename != pre_patch_filename and isfile(
-                        pre_patch_filename):
-                    remove(pre_patch_filename)
+            if deferred:
+                file_diff_dict.pending[filename] = pre_patch_filename
+            else:
+                write_patched_file(file_diff_dict[filename],
+                                   pre_patch_filename)
 
         return file_diff_dict
@@ -1,5 +1,7 @@
 from coalib.bearlib.languages import Language
 from coalib.bearlib.languages.Language import UnknownLanguageError
+from coalib.results.result_actions.ApplyPatchAction import (
+    DeferredFileDiffDict)
 from coalib.results.result_actions.ResultAction import ResultAction
 from coalib.results.Result import Result
 from coalib.results.Diff import Diff
@@ -63,6 +65,10 @@ class IgnoreResultAction(ResultAction):
             original_file_dict[filename][source_range.start.line-1].rstrip() +
             '  ' + ignore_comment)
 
+        if isinstance(file_diff_dict, DeferredFileDiffDict):
+            # The pending patches may rename the file, write them first.
+            file_diff_dict.write([filename])
+
         if filename in file_diff_dict:
             ignore_diff = file_diff_dict[filename] + ignore_diff
         else:
@@ -6,6 +6,8 @@ from os import environ
 
 from coalib.results.Diff import Diff
 from coalib.results.Result import Result
+from coalib.results.result_actions.ApplyPatchAction import (
+    DeferredFileDiffDict)
 from coalib.results.result_actions.ResultAction import ResultAction
 from coala_utils.decorators import enforce_signature
 from coala_utils.FileUtils import detect_encoding
@@ -198,6 +200,10 @@ class OpenEditorAction(ResultAction):
             for src in result.affected_code
         }
 
+        # The editor has to open the files with all patches applied so far.
+        if isinstance(file_diff_dict, DeferredFileDiffDict):
+            file_diff_dict.write(filenames)
+
         call_args = self.build_editor_call_args(editor, editor_info, filenames)
 
         if editor_info.get('gui', True):
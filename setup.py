@@ -468,6 +468,7 @@ if __name__ == '__main__':
                   'coala-json = coalib.coala_json:main',
                   'coala-format = coalib.coala_format:main',
                   'coala-delete-orig = coalib.coala_delete_orig:main',
+                  'coala-daemon = coalib.coala_daemon:main',
               ],
           },
           classifiers=CLASSIFIERS,
@@ -0,0 +1,76 @@
+"""
+Guards the startup time of the coala executables: modules that are slow to
+import must not be loaded before they are needed. Where the import time is
+spent can be seen with ``python -X importtime -c 'import coalib.coala'`` on
+Python 3.7 and above.
+"""
+
+import json
+import os
+import subprocess
+import sys
+import unittest
+
+
+# Modules that take a noticeable time to import and are not needed to parse
+# the command line arguments.
+LAZY_MODULES = ('asyncio',
+                'coalib.coala_main',
+                'coalib.collecting.Collectors',
+                'coalib.core',
+                'coalib.output.ConsoleInteraction',
+                'coalib.processes.Processing',
+                'coalib.settings.ConfigurationGathering',
+                'dependency_management',
+                'multiprocessing',
+                'pkg_resources',
+                'pygments',
+                'requests')
+
+
+def get_loaded_modules(code):
+    """
+    Runs code in a new interpreter.
+
+    :param code: The code to run.
+    :return:     The set of names of the modules loaded after it ran.
+    """
+    # The coverage hook of pytest-cov starts in every interpreter inheriting
+    # its environment variables and imports multiprocessing.
+    env = {key: value for key, value in os.environ.items()
+           if not key.startswith('COV_CORE_')}
+    output = subprocess.check_output(
+        [sys.executable, '-c',
+         code + '\nimport json, sys\nprint(json.dumps(list(sys.modules)))'],
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+        env=env,
+        universal_newlines=True)
+    return set(json.loads(output.splitlines()[-1]))
+
+
+class ImportTimeTest(unittest.TestCase):
+
+    def assertNotLoaded(self, modules):
+        self.assertEqual(
+            sorted(module for module in LAZY_MODULES
+                   if module in modules),
+            [])
+
+    def test_entry_points(self):
+        for entry_point in ('coalib.coala',
+                            'coalib.coala_ci',
+                            'coalib.coala_format',
+                            'coalib.coala_json'):
+            with self.subTest(entry_point=entry_point):
+                self.assertNotLoaded(get_loaded_modules(
+                    'import ' + entry_point))
+
+    def test_help(self):
+        self.assertNotLoaded(get_loaded_modules(
+            'import sys\n'
+            'from coalib.coala import main\n'
+            "sys.argv = ['coala', '--help']\n"
+            'try:\n'
+            '    main()\n'
+            'except SystemExit:\n'
+            '    pass'))
@@ -1,10 +1,14 @@
+import asyncio
+import copy
 import logging
+import multiprocessing
 import platform
 import os
+import queue
 import re
 import sys
 import unittest
-from unittest.mock import ANY, Mock
+from unittest.mock import ANY, Mock, patch
 
 from coalib.bearlib.abstractions.Linter import linter
 from coalib.results.Diff import Diff
@@ -12,6 +16,7 @@ from coalib.results.Result import Result
 from coalib.results.RESULT_SEVERITY import RESULT_SEVERITY
 from coalib.results.SourceRange import SourceRange
 from coalib.settings.Section import Section
+from coalib.settings.Setting import Setting
 
 WINDOWS = platform.system() == 'Windows'
 
@@ -164,6 +169,35 @@ class LinterDecoratorTest(LinterTestBase):
             (linter('some-executable', output_format='regex', output_regex='')
              (self.ManualProcessingTestLinter))
 
+    def test_decorator_invalid_batch_states(self):
+        with self.assertRaisesRegex(ValueError,
+                                    'Invalid value for `batch_size`: 0'):
+            linter('some-executable',
+                   batch_size=0)(self.ManualProcessingTestLinter)
+
+        for kwargs in ({'use_stdin': True}, {'global_bear': True}):
+            with self.assertRaisesRegex(ValueError,
+                                        "'batch_size' can't be used together "
+                                        "with 'use_stdin' or 'global_bear'."):
+                linter('some-executable',
+                       batch_size=2,
+                       **kwargs)(self.ManualProcessingTestLinter)
+
+        with self.assertRaisesRegex(ValueError,
+                                    "'batch_size' can't be used together "
+                                    "with the 'corrected' output-format."):
+            linter('some-executable',
+                   output_format='corrected',
+                   batch_size=2)(self.EmptyTestLinter)
+
+        with self.assertRaisesRegex(ValueError,
+                                    '`output_regex` needs the named group '
+                                    '`filename`'):
+            linter('some-executable',
+                   output_format='regex',
+                   output_regex='(?P<message>.*)',
+                   batch_size=2)(self.EmptyTestLinter)
+
     def test_decorator_generated_default_interface(self):
         uut = linter('some-executable')(self.ManualProcessingTestLinter)
         with self.assertRaisesRegex(NotImplementedError, ''):
@@ -1179,6 +1213,97 @@ class LocalLinterReallifeTest(unittest.TestCase):
         create_arguments_mock.assert_called_once_with(
             self.testfile_path, self.testfile_content, None)
 
+    def test_run_async(self):
+        class Handler:
+
+            @staticmethod
+            def create_arguments(filename, file, config_file):
+                return self.test_program_path, filename
+
+        uut = (linter(sys.executable,
+                      output_format='regex',
+                      output_regex=self.test_program_regex,
+                      severity_map=self.test_program_severity_map)
+               (Handler)
+               (self.section, None))
+
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.addCleanup(loop.close)
+
+        expected = list(uut.run(self.testfile_path, self.testfile_content))
+        self.assertEqual(len(expected), 3)
+        results = loop.run_until_complete(
+            uut.run_async(self.testfile_path, self.testfile_content))
+        self.assertEqual(list(results), expected)
+        self.assertEqual(
+            loop.run_until_complete(uut.execute_async(
+                self.testfile_path, self.testfile_content,
+                dependency_results=None)),
+            expected)
+
+        class FailingHandler:
+
+            @staticmethod
+            def create_arguments(filename, file, config_file):
+                raise ValueError('invalid arguments')
+
+        uut = (linter(sys.executable,
+                      output_format='regex',
+                      output_regex=self.test_program_regex)
+               (FailingHandler)
+               (self.section, queue.Queue()))
+        self.assertIsNone(loop.run_until_complete(uut.execute_async(
+            self.testfile_path, self.testfile_content)))
+        messages = []
+        while not uut.message_queue.empty():
+            messages.append(uut.message_queue.get(timeout=0).message)
+        self.assertIn('Bear FailingHandler failed to run on file {}. Take a '
+                      'look at debug messages (`-V`) for further '
+                      'information.'.format(self.testfile_path),
+                      messages)
+
+    def test_execute_async_special_cases(self):
+        class Handler:
+
+            @staticmethod
+            def create_arguments(filename, file, config_file,
+                                 max_line_length: int = 80):
+                raise ValueError('invalid arguments')
+
+        loop = asyncio.new_event_loop()
+        self.addCleanup(loop.close)
+        uut = (linter(sys.executable,
+                      output_format='regex',
+                      output_regex=self.test_program_regex)
+               (Handler)
+               (self.section, queue.Queue()))
+
+        # Failures are raised when debugging.
+        with self.assertRaisesRegex(ValueError, 'invalid arguments'):
+            loop.run_until_complete(uut.execute_async(
+                self.testfile_path, self.testfile_content, debug=True))
+
+        # Debugged and profiled bears are executed synchronously.
+        uut.profile = True
+        with patch.object(uut, 'execute', return_value=[]) as execute:
+            self.assertEqual(loop.run_until_complete(uut.execute_async(
+                self.testfile_path, self.testfile_content)), [])
+        execute.assert_called_once_with(
+            self.testfile_path, self.testfile_content, debug=False)
+        uut.profile = False
+
+        self.section.append(Setting('max_line_length', 'many'))
+        self.assertEqual(loop.run_until_complete(uut.execute_async(
+            self.testfile_path, self.testfile_content)), [])
+        messages = []
+        while not uut.message_queue.empty():
+            messages.append(uut.message_queue.get(timeout=0).message)
+        self.assertIn("The bear Handler cannot be executed. Unable to convert "
+                      "parameter 'max_line_length' into type <class 'int'>.",
+                      messages)
+
     def test_stdin_stderr_noconfig_nocorrection(self):
         create_arguments_mock = Mock()
 
@@ -1374,6 +1499,248 @@ class LocalLinterReallifeTest(unittest.TestCase):
         generate_config_mock.assert_called_once_with(
             self.testfile2_path, self.testfile2_content, 124)
 
+    def test_config_file_reused(self):
+        create_arguments_mock = Mock()
+
+        class Handler:
+
+            @staticmethod
+            def generate_config(filename, file):
+                return 'use_stderr'
+
+            @staticmethod
+            def create_arguments(filename, file, config_file):
+                create_arguments_mock(config_file)
+                return (self.test_program_path, '--config', config_file,
+                        filename)
+
+        uut = (linter(sys.executable,
+                      use_stdout=False,
+                      use_stderr=True,
+                      output_format='regex',
+                      output_regex=self.test_program_regex,
+                      severity_map=self.test_program_severity_map)
+               (Handler)
+               (self.section, None))
+
+        self.assertEqual(len(list(uut.run(self.testfile_path,
+                                          self.testfile_content))), 3)
+        self.assertEqual(len(list(uut.run(self.testfile2_path,
+                                          self.testfile2_content))), 2)
+
+        first_config, second_config = (
+            call[0][0] for call in create_arguments_mock.call_args_list)
+        self.assertEqual(first_config, second_config)
+        self.assertTrue(os.path.isfile(first_config))
+
+        del uut
+        self.assertFalse(os.path.isfile(first_config))
+
+    def test_config_file_removed(self):
+        class Handler:
+
+            @staticmethod
+            def generate_config(filename, file):
+                return 'use_stderr'
+
+            @staticmethod
+            def create_arguments(filename, file, config_file):
+                return (self.test_program_path, '--config', config_file,
+                        filename)
+
+        uut = (linter(sys.executable,
+                      use_stdout=False,
+                      use_stderr=True,
+                      output_format='regex',
+                      output_regex=self.test_program_regex,
+                      severity_map=self.test_program_severity_map)
+               (Handler)
+               (self.section, None))
+
+        self.assertEqual(len(list(uut.run(self.testfile_path,
+                                          self.testfile_content))), 3)
+        config_file, = uut._config_files.values()
+
+        # Copies, like the ones sent to other processes, have no config files
+        # or prepared files.
+        uut.prepare_batch({self.testfile_path: self.testfile_content})
+        uut_copy = copy.copy(uut)
+        self.assertEqual(uut_copy._config_files, {})
+        self.assertEqual(uut_copy._batch, {})
+        self.assertEqual(len(list(uut_copy.run(self.testfile_path,
+                                               self.testfile_content))), 3)
+
+        # Config files that were removed already are skipped.
+        os.remove(config_file)
+        del uut
+        self.assertFalse(os.path.isfile(config_file))
+
+    def test_config_file_removed_in_process(self):
+        class Handler:
+
+            @staticmethod
+            def generate_config(filename, file):
+                return 'use_stderr'
+
+            @staticmethod
+            def create_arguments(filename, file, config_file):
+                return (self.test_program_path, '--config', config_file,
+                        filename)
+
+        uut = (linter(sys.executable,
+                      use_stdout=False,
+                      use_stderr=True,
+                      output_format='regex',
+                      output_regex=self.test_program_regex,
+                      severity_map=self.test_program_severity_map)
+               (Handler)
+               (self.section, None))
+        config_files = multiprocessing.Queue()
+        bears = []
+
+        def lint():
+            # Like the bears sent to the processes running them, which are
+            # kept until the processes end.
+            bear = copy.copy(uut)
+            bears.append(bear)
+            list(bear.run(self.testfile_path, self.testfile_content))
+            config_files.put(list(bear._config_files.values()))
+
+        process = multiprocessing.Process(target=lint)
+        process.start()
+        config_file, = config_files.get(timeout=60)
+        process.join()
+        self.assertEqual(process.exitcode, 0)
+        self.assertFalse(os.path.isfile(config_file))
+
+    def test_batch(self):
+        create_arguments_mock = Mock()
+
+        class Handler:
+
+            @staticmethod
+            def create_arguments(filenames, files, config_file):
+                create_arguments_mock(filenames, files, config_file)
+                return (get_testfile_name('test_batch_linter.py'),) + filenames
+
+        uut = (linter(sys.executable,
+                      output_format='regex',
+                      output_regex=r'(?P<filename>.+):L(?P<line>\d+): '
+                                   r'(?P<message>.*)',
+                      batch_size=2)
+               (Handler)
+               (self.section, None))
+
+        uut.prepare_batch({self.testfile_path: self.testfile_content,
+                           self.testfile2_path: self.testfile2_content})
+        results = list(uut.run(self.testfile2_path, self.testfile2_content))
+        self.assertEqual(
+            [(result.message, result.affected_code[0].start.line)
+             for result in results],
+            [("Invalid char ('X')", 1), ("Invalid char ('i')", 5)])
+
+        results = list(uut.run(self.testfile_path, self.testfile_content))
+        self.assertEqual(
+            [(result.message, result.affected_code[0].start.line)
+             for result in results],
+            [("Invalid char ('0')", 4),
+             ("Invalid char ('.')", 6),
+             ("Invalid char ('p')", 10)])
+        create_arguments_mock.assert_called_once_with(
+            (self.testfile_path, self.testfile2_path),
+            (self.testfile_content, self.testfile2_content),
+            None)
+
+        # Files that are not prepared are linted on their own.
+        create_arguments_mock.reset_mock()
+        self.assertEqual(
+            len(list(uut.run(self.testfile_path, self.testfile_content))), 3)
+        create_arguments_mock.assert_called_once_with(
+            (self.testfile_path,), (self.testfile_content,), None)
+
+    def test_batch_other_files(self):
+        class Handler:
+
+            @staticmethod
+            def create_arguments(filenames, files, config_file):
+                return (get_testfile_name('test_batch_linter.py'),
+                        get_testfile_name('test_file2.txt'))
+
+        uut = (linter(sys.executable,
+                      output_format='regex',
+                      output_regex=r'(?P<filename>.+):L(?P<line>\d+): '
+                                   r'(?P<message>.*)',
+                      batch_size=2)
+               (Handler)
+               (self.section, queue.Queue()))
+
+        self.assertEqual(
+            list(uut.run(self.testfile_path, self.testfile_content)), [])
+        messages = []
+        while not uut.message_queue.empty():
+            messages.append(uut.message_queue.get(timeout=0).message)
+        self.assertIn("Discarding a result of no file of the batch: Invalid "
+                      "char ('X')",
+                      messages)
+
+    def test_batch_no_output(self):
+        class Handler:
+
+            @staticmethod
+            def create_arguments(filenames, files, config_file):
+                return '-c', ''
+
+        uut = (linter(sys.executable,
+                      output_format='regex',
+                      output_regex=r'(?P<filename>.+):L(?P<line>\d+): '
+                                   r'(?P<message>.*)',
+                      batch_size=2)
+               (Handler)
+               (self.section, None))
+
+        uut.prepare_batch({self.testfile_path: self.testfile_content,
+                           self.testfile2_path: self.testfile2_content})
+        self.assertEqual(
+            list(uut.run(self.testfile_path, self.testfile_content)), [])
+        self.assertEqual(
+            list(uut.run(self.testfile2_path, self.testfile2_content)), [])
+
+    def test_batch_config_groups(self):
+        create_arguments_mock = Mock()
+
+        class Handler:
+
+            @staticmethod
+            def generate_config(filename, file):
+                return 'prefix=' + os.path.basename(filename) + ' '
+
+            @staticmethod
+            def create_arguments(filenames, files, config_file):
+                create_arguments_mock(filenames)
+                return ((get_testfile_name('test_batch_linter.py'),
+                         '--config', config_file) +
+                        filenames)
+
+        uut = (linter(sys.executable,
+                      output_format='regex',
+                      output_regex=r'(?P<filename>.+):L(?P<line>\d+): '
+                                   r'(?P<message>.*)',
+                      batch_size=2)
+               (Handler)
+               (self.section, None))
+
+        uut.prepare_batch({self.testfile_path: self.testfile_content,
+                           self.testfile2_path: self.testfile2_content})
+        results = list(uut.run(self.testfile_path, self.testfile_content))
+        self.assertEqual(results[0].message,
+                         "test_file.txt Invalid char ('0')")
+        results = list(uut.run(self.testfile2_path, self.testfile2_content))
+        self.assertEqual(results[0].message,
+                         "test_file2.txt Invalid char ('X')")
+        self.assertEqual(
+            [call[0][0] for call in create_arguments_mock.call_args_list],
+            [(self.testfile_path,), (self.testfile2_path,)])
+
     def test_capture_groups_warnings(self):
         logger = logging.getLogger()
         with self.assertLogs(logger, 'WARNING') as cm:
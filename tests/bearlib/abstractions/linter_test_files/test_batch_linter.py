@@ -0,0 +1,32 @@
+# Like ``test_linter.py``, but lints all files given as arguments and prints
+# the name of the file with each issue.
+#
+# Invocation
+# ==========
+#
+# python3 test_batch_linter.py [--config <config-file>] <files-to-lint>...
+#
+# The config file may contain the line "prefix=<string>", which is printed in
+# front of each message.
+
+import sys
+
+
+if __name__ == '__main__':
+    filenames = sys.argv[1:]
+    prefix = ''
+    if filenames[0] == '--config':
+        with open(filenames[1], mode='r') as fl:
+            for line in fl.read().splitlines():
+                if line.startswith('prefix='):
+                    prefix = line[len('prefix='):]
+        filenames = filenames[2:]
+
+    for filename in filenames:
+        with open(filename, mode='r') as fl:
+            content = fl.read()
+
+        for i, line in enumerate(content.splitlines()):
+            if line[0] not in ('+', '-', '*', '/'):
+                print("{}:L{}: {}Invalid char ('{}')".format(
+                    filename, i + 1, prefix, line[0]))
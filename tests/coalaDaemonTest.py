@@ -0,0 +1,242 @@
+import os
+import shutil
+import socket
+import stat
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from coala_utils.ContextManagers import prepare_file, retrieve_stdout
+
+from coalib.coala_daemon import (
+    CoalaDaemon, CoalaDaemonServer, get_socket_path, main, send_request)
+from coalib.misc.Caching import FileCache
+from coalib.misc.CachingUtilities import USER_DATA_DIR, db_get, db_load
+from tests.TestUtilities import bear_test_module
+
+
+class coalaDaemonTest(unittest.TestCase):
+
+    def setUp(self):
+        self.file_context = prepare_file(['line\n', 'line\n'], None)
+        _, self.filename = self.file_context.__enter__()
+        self.filename = os.path.normcase(os.path.abspath(self.filename))
+        self.addCleanup(self.file_context.__exit__, None, None, None)
+
+        with bear_test_module():
+            self.daemon = CoalaDaemon(['-c', os.devnull,
+                                       '-b', 'LineCountTestBear',
+                                       '-f', self.filename],
+                                      os.path.dirname(self.filename))
+        self.addCleanup(self.daemon.close)
+
+        socket_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, socket_dir)
+        self.socket_path = os.path.join(socket_dir, 'daemon.sock')
+
+    def touch(self, contents):
+        with open(self.filename, 'wb') as file:
+            file.write(contents)
+        stat_result = os.stat(self.filename)
+        os.utime(self.filename, ns=(stat_result.st_atime_ns,
+                                    stat_result.st_mtime_ns + 10 ** 9))
+
+    def start_server(self, **kwargs):
+        server = CoalaDaemonServer(self.daemon, self.socket_path, **kwargs)
+        self.addCleanup(server.server_close)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.shutdown)
+        return thread
+
+    def get_messages(self, results):
+        return [result.message for result in results['cli']]
+
+    def test_analyze(self):
+        self.assertEqual(self.get_messages(self.daemon.analyze()),
+                         ['This file has 2 lines.'])
+        # Nothing changed, the results are kept.
+        self.assertEqual(self.get_messages(self.daemon.analyze()),
+                         ['This file has 2 lines.'])
+
+    def test_update_file(self):
+        self.daemon.analyze()
+        self.assertTrue(self.daemon.update_file(self.filename, 'line\n', 1))
+        self.assertFalse(self.daemon.update_file(self.filename, '', 1))
+        self.assertEqual(self.get_messages(self.daemon.analyze()),
+                         ['This file has 1 lines.'])
+
+        # The file on the disk stays untouched.
+        with open(self.filename) as file:
+            self.assertEqual(file.read(), 'line\nline\n')
+
+    def test_separate_cache(self):
+        project_dir = os.path.dirname(self.filename)
+        with FileCache(None, project_dir, flush_cache=True) as cache:
+            cache.track_files({self.filename})
+        stored_cache = (db_load(None, 'files:' + project_dir),
+                        db_get(None, 'projects', project_dir))
+
+        with bear_test_module():
+            daemon = CoalaDaemon(['-c', os.devnull,
+                                  '-b', 'LineCountTestBear',
+                                  '-f', self.filename],
+                                 project_dir)
+        self.addCleanup(daemon.close)
+        daemon.update_file(self.filename, 'line\n', 1)
+        daemon.analyze()
+
+        # The cache of coala runs is neither flushed nor told that the
+        # unsaved contents were analyzed.
+        self.assertEqual((db_load(None, 'files:' + project_dir),
+                          db_get(None, 'projects', project_dir)),
+                         stored_cache)
+
+    def test_update_missing_file(self):
+        filename = self.filename + '.missing'
+        self.assertTrue(self.daemon.update_file(filename, 'line\n', 1))
+        self.assertIsNone(self.daemon.disk_times[filename])
+
+    def test_disabled_section(self):
+        self.daemon.targets = ['other']
+        self.assertEqual(self.daemon.analyze(), {})
+
+    def test_sync_files(self):
+        self.daemon.analyze()
+        self.assertEqual(self.daemon.sync_files(), set())
+
+        self.touch(b'line\n' * 3)
+        self.assertEqual(self.daemon.sync_files(), {self.filename})
+        self.assertEqual(self.get_messages(self.daemon.analyze()),
+                         ['This file has 3 lines.'])
+
+    def test_sync_deleted_file(self):
+        self.daemon.analyze()
+        os.remove(self.filename)
+        self.assertEqual(self.daemon.sync_files(), {self.filename})
+        self.assertIsNone(self.daemon.proxymap.get(self.filename))
+        self.assertNotIn(self.filename, self.daemon.disk_times)
+        # Recreated for the cleanup of the file.
+        self.touch(b'')
+
+    def test_sync_undecodable_file(self):
+        self.daemon.analyze()
+        self.touch(b'\xff\xfe\n')
+        self.assertEqual(self.daemon.sync_files(), {self.filename})
+        self.assertIsNone(self.daemon.proxymap.get(self.filename))
+
+    def test_get_socket_path(self):
+        with patch.dict(os.environ, {'XDG_RUNTIME_DIR': ''}):
+            self.assertEqual(os.path.dirname(get_socket_path('project')),
+                             USER_DATA_DIR)
+            self.assertEqual(get_socket_path('project'),
+                             get_socket_path(os.path.abspath('project')))
+            self.assertNotEqual(get_socket_path('project'),
+                                get_socket_path('other'))
+
+        runtime_dir = os.path.dirname(self.socket_path)
+        with patch.dict(os.environ, {'XDG_RUNTIME_DIR': runtime_dir}):
+            self.assertEqual(os.path.dirname(get_socket_path('project')),
+                             runtime_dir)
+
+    def test_server(self):
+        thread = self.start_server()
+        self.assertEqual(stat.S_IMODE(os.stat(self.socket_path).st_mode),
+                         0o600)
+
+        response = send_request(self.socket_path, 'analyze')
+        self.assertEqual(
+            [result['message'] for result in response['results']['cli']],
+            ['This file has 2 lines.'])
+
+        self.assertEqual(send_request(self.socket_path, 'update',
+                                      filename=self.filename,
+                                      contents='',
+                                      version=1),
+                         {'updated': True})
+        response = send_request(self.socket_path, 'analyze')
+        self.assertEqual(
+            [result['message'] for result in response['results']['cli']],
+            ['This file has 0 lines.'])
+
+        self.assertIn('error', send_request(self.socket_path, 'unknown'))
+        self.assertIn('error', send_request(self.socket_path, 'update'))
+
+        self.assertEqual(send_request(self.socket_path, 'shutdown'), {})
+        thread.join(timeout=10)
+        self.assertFalse(thread.is_alive())
+
+    def test_server_socket_in_use(self):
+        self.start_server()
+        with self.assertRaises(OSError):
+            CoalaDaemonServer(self.daemon, self.socket_path)
+
+    def test_server_stale_socket(self):
+        with socket.socket(socket.AF_UNIX) as stale_socket:
+            stale_socket.bind(self.socket_path)
+        self.start_server()
+        self.assertEqual(send_request(self.socket_path, 'shutdown'), {})
+
+    def test_server_close(self):
+        server = CoalaDaemonServer(self.daemon, self.socket_path)
+        server.server_close()
+        self.assertFalse(os.path.exists(self.socket_path))
+        # Closing it again does not fail on the removed socket.
+        server.server_close()
+
+    def test_server_default_socket(self):
+        with patch.dict(os.environ,
+                        {'XDG_RUNTIME_DIR': os.path.dirname(
+                            self.socket_path)}):
+            server = CoalaDaemonServer(self.daemon)
+            server.server_close()
+            self.assertEqual(server.server_address,
+                             get_socket_path(self.daemon.project_dir))
+
+    def test_server_watch(self):
+        self.daemon.analyze()
+        with self.assertLogs(level='DEBUG') as logs:
+            self.start_server(watch_interval=0.01)
+            self.touch(b'line\n')
+            for _ in range(500):
+                if any('Files changed' in line for line in logs.output):
+                    break
+                time.sleep(0.01)
+        self.assertIn('DEBUG:root:Files changed on the disk:\n' +
+                      self.filename,
+                      logs.output)
+
+    def run_main(self):
+        with bear_test_module(), retrieve_stdout() as stdout:
+            retval = main(['--socket', self.socket_path,
+                           '--watch-interval', '60',
+                           '-c', os.devnull,
+                           '-b', 'LineCountTestBear',
+                           '-f', self.filename])
+            return retval, stdout.getvalue()
+
+    def test_main(self):
+        def shut_down():
+            for _ in range(500):
+                if os.path.exists(self.socket_path):
+                    break
+                time.sleep(0.01)
+            self.assertEqual(send_request(self.socket_path, 'shutdown'), {})
+
+        thread = threading.Thread(target=shut_down)
+        thread.start()
+        retval, output = self.run_main()
+        thread.join()
+        self.assertEqual(retval, 0)
+        self.assertEqual(output, 'coala daemon listening on {}\n'.format(
+            self.socket_path))
+        self.assertFalse(os.path.exists(self.socket_path))
+
+    def test_main_interrupted(self):
+        with patch.object(CoalaDaemonServer, 'serve_forever',
+                          side_effect=KeyboardInterrupt):
+            retval, _ = self.run_main()
+        self.assertEqual(retval, 0)
+        self.assertFalse(os.path.exists(self.socket_path))
@@ -4,8 +4,8 @@ import sys
 import unittest
 from unittest.mock import MagicMock, patch
 
-from coalib import coala
-from coala_utils.ContextManagers import prepare_file
+from coalib import coala, coala_main
+from coala_utils.ContextManagers import make_temp, prepare_file
 
 from tests.TestUtilities import execute_coala, bear_test_module
 
@@ -124,3 +124,27 @@ class coalaDebugFlagTest(unittest.TestCase):
                             '-b', 'RaiseTestBear')
 
         mocked_ipdb.launch_ipdb_on_exception.assert_called_once_with()
+
+    def test_debug_setting_launches_ipdb(self, mocked_mode_json):
+        mocked_ipdb = self.ipdbMock()
+        with bear_test_module(), make_temp() as coafile, \
+                prepare_file(['#fixme  '], None) as (lines, filename):
+            with open(coafile, 'w') as file:
+                file.write('[cli]\ndebug = True\n')
+            with patch.dict('sys.modules', ipdb=mocked_ipdb), \
+                    patch.object(coala_main, 'execute_section',
+                                 side_effect=RuntimeError(
+                                     'Mocked execute_section fails.')), \
+                    patch.object(coala_main, 'ProcessPool') as pool:
+                with self.assertRaisesRegex(
+                        RuntimeError, r'^Mocked execute_section fails\.$'):
+                    execute_coala(
+                        coala.main, 'coala',
+                        '-c', coafile,
+                        '-f', filename,
+                        '-b', 'LineCountTestBear')
+
+        mocked_ipdb.launch_ipdb_on_exception.assert_called_once_with()
+        # The debug setting is no --debug flag, so the bears run in processes
+        # that are closed nonetheless.
+        pool.return_value.close.assert_called_once_with()
@@ -53,6 +53,22 @@ class coalaTest(unittest.TestCase):
                                     'coala must return nonzero when '
                                     'errors occured')
 
+    def test_coala_core(self):
+        with bear_test_module():
+            with prepare_file(['#fixme'], None) as (lines, filename):
+                retval, stdout, stderr = execute_coala(
+                                coala.main,
+                                'coala', '-c', os.devnull,
+                                '--non-interactive', '--no-color',
+                                '-f', filename,
+                                '-b', 'LineCountTestBear',
+                                '--core')
+                self.assertIn('This file has 1 lines.', stdout)
+                self.assertIn(
+                    'LineCountTestBear: This result has no patch attached.',
+                    stderr)
+                self.assertEqual(retval, 1)
+
     def test_coala2(self):
         with bear_test_module(), retrieve_stdout() as sio:
             with prepare_file(['#fixme'], None) as (lines, filename):
@@ -324,6 +340,25 @@ class coalaTest(unittest.TestCase):
                     )[0]['cli'])
                 )
 
+    def test_run_coala_core(self):
+        with bear_test_module():
+            with prepare_file(['#fixme  '], None) as (lines, filename):
+                results, retval, file_dicts = run_coala(
+                    console_printer=ConsolePrinter(),
+                    log_printer=LogPrinter(),
+                    arg_list=(
+                        '-c', os.devnull,
+                        '-f', filename,
+                        '-b', 'SpaceConsistencyTestBear',
+                        '-S', 'use_spaces=yeah'
+                    ),
+                    autoapply=False,
+                    use_core=True)
+                self.assertEqual(len(results['cli']), 1)
+                self.assertEqual(results['cli'][0].origin,
+                                 'SpaceConsistencyTestBear')
+                self.assertEqual(list(file_dicts['cli']), [filename])
+
     def test_run_coala_no_autoapply_debug(self):
         self.test_run_coala_no_autoapply(debug=True)
 
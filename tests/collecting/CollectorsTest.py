@@ -1,9 +1,13 @@
 import logging
 import os
 import pkg_resources
+import shutil
+import sys
+import tempfile
 import unittest
 
 from functools import partial
+from unittest.mock import patch
 from pyprint.ConsolePrinter import ConsolePrinter
 
 from testfixtures import LogCapture
@@ -11,14 +15,18 @@ from testfixtures import LogCapture
 from coalib.bearlib.aspects import AspectList, get as get_aspect
 from coalib.bears.BEAR_KIND import BEAR_KIND
 from coalib.bears.Bear import Bear
+from coalib.collecting import Collectors
 from coalib.collecting.Collectors import (
+    BearIndexEntry, get_bear_index,
     collect_all_bears_from_sections, collect_bears, collect_dirs, collect_files,
     collect_registered_bears_dirs, filter_section_bears_by_languages,
     get_all_bears, get_all_bears_names, collect_bears_by_aspects,
     get_all_languages,
     )
+from coalib.misc.CachingUtilities import db_get, db_update
 from coalib.output.printers.LogPrinter import LogPrinter
 from coalib.output.printers.ListLogPrinter import ListLogPrinter
+from coalib.parsing import Globbing
 from coalib.settings.Section import Section
 from tests.TestUtilities import (
     bear_test_module, TEST_BEAR_NAMES, LANGUAGE_NAMES,
@@ -116,6 +124,22 @@ class CollectFilesTest(unittest.TestCase):
                 ignored_file_paths=[dir_base('py_files', '*')]),
             [dir_base('c_files', 'file1.c')])
 
+    def test_ignored_dirs_not_entered(self):
+        others_dir = os.path.join(self.collectors_test_dir, 'others')
+        with patch.object(Globbing, '_iter_entries',
+                          wraps=Globbing._iter_entries) as iter_entries:
+            self.assertEqual(
+                collect_files([os.path.join(others_dir, '**', '*.(c|py)'),
+                               os.path.join(others_dir, '**', '*.txt')],
+                              ignored_file_paths=[
+                                  os.path.join(others_dir, 'py_files', '**'),
+                                  os.path.join(others_dir, '**', '*2.c')]),
+                [os.path.join(others_dir, 'c_files', 'file1.c'),
+                 os.path.join(others_dir, 'other.txt')])
+        self.assertEqual(sorted(call[0][0]
+                                for call in iter_entries.call_args_list),
+                         [others_dir, os.path.join(others_dir, 'c_files')])
+
     def test_trailing_globstar(self):
         ignore_path1 = os.path.join(self.collectors_test_dir,
                                     'others',
@@ -378,6 +402,117 @@ class CollectBearsTest(unittest.TestCase):
                          "[<class 'AspectTestBear.AspectTestBear'>]")
 
 
+class BearIndexTest(unittest.TestCase):
+
+    def setUp(self):
+        self.bear_dir = tempfile.mkdtemp()
+        self.bear_file = os.path.join(self.bear_dir, 'IndexTestBear.py')
+        self.write_bear('LocalBear')
+        patcher = patch.object(Collectors, '_bear_index', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = patch.dict(Collectors._bear_index_updates, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.bear_dir)
+        sys.modules.pop('IndexTestBear', None)
+
+    def write_bear(self, kind):
+        with open(self.bear_file, 'w') as file:
+            file.write('from coalib.bears.{0} import {0}\n\n\n'
+                       'class IndexTestBear({0}):\n'
+                       '    LANGUAGES = {{"Python"}}\n'
+                       '    CAN_FIX = {{"Formatting"}}\n'.format(kind))
+
+    def test_get_bear_index(self):
+        with patch.object(Collectors, '_import_bear_file',
+                          wraps=Collectors._import_bear_file) as import_file:
+            entries = get_bear_index(self.bear_dir)
+            self.assertEqual(entries, [BearIndexEntry(
+                'IndexTestBear', self.bear_file, BEAR_KIND.LOCAL,
+                frozenset({'Python'}), frozenset({'Formatting'}),
+                frozenset({'Formatting'}), {'detect': (), 'fix': ()})])
+            self.assertEqual(import_file.call_count, 1)
+
+            # Unchanged files are not imported again.
+            Collectors._bear_index = None
+            self.assertEqual(get_bear_index(self.bear_dir), entries)
+            self.assertEqual(import_file.call_count, 1)
+
+    def test_stored_entries(self):
+        # Another coala run indexed another file meanwhile.
+        Collectors._get_bear_index()
+        other_file = os.path.join(self.bear_dir, 'OtherBear.py')
+        db_update(None, 'bear_index', {other_file: ((0, 0), [])})
+
+        entries = get_bear_index(self.bear_dir)
+        stat = os.stat(self.bear_file)
+        self.assertEqual(db_get(None, 'bear_index', self.bear_file),
+                         ((stat.st_mtime_ns, stat.st_size), entries))
+        self.assertEqual(db_get(None, 'bear_index', other_file),
+                         ((0, 0), []))
+
+    def test_failed_write(self):
+        with patch.object(Collectors, 'db_update', return_value=False):
+            get_bear_index(self.bear_dir)
+        self.assertIn(self.bear_file, Collectors._bear_index_updates)
+
+        get_bear_index(self.bear_dir)
+        self.assertEqual(Collectors._bear_index_updates, {})
+        self.assertIsNotNone(db_get(None, 'bear_index', self.bear_file))
+
+    def test_changed_bear_packages(self):
+        get_bear_index(self.bear_dir)
+        Collectors._bear_index = None
+        with patch.object(Collectors, 'collect_registered_bears_dirs',
+                          return_value=[self.bear_dir]):
+            self.assertEqual(Collectors._get_bear_index(), {})
+        self.assertIsNone(db_get(None, 'bear_index', self.bear_file))
+        self.assertEqual(db_get(None, 'bear_index', ''), [self.bear_dir])
+
+    def test_changed_file(self):
+        get_bear_index(self.bear_dir)
+        self.write_bear('GlobalBear')
+        os.utime(self.bear_file, (0, 0))
+        sys.modules.pop('IndexTestBear', None)
+        self.assertEqual([entry.kind
+                          for entry in get_bear_index(self.bear_dir)],
+                         [BEAR_KIND.GLOBAL])
+
+    def test_additional_bears(self):
+        with open(self.bear_file, 'a') as file:
+            file.write('\n\nfrom coalib.bears.Bear import Bear\n'
+                       '__additional_bears__ = [Bear, IndexTestBear]\n')
+        # Bears without a kind are not indexed.
+        self.assertEqual([entry.name
+                          for entry in get_bear_index(self.bear_dir)],
+                         ['IndexTestBear', 'IndexTestBear'])
+
+    def test_missing_file(self):
+        stat = os.stat
+
+        def stat_removed_file(path, *args, **kwargs):
+            if path == self.bear_file:
+                raise FileNotFoundError
+            return stat(path, *args, **kwargs)
+
+        with patch('os.stat', stat_removed_file):
+            self.assertEqual(get_bear_index(self.bear_dir), [])
+        self.assertNotIn(self.bear_file, Collectors._get_bear_index())
+
+    def test_skip_other_kinds(self):
+        self.assertEqual(len(collect_bears(self.bear_dir, ['**'],
+                                           [BEAR_KIND.LOCAL])[0]), 1)
+        with patch.object(Collectors, '_import_bear_file') as import_file:
+            self.assertEqual(collect_bears(self.bear_dir, ['**'],
+                                           [BEAR_KIND.GLOBAL],
+                                           warn_if_unused_glob=False),
+                             ([],))
+        self.assertFalse(import_file.called)
+
+
 class CollectorsTests(unittest.TestCase):
 
     def setUp(self):
@@ -1,12 +1,15 @@
+import asyncio
 from concurrent.futures import ThreadPoolExecutor
 import logging
 import sys
+import threading
 import unittest
 import unittest.mock
 
 from coalib.settings.Section import Section
 from coalib.core.Bear import Bear
-from coalib.core.Core import initialize_dependencies, run
+from coalib.core.Core import initialize_dependencies, run, Session
+from coalib.misc.Shell import run_shell_command_async
 
 from coala_utils.decorators import generate_eq
 
@@ -56,6 +59,23 @@ class CustomTasksBear(Bear):
         return ((task, {}) for task in self.tasks)
 
 
+class AsyncTasksBear(CustomTasksBear):
+    running_tasks = 0
+    max_running_tasks = 0
+
+    @asyncio.coroutine
+    def execute_task(self, args, kwargs):
+        cls = type(self)
+        cls.running_tasks += 1
+        cls.max_running_tasks = max(cls.max_running_tasks, cls.running_tasks)
+        try:
+            stdout, stderr = yield from run_shell_command_async(
+                (sys.executable, '-c', 'print({})'.format(args[0])))
+        finally:
+            cls.running_tasks -= 1
+        return [int(stdout)]
+
+
 class BearA(TestBearBase):
     pass
 
@@ -820,6 +840,47 @@ class CoreOnSpecificExecutorTest(CoreTestBase):
                 executor.submit(lambda: None)
 
 
+class CoreAsyncTest(CoreTestBase):
+
+    def setUp(self):
+        AsyncTasksBear.max_running_tasks = 0
+
+    def test_run_coroutine_tasks(self):
+        bear = AsyncTasksBear(Section('test-section'),
+                              {'some-file': []},
+                              tasks=[(x,) for x in range(6)])
+        executor = ThreadPoolExecutor(max_workers=1)
+        results = []
+        run({bear}, results.append, executor=executor, max_async_tasks=3)
+
+        self.assertEqual(sorted(results), list(range(6)))
+        self.assertEqual(AsyncTasksBear.max_running_tasks, 3)
+
+    def test_run_coroutine_tasks_with_cache(self):
+        bear = AsyncTasksBear(Section('test-section'),
+                              {'some-file': []},
+                              tasks=[(x,) for x in range(2)])
+        cache = {}
+        self.assertEqual(sorted(self.execute_run({bear}, cache)), [0, 1])
+        self.assertEqual(len(cache[AsyncTasksBear]), 2)
+
+    def test_run_in_thread(self):
+        # Child watchers can only be attached from the main thread, bears with
+        # tasks that don't run processes still work in other threads.
+        bear = CustomTasksBear(Section('test-section'),
+                               {'some-file': []},
+                               tasks=[(x,) for x in range(3)])
+        results = []
+        with unittest.mock.patch('asyncio.get_child_watcher') as watcher:
+            thread = threading.Thread(target=lambda: results.extend(
+                self.execute_run({bear}, executor=ThreadPoolExecutor())))
+            thread.start()
+            thread.join()
+
+        self.assertEqual(sorted(results), [0, 1, 2])
+        self.assertFalse(watcher.called)
+
+
 class CoreCacheTest(CoreTestBase):
 
     def setUp(self):
@@ -933,3 +994,61 @@ class CoreCacheTest(CoreTestBase):
             # The unrelated data is left untouched.
             self.assertIn(b'123456', cache_values)
             self.assertEqual(cache_values[b'123456'], [100, 101, 102])
+
+    def test_cache_lookups_on_event_loop(self):
+        section = Section('test-section')
+        bear = CustomTasksBear(section, {}, tasks=[(1,), (2,)])
+        cache = {}
+
+        with unittest.mock.patch.object(
+                asyncio.BaseEventLoop, 'run_in_executor', autospec=True,
+                side_effect=asyncio.BaseEventLoop.run_in_executor) \
+                as run_in_executor:
+            self.assertEqual(sorted(self.execute_run({bear}, cache)), [1, 2])
+            # Only the missed tasks are sent to an executor.
+            self.assertEqual(run_in_executor.call_count, 2)
+
+            run_in_executor.reset_mock()
+            self.assertEqual(sorted(self.execute_run({bear}, cache)), [1, 2])
+            self.assertFalse(run_in_executor.called)
+
+    def test_cache_updates_reused(self):
+        # Tasks executed earlier in the session are not executed again,
+        # though their results are not written to the cache yet.
+        bear = CustomTasksBear(Section('test-section'), {}, tasks=[(1,)])
+        cache = {}
+        session = Session({bear}, lambda result: None, cache,
+                          ThreadPoolExecutor(max_workers=1))
+        self.addCleanup(session.executor.shutdown)
+        self.addCleanup(session.event_loop.close)
+
+        with unittest.mock.patch.object(bear, 'analyze',
+                                        wraps=bear.analyze) as mock:
+            for _ in range(2):
+                self.assertEqual(session.event_loop.run_until_complete(
+                    session._execute_task_with_cache(bear, ((1,), {}))),
+                    [1])
+            mock.assert_called_once_with(1)
+        self.assertEqual(cache, {CustomTasksBear: {}})
+
+    def test_cache_writes_batched(self):
+        class RecordingCacheTable(dict):
+            def __init__(self):
+                super().__init__()
+                self.writes = []
+
+            def __setitem__(self, key, value):
+                # The session has finished running the tasks when the
+                # results are written.
+                self.writes.append(len(results))
+                super().__setitem__(key, value)
+
+        section = Section('test-section')
+        bear = CustomTasksBear(section, {}, tasks=[(1,), (2,), (3,)])
+        table = RecordingCacheTable()
+        results = []
+        run({bear}, results.append, {CustomTasksBear: table},
+            ThreadPoolExecutor(max_workers=1))
+
+        self.assertEqual(sorted(results), [1, 2, 3])
+        self.assertEqual(table.writes, [3, 3, 3])
@@ -1,6 +1,11 @@
+import os
+import subprocess
+import sys
 import unittest
 
-from coalib.core.PersistentHash import persistent_hash
+from coalib.core.PersistentHash import (
+    get_content_digests, hash_contents, persistent_hash, structural_hash)
+from coalib.settings.Section import Section
 
 
 class PersistentHashTest(unittest.TestCase):
@@ -48,3 +53,63 @@ class PersistentHashTest(unittest.TestCase):
                              {'q': {'g': '1', 'a': '1'}, 'a': {},
                               'g': {'z', 'd'}, 'b': '8'})),
             b'\xa9z[U\xfa\xd1x\x95\x00\xf1,h%Y\xa2u\x87\xb0\xb2\x13')
+
+
+class StructuralHashTest(unittest.TestCase):
+
+    def test_builtin_values(self):
+        values = [None, True, False, 0, 1, 1.0, '1', b'1', (), [], set(),
+                  {}, (1,), [1], {1}, {1: 1}, ('a', 'b'), ('ab',)]
+        hashes = [structural_hash(value) for value in values]
+        self.assertEqual(len(set(hashes)), len(values))
+        self.assertEqual(hashes,
+                         [structural_hash(value) for value in values])
+
+    def test_unordered_containers(self):
+        self.assertEqual(structural_hash({'a', 'g', '1'}),
+                         structural_hash({'1', 'g', 'a'}))
+        self.assertEqual(
+            structural_hash((('a', {'g', 'b'}), {'q': {'g': '1', 'a': {}}})),
+            structural_hash((('a', {'b', 'g'}), {'q': {'a': {}, 'g': '1'}})))
+        self.assertNotEqual(structural_hash({'a': 1, 'b': 2}),
+                            structural_hash({'a': 2, 'b': 1}))
+
+    def test_other_objects(self):
+        self.assertEqual(structural_hash(Section('a')),
+                         structural_hash(Section('a')))
+        self.assertNotEqual(structural_hash(Section('a')),
+                            structural_hash(Section('b')))
+
+    def test_content_digests(self):
+        file_dict = {'a': ('line\n',), 'b': ('other line\n',)}
+        other_file_dict = {'a': ('line\n',)}
+        digests = get_content_digests([file_dict, other_file_dict, file_dict])
+        self.assertEqual(len(digests), 3)
+        self.assertEqual(digests[id(file_dict['a'])][1],
+                         hash_contents(('line\n',)))
+
+        def hash_task(file_dict, filename):
+            return structural_hash(((filename, file_dict[filename]), {}),
+                                   digests)
+
+        self.assertEqual(hash_task(file_dict, 'a'),
+                         hash_task(other_file_dict, 'a'))
+        self.assertNotEqual(hash_task(file_dict, 'a'),
+                            hash_task(file_dict, 'b'))
+        # Equal contents that are not in the digests are hashed as tuples.
+        self.assertNotEqual(hash_task(file_dict, 'a'),
+                            structural_hash((('a', ('line\n',)), {}),
+                                            digests))
+
+    def test_hash_randomization(self):
+        code = ('from coalib.core.PersistentHash import structural_hash\n'
+                "print(repr(structural_hash(({'a', 'b', 'c'}, "
+                "{'d': 1, 'e': 2}))))")
+        hashes = {
+            subprocess.check_output(
+                [sys.executable, '-c', code],
+                env=dict(os.environ, PYTHONHASHSEED=seed),
+                cwd=os.path.dirname(os.path.dirname(os.path.dirname(
+                    os.path.abspath(__file__)))))
+            for seed in ('1', '2', '3')}
+        self.assertEqual(len(hashes), 1)
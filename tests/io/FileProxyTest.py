@@ -165,8 +165,18 @@ class FileProxyMapTest(unittest.TestCase):
 
     def test_proxymap_resolve_creates(self):
         with prepare_file(['coala-rocks\n'], None) as (lines, file):
-            proxy = self.empty_proxymap().resolve(file)
+            proxymap = self.empty_proxymap()
+            proxy = proxymap.resolve(file)
             self.assertEqual(proxy.lines(), tuple(lines))
+            self.assertIs(proxymap.get(file), proxy)
+
+    def test_proxymap_iter(self):
+        proxy = self.random_proxy()
+        proxymap = self.empty_proxymap()
+        self.assertEqual(list(proxymap), [])
+
+        proxymap.add(proxy)
+        self.assertEqual(list(proxymap), [proxy])
 
     def test_proxymap_resolve_creates_binary(self):
         with make_temp() as filename:
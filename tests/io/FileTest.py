@@ -1,6 +1,9 @@
 import os
+import pickle
 import unittest
 
+from coala_utils.ContextManagers import make_temp
+
 from coalib.io.File import File
 
 TEST_FILE_DIR = os.path.join(os.path.split(__file__)[0],
@@ -44,6 +47,62 @@ class FileTest(unittest.TestCase):
     def test_lines(self):
         self.assertEqual(self.uut.lines, ('This is a test file.\n',))
 
+    def test_lines_not_keeping_contents(self):
+        self.assertEqual(self.uut.lines, ('This is a test file.\n',))
+        self.assertNotIn('raw', self.uut.__dict__)
+        self.assertNotIn('string', self.uut.__dict__)
+
+        # Already loaded contents are reused
+        self.assertEqual(self.other_file.raw, b'Another test file.\n')
+        self.assertEqual(self.other_file.lines, ('Another test file.\n',))
+
+        other_file = File(self.other_test_file, newline=False)
+        self.assertEqual(other_file.string, 'Another test file.\n')
+        self.assertEqual(other_file.lines, ('Another test file.',))
+
+    def test_lines_unicode(self):
+        with make_temp() as filename:
+            with open(filename, 'wb') as file:
+                file.write('ä\nö'.encode('utf-8'))
+            self.assertEqual(File(filename).lines, ('ä\n', 'ö\n'))
+
+    def test_empty_file(self):
+        with make_temp() as filename:
+            uut = File(filename)
+            uut.check_encoding()
+            self.assertEqual(uut.lines, ())
+
+    def test_check_encoding(self):
+        self.uut.check_encoding()
+
+        with make_temp() as filename:
+            with open(filename, 'wb') as file:
+                file.write(b'ascii ' + 'äöü'.encode('utf-8') * 10)
+            File(filename).check_encoding(chunk_size=5)
+
+            with open(filename, 'wb') as file:
+                file.write(b'ascii ' + bytes([120, 3, 255, 0, 100]))
+            with self.assertRaises(UnicodeDecodeError):
+                File(filename).check_encoding()
+
+            # A truncated multi-byte character at the end of the file
+            with open(filename, 'wb') as file:
+                file.write('ä'.encode('utf-8')[:1])
+            with self.assertRaises(UnicodeDecodeError):
+                File(filename).check_encoding()
+
+    def test_pickle(self):
+        self.assertEqual(self.uut.raw, b'This is a test file.')
+        self.assertEqual(self.uut.string, 'This is a test file.')
+        uut = pickle.loads(pickle.dumps(self.uut))
+        self.assertEqual(uut, self.uut)
+        self.assertNotIn('raw', uut.__dict__)
+        self.assertNotIn('string', uut.__dict__)
+        self.assertEqual(uut.lines, ('This is a test file.\n',))
+
+        # Loaded lines are kept, they may differ from the file on disk by now
+        self.assertIn('lines', pickle.loads(pickle.dumps(uut)).__dict__)
+
     def test_raw(self):
         self.assertEqual(self.uut.raw, b'This is a test file.')
 
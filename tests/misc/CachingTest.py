@@ -1,3 +1,6 @@
+from concurrent.futures import ThreadPoolExecutor
+import pickle
+import sqlite3
 import unittest
 import os
 from unittest.mock import patch
@@ -6,16 +9,23 @@ from pyprint.NullPrinter import NullPrinter
 from pyprint.ConsolePrinter import ConsolePrinter
 
 from coalib.misc.Caching import (
-    FileCache, FileDictFileCache, ProxyMapFileCache)
+    FileCache, FileDictFileCache, ProxyMapFileCache, ResultCache,
+    TaskResultCache, TimingCache)
+from coalib.core import Core
+from coalib.core.Bear import Bear
 from coalib.processes.Processing import get_file_dict
 from coalib.io.FileProxy import (FileProxy, FileProxyMap)
-from coalib.misc.CachingUtilities import pickle_load, pickle_dump
+from coalib.misc.CachingUtilities import db_get, db_load, db_update, hash_file
 from coalib.output.printers.LogPrinter import LogPrinter
 from coalib import coala
 from coalib.coala_main import run_coala
 from coala_utils.ContextManagers import make_temp, prepare_file
 from coala_utils.ContextManagers import simulate_console_inputs
+from coalib.settings.Section import Section
+from coalib.settings.Setting import Setting
 from tests.TestUtilities import execute_coala, bear_test_module
+from tests.test_bears.LineCountTestBear import LineCountTestBear
+from tests.test_bears.TestBear import TestBear
 
 
 class CachingTest(unittest.TestCase):
@@ -78,6 +88,76 @@ class CachingTest(unittest.TestCase):
         cache.current_time = 2
         self.assertEqual(cache.get_uncached_files({file_path}), set())
 
+    def test_get_uncached_files_content_hash(self):
+        with prepare_file(['int i;\n'], None) as (_, file_path):
+            cache = FileCache(self.log_printer, 'coala_test4',
+                              flush_cache=True, content_hash=True)
+            cache.current_time_ns += 10**9
+            self.assertEqual(cache.get_uncached_files({file_path}),
+                             {file_path})
+
+            cache.track_files({file_path})
+            self.assertEqual(cache.get_uncached_files({file_path}),
+                             {file_path})
+            cache.write()
+            size, mtime_ns, digest = cache.data[file_path]
+            self.assertEqual(size, os.path.getsize(file_path))
+
+            cache = FileCache(self.log_printer, 'coala_test4',
+                              content_hash=True)
+            cache.current_time_ns += 10**9
+            self.assertEqual(cache.get_uncached_files({file_path}), set())
+
+            # Touching the file without changing its content keeps it cached
+            os.utime(file_path, ns=(mtime_ns + 10, mtime_ns + 10))
+            with patch('coalib.misc.Caching.hash_file',
+                       wraps=hash_file) as mock_hash:
+                self.assertEqual(cache.get_uncached_files({file_path}),
+                                 set())
+                self.assertEqual(mock_hash.call_count, 1)
+                cache.write()
+                self.assertEqual(mock_hash.call_count, 1)
+            self.assertEqual(cache.data[file_path],
+                             (size, mtime_ns + 10, digest))
+
+            # Changing the content is noticed even if the size stays the same
+            with open(file_path, 'w') as file:
+                file.write('int j;\n')
+            os.utime(file_path, ns=(mtime_ns + 20, mtime_ns + 20))
+            self.assertEqual(cache.get_uncached_files({file_path}),
+                             {file_path})
+
+    def test_content_hash_modified_during_run(self):
+        with prepare_file(['int i;\n'], None) as (_, file_path):
+            cache = FileCache(self.log_printer, 'coala_test4',
+                              flush_cache=True, content_hash=True)
+            cache.current_time_ns = 0
+            cache.track_files({file_path})
+            cache.write()
+            self.assertEqual(cache.data[file_path], -1)
+
+            cache.current_time_ns += 10**20
+            self.assertEqual(cache.get_uncached_files({file_path}),
+                             {file_path})
+
+    def test_content_hash_deleted_file(self):
+        cache = FileCache(self.log_printer, 'coala_test4',
+                          flush_cache=True, content_hash=True)
+        cache.track_files({'nonexistent_file.c'})
+        cache.write()
+        self.assertNotIn('nonexistent_file.c', cache.data)
+
+    def test_caching_mode_change(self):
+        cache = FileCache(self.log_printer, 'coala_test4', flush_cache=True)
+        cache.track_files({'file.c'})
+        cache.write()
+
+        cache = FileCache(self.log_printer, 'coala_test4')
+        self.assertIn('file.c', cache.data)
+
+        cache = FileCache(self.log_printer, 'coala_test4', content_hash=True)
+        self.assertEqual(cache.data, {})
+
     def test_persistence(self):
         with FileCache(self.log_printer, 'test3', flush_cache=True) as cache:
             cache.track_files({'file.c'})
@@ -86,16 +166,101 @@ class CachingTest(unittest.TestCase):
         with FileCache(self.log_printer, 'test3', flush_cache=False) as cache:
             self.assertTrue('file.c' in cache.data)
 
+    def test_incremental_write(self):
+        cache = FileCache(self.log_printer, 'coala_test5', flush_cache=True)
+        cache.track_files({'a.c', 'b.c'})
+        cache.write()
+        # Entries equal to the time of the run are stored without a value
+        self.assertEqual(db_load(self.log_printer, 'files:coala_test5'),
+                         {'a.c': None, 'b.c': None})
+
+        cache = FileCache(self.log_printer, 'coala_test5')
+        self.assertEqual(cache.data, {'a.c': cache.data['b.c'],
+                                      'b.c': cache.data['b.c']})
+        cache.untrack_files({'a.c'})
+        cache.track_files({'c.c'})
+        with patch('coalib.misc.Caching.db_update',
+                   wraps=db_update) as mock_update:
+            cache.write()
+            mock_update.assert_any_call(None, 'files:coala_test5',
+                                        {'c.c': None}, {'a.c'})
+        self.assertEqual(db_load(self.log_printer, 'files:coala_test5'),
+                         {'b.c': None, 'c.c': None})
+
+    def test_ignore_lines(self):
+        cache = FileCache(self.log_printer, 'coala_test6', flush_cache=True)
+        self.assertIsNone(cache.get_ignore_lines('a.c', b'1'))
+        cache.set_ignore_lines('a.c', b'1', [(['abear'], 1, 2)])
+        self.assertEqual(cache.get_ignore_lines('a.c', b'1'),
+                         [(['abear'], 1, 2)])
+        self.assertIsNone(cache.get_ignore_lines('a.c', b'2'))
+        cache.write()
+        self.assertEqual(db_load(self.log_printer, 'ignore_lines:coala_test6'),
+                         {'a.c': (b'1', [(['abear'], 1, 2)])})
+
+        cache = FileCache(self.log_printer, 'coala_test6')
+        self.assertEqual(cache.get_ignore_lines('a.c', b'1'),
+                         [(['abear'], 1, 2)])
+        # Only changed entries are written.
+        with patch('coalib.misc.Caching.db_update',
+                   wraps=db_update) as mock_update:
+            cache.write()
+            namespaces = [args[1] for args, _ in mock_update.call_args_list]
+            self.assertNotIn('ignore_lines:coala_test6', namespaces)
+
+        cache = FileCache(self.log_printer, 'coala_test6', flush_cache=True)
+        self.assertIsNone(cache.get_ignore_lines('a.c', b'1'))
+
+    def test_failed_write(self):
+        cache = FileCache(self.log_printer, 'coala_test7', flush_cache=True)
+        cache.track_files({'a.c'})
+        cache.set_ignore_lines('a.c', b'1', [(['abear'], 1, 2)])
+        with patch('coalib.misc.Caching.db_update', return_value=False):
+            cache.write()
+        self.assertIsNone(db_get(self.log_printer, 'projects', 'coala_test7'))
+
+        # Everything is written again the next time.
+        cache.write()
+        self.assertEqual(db_load(self.log_printer, 'files:coala_test7'),
+                         {'a.c': None})
+        self.assertEqual(db_load(self.log_printer, 'ignore_lines:coala_test7'),
+                         {'a.c': (b'1', [(['abear'], 1, 2)])})
+
+    def test_failed_files_write(self):
+        cache = FileCache(self.log_printer, 'coala_test8', flush_cache=True)
+        cache.track_files({'a.c', 'b.c'})
+        cache.write()
+        last_time = db_get(self.log_printer, 'projects', 'coala_test8')['time']
+
+        def fail_files_update(log_printer, namespace, *args, **kwargs):
+            return (not namespace.startswith('files:') and
+                    db_update(log_printer, namespace, *args, **kwargs))
+
+        # b.c had results and is untracked, but writing the files fails.
+        cache = FileCache(self.log_printer, 'coala_test8')
+        cache.current_time = last_time + 10
+        cache.untrack_files({'b.c'})
+        with patch('coalib.misc.Caching.db_update', fail_files_update):
+            cache.write()
+
+        # The time of the project is kept, so b.c is not considered checked
+        # at the time of the failed run.
+        self.assertEqual(
+            db_get(self.log_printer, 'projects', 'coala_test8')['time'],
+            last_time)
+        cache = FileCache(self.log_printer, 'coala_test8')
+        self.assertEqual(cache.data, {'a.c': last_time, 'b.c': last_time})
+
     def test_time_travel(self):
         cache = FileCache(self.log_printer, 'coala_test2', flush_cache=True)
         cache.track_files({'file.c'})
         cache.write()
         self.assertTrue('file.c' in cache.data)
 
-        cache_data = pickle_load(self.log_printer, 'coala_test2', {})
+        cache_data = db_get(self.log_printer, 'projects', 'coala_test2')
         # Back to the future :)
         cache_data['time'] = 2000000000
-        pickle_dump(self.log_printer, 'coala_test2', cache_data)
+        db_update(self.log_printer, 'projects', {'coala_test2': cache_data})
 
         cache = FileCache(self.log_printer, 'coala_test2', flush_cache=False)
         self.assertFalse('file.c' in cache.data)
@@ -184,6 +349,372 @@ class CachingTest(unittest.TestCase):
                 stderr)
 
 
+class ResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ResultCache(None, 'coala_test', flush_cache=True)
+        self.bear = LineCountTestBear(Section('name'), None)
+        self.file = ('a = 1\n', 'b = 2\n')
+        self.results = list(self.bear.run('file.py', self.file))
+
+    def test_get_set(self):
+        self.assertIsNone(self.cache.get(self.bear, 'file.py', self.file))
+
+        self.cache.set(self.bear, 'file.py', self.file, self.results)
+        self.assertEqual(self.cache.get(self.bear, 'file.py', self.file),
+                         self.results)
+        self.assertIsNone(self.cache.get(self.bear, 'other.py', self.file))
+        self.assertIsNone(self.cache.get(self.bear, 'file.py', ('a = 1\n',)))
+
+        # Results persist between instances
+        cache = ResultCache(None, 'coala_test')
+        self.assertEqual(cache.get(self.bear, 'file.py', self.file),
+                         self.results)
+
+        cache = ResultCache(None, 'coala_test', flush_cache=True)
+        self.assertIsNone(cache.get(self.bear, 'file.py', self.file))
+
+    def test_settings_change(self):
+        self.cache.set(self.bear, 'file.py', self.file, self.results)
+        self.bear.section.append(Setting('unrelated_setting', 'value'))
+        self.assertEqual(self.cache.get(self.bear, 'file.py', self.file),
+                         self.results)
+
+        bear = TestBear(Section('name'), None)
+        self.cache.set(bear, 'file.py', self.file, self.results)
+        self.assertEqual(self.cache.get(bear, 'file.py', self.file),
+                         self.results)
+        bear.section.append(Setting('exception', 'True'))
+        self.assertIsNone(self.cache.get(bear, 'file.py', self.file))
+
+    def test_source_changes(self):
+        with prepare_file(['version = 1\n'], None) as (_, filename):
+            class ChangingBear(LineCountTestBear):
+
+                @classmethod
+                def get_source_files(cls):
+                    return {filename}
+
+            bear = ChangingBear(Section('name'), None)
+            self.cache.set(bear, 'file.py', self.file, self.results)
+            with open(filename, 'w') as file:
+                file.write('version = 2\n')
+            # The source files are hashed once per process.
+            self.assertEqual(self.cache.get(bear, 'file.py', self.file),
+                             self.results)
+
+            with patch.dict(ResultCache._source_hashes, clear=True):
+                self.assertIsNone(
+                    self.cache.get(bear, 'file.py', self.file))
+
+    def test_version_change(self):
+        self.cache.set(self.bear, 'file.py', self.file, self.results)
+        with patch.dict(ResultCache._source_hashes, clear=True), \
+                patch('coalib.misc.Caching.VERSION', '0.0.0'):
+            self.assertIsNone(
+                self.cache.get(self.bear, 'file.py', self.file))
+
+    def test_raw_files(self):
+        self.cache.set(self.bear, 'file.py', None, self.results)
+        self.assertIsNone(self.cache.get(self.bear, 'file.py', None))
+
+    @patch('coalib.misc.Caching.get_data_path', return_value=None)
+    def test_no_data_dir(self, get_data_path):
+        cache = ResultCache(None, 'coala_test', flush_cache=True)
+        cache.set(self.bear, 'file.py', self.file, self.results)
+        self.assertIsNone(cache.get(self.bear, 'file.py', self.file))
+
+    def test_corrupt_entry(self):
+        self.cache.set(self.bear, 'file.py', self.file, self.results)
+        with open(self.cache._get_entry_path(self.bear, 'file.py'),
+                  'wb') as f:
+            f.write(bytes([1] * 100))
+        self.assertIsNone(self.cache.get(self.bear, 'file.py', self.file))
+
+    def test_unpicklable_results(self):
+        self.cache.set(self.bear, 'file.py', self.file, [lambda: None])
+        self.assertIsNone(self.cache.get(self.bear, 'file.py', self.file))
+        self.assertEqual(os.listdir(self.cache.cache_dir), [])
+
+    @patch('coalib.misc.Caching.os.makedirs', side_effect=PermissionError)
+    def test_unwritable_cache_dir(self, makedirs):
+        self.cache.set(self.bear, 'file.py', self.file, self.results)
+        self.assertTrue(makedirs.called)
+        self.assertIsNone(self.cache.get(self.bear, 'file.py', self.file))
+
+    def test_caching_results(self):
+        with bear_test_module():
+            with prepare_file(['a=(5,6)'], None) as (lines, filename):
+                for _ in range(2):
+                    retval, stdout, stderr = execute_coala(
+                        coala.main,
+                        'coala',
+                        '--non-interactive', '--no-color',
+                        '--cache-results',
+                        '-c', os.devnull,
+                        '-f', filename,
+                        '-b', 'LineCountTestBear')
+                    self.assertIn('This file has 1 lines.', stdout)
+
+
+class TimingCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = TimingCache(None, flush_cache=True)
+
+    def test_write(self):
+        # Bears that only checked empty files are not stored
+        self.cache.add({'LineCountTestBear': [0.2, 100],
+                        'TestBear': [0.1, 0]})
+        self.cache.write()
+        self.assertEqual(db_load(None, TimingCache.NAMESPACE),
+                         {'LineCountTestBear': 0.002})
+        self.assertEqual(self.cache.get_seconds_per_byte('TestBear'), 0.002)
+
+        # Added timings are only written once
+        self.cache.write()
+        self.assertEqual(TimingCache(None).data, {'LineCountTestBear': 0.002})
+
+        cache = TimingCache(None, flush_cache=True)
+        self.assertEqual(cache.data, {})
+        self.assertIsNone(db_load(None, TimingCache.NAMESPACE))
+
+    def test_caching_timings(self):
+        with bear_test_module():
+            with prepare_file(['a=(5,6)'], None) as (lines, filename):
+                execute_coala(coala.main,
+                              'coala',
+                              '--non-interactive', '--no-color',
+                              '--flush-cache',
+                              '-c', os.devnull,
+                              '-f', filename,
+                              '-b', 'LineCountTestBear')
+        self.assertIn('LineCountTestBear', TimingCache(None).data)
+
+
+class CountingBear(Bear):
+    executed_tasks = []
+
+    def generate_tasks(self):
+        return (((filename, file), {})
+                for filename, file in sorted(self.file_dict.items()))
+
+    def execute_task(self, args, kwargs):
+        filename, file = args
+        self.executed_tasks.append(filename)
+        return [len(file)]
+
+
+class TaskResultCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = TaskResultCache(None, flush_cache=True)
+        CountingBear.executed_tasks = []
+
+    def test_get_set(self):
+        table = self.cache[CountingBear]
+        self.assertIn(CountingBear, self.cache)
+        self.assertIsNone(table.get(b'a'))
+        self.assertNotIn(b'a', table)
+        with self.assertRaises(KeyError):
+            table[b'a']
+
+        table[b'a'] = [1]
+        table[b'b'] = []
+        self.assertEqual(table[b'a'], [1])
+        self.assertEqual(self.cache.get(CountingBear, b'b'), [])
+        self.assertEqual((self.cache.hits, self.cache.misses), (2, 3))
+
+        # Nothing is stored before it is written.
+        self.assertIsNone(TaskResultCache(None)[CountingBear].get(b'a'))
+        self.cache.write()
+        cache = TaskResultCache(None)
+        self.assertEqual(cache[CountingBear].get(b'a'), [1])
+        self.assertEqual(cache.get(CountingBear, b'b'), [])
+
+        TaskResultCache(None, flush_cache=True)
+        self.assertIsNone(TaskResultCache(None)[CountingBear].get(b'a'))
+
+    def test_unpicklable_results(self):
+        self.cache[CountingBear][b'a'] = [lambda: None]
+        self.cache.write()
+        self.assertIsNone(TaskResultCache(None)[CountingBear].get(b'a'))
+
+    def test_source_changes(self):
+        with prepare_file(['version = 1\n'], None) as (_, filename):
+            class ChangingBear(Bear):
+
+                @classmethod
+                def get_source_files(cls):
+                    return {filename}
+
+            self.cache[ChangingBear][b'a'] = [1]
+            self.cache.write()
+            self.assertEqual(TaskResultCache(None)[ChangingBear].get(b'a'),
+                             [1])
+
+            with open(filename, 'w') as file:
+                file.write('version = 2\n')
+            cache = TaskResultCache(None)
+            self.assertIsNone(cache[ChangingBear].get(b'a'))
+
+            # Outdated results are removed once the cache is written.
+            cache.write()
+            with open(filename, 'w') as file:
+                file.write('version = 1\n')
+            self.assertIsNone(TaskResultCache(None)[ChangingBear].get(b'a'))
+
+    def test_eviction(self):
+        size = len(pickle.dumps([0], protocol=4))
+        cache = TaskResultCache(None, max_size=2 * size)
+        with patch('coalib.misc.Caching.time.time', side_effect=range(100)):
+            for fingerprint in (b'a', b'b', b'c'):
+                cache[CountingBear][fingerprint] = [0]
+                cache.write()
+
+            # ``b'b'`` is used, so ``b'c'`` is the least recently used one
+            # once another result is added.
+            self.assertEqual(cache[CountingBear].get(b'b'), [0])
+            cache[CountingBear][b'd'] = [0]
+            cache.write()
+
+        cache = TaskResultCache(None)
+        self.assertEqual(
+            [fingerprint
+             for fingerprint in (b'a', b'b', b'c', b'd')
+             if fingerprint in cache[CountingBear]],
+            [b'b', b'd'])
+
+    def test_eviction_of_all_results(self):
+        cache = TaskResultCache(None, max_size=1)
+        cache[CountingBear][b'a'] = [0]
+        cache.write()
+        self.assertNotIn(b'a', TaskResultCache(None)[CountingBear])
+
+    def test_missing_source_file(self):
+        class MovedBear(Bear):
+
+            @classmethod
+            def get_source_files(cls):
+                return {os.path.join(os.path.dirname(__file__), 'missing')}
+
+        self.cache[MovedBear][b'a'] = [1]
+        self.cache.write()
+        self.assertEqual(TaskResultCache(None)[MovedBear].get(b'a'), [1])
+
+    def test_version_change(self):
+        self.cache[CountingBear][b'a'] = [1]
+        self.cache.write()
+        with patch('coalib.misc.Caching.VERSION', '0.0.0'):
+            cache = TaskResultCache(None)
+            self.assertIsNone(cache[CountingBear].get(b'a'))
+            cache.write()
+        # Writing the cache removed the results of the other version.
+        self.assertIsNone(TaskResultCache(None)[CountingBear].get(b'a'))
+
+    def test_corrupt_entry(self):
+        self.cache[CountingBear][b'a'] = [1]
+        self.cache[CountingBear][b'b'] = None
+        self.cache.write()
+        connection = self.cache._get_connection()
+        with connection:
+            connection.execute(
+                'UPDATE {} SET results = ? WHERE fingerprint = ?'
+                .format(TaskResultCache.TABLE), (b'corrupt', b'a'))
+
+        cache = TaskResultCache(None)
+        self.assertIsNone(cache[CountingBear].get(b'a'))
+        self.assertIsNone(cache[CountingBear].get(b'b'))
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_database_errors(self):
+        self.cache[CountingBear][b'a'] = [1]
+        self.cache.write()
+        self.cache._get_connection().close()
+        self.cache[CountingBear][b'b'] = [2]
+
+        with self.assertLogs(level='WARNING') as logs:
+            self.assertIsNone(self.cache[CountingBear].get(b'a'))
+            self.cache.write()
+            self.cache.flush_cache()
+        self.assertEqual(len(logs.output), 3)
+        self.assertIn('Unable to read from the cache database', logs.output[0])
+        self.assertIn('Unable to write to the cache database', logs.output[1])
+        self.assertIn('Unable to flush the task result cache', logs.output[2])
+
+        # Nothing was changed.
+        self.assertEqual(TaskResultCache(None)[CountingBear].get(b'a'), [1])
+        self.assertIsNone(TaskResultCache(None)[CountingBear].get(b'b'))
+
+    @patch('coalib.misc.Caching.sqlite3.connect',
+           side_effect=sqlite3.OperationalError('unable to open database'))
+    def test_unopenable_database(self, _):
+        with self.assertLogs(level='WARNING') as logs:
+            cache = TaskResultCache(None)
+            cache[CountingBear][b'a'] = [1]
+            cache.write()
+            self.assertIsNone(cache[CountingBear].get(b'b'))
+        self.assertEqual(logs.output,
+                         ['WARNING:root:Unable to open the cache database: '
+                          'unable to open database. Continuing without '
+                          'caching the results of the core.'])
+
+    @patch('coalib.misc.Caching.get_data_path', return_value=None)
+    def test_inaccessible_database(self, _):
+        cache = TaskResultCache(None, flush_cache=True)
+        cache[CountingBear][b'a'] = [1]
+        cache.write()
+        self.assertIsNone(TaskResultCache(None)[CountingBear].get(b'a'))
+
+    def test_pickle(self):
+        self.cache[CountingBear][b'a'] = [1]
+        self.cache.write()
+        cache = pickle.loads(pickle.dumps(self.cache))
+        self.assertEqual(cache.max_size, self.cache.max_size)
+        self.assertEqual(cache[CountingBear].get(b'a'), [1])
+
+    def test_core(self):
+        file_dict = {'a.py': ('a\n',), 'b.py': ('b\n', 'b\n')}
+
+        def run(file_dict):
+            results = []
+            Core.run({CountingBear(Section('test'), file_dict)},
+                     results.append,
+                     self.cache,
+                     ThreadPoolExecutor(max_workers=1))
+            self.cache.write()
+            return sorted(results)
+
+        self.assertEqual(run(file_dict), [1, 2])
+        self.assertEqual(sorted(CountingBear.executed_tasks),
+                         ['a.py', 'b.py'])
+
+        self.cache = TaskResultCache(None)
+        file_dict['a.py'] = ('a\n', 'a\n', 'a\n')
+        self.assertEqual(run(file_dict), [2, 3])
+        self.assertEqual(sorted(CountingBear.executed_tasks),
+                         ['a.py', 'a.py', 'b.py'])
+        self.assertEqual((self.cache.hits, self.cache.misses), (1, 1))
+
+    def test_caching_core_results(self):
+        with bear_test_module():
+            with prepare_file(['a=(5,6)'], None) as (lines, filename):
+                for _ in range(2):
+                    retval, stdout, stderr = execute_coala(
+                        coala.main,
+                        'coala',
+                        '--non-interactive', '--no-color',
+                        '--core', '--cache-results',
+                        '-c', os.devnull,
+                        '-f', filename,
+                        '-b', 'LineCountTestBear')
+                    self.assertIn('This file has 1 lines.', stdout)
+
+        connection = self.cache._get_connection()
+        self.assertEqual(connection.execute(
+            'SELECT COUNT(*) FROM ' + TaskResultCache.TABLE).fetchone(), (1,))
+
+
 class FileDictFileCacheTest(unittest.TestCase):
 
     def setUp(self):
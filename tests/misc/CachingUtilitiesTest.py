@@ -1,11 +1,13 @@
 import os
+import sqlite3
 import unittest
 
 from pyprint.NullPrinter import NullPrinter
 
 from coalib.misc.CachingUtilities import (
     get_settings_hash, settings_changed, update_settings_db,
-    get_data_path, pickle_load, pickle_dump, delete_files)
+    db_delete, db_get, db_load, db_update, get_data_path, hash_file,
+    pickle_load, pickle_dump, delete_files)
 from coalib.output.printers.LogPrinter import LogPrinter
 from coalib.settings.Section import Section
 
@@ -43,6 +45,16 @@ class CachingUtilitiesTest(unittest.TestCase):
                 self.log_printer, 'coala_test')))
             self.assertFalse(delete_files(self.log_printer, ['coala_test']))
 
+    def test_hash_file(self):
+        file_path = get_data_path(self.log_printer, 'coala_test')
+        with open(file_path, 'wb') as f:
+            f.write(b'coala' * 10)
+
+        self.assertEqual(hash_file(file_path),
+                         hash_file(file_path, chunk_size=3))
+        self.assertEqual(hash_file(file_path),
+                         'b9d3a3a618903718339dce3ee89075e0fae46352')
+
     @unittest.mock.patch('os.makedirs')
     def test_permission_error(self, makedirs):
         makedirs.side_effect = PermissionError
@@ -51,6 +63,98 @@ class CachingUtilitiesTest(unittest.TestCase):
         self.assertFalse(pickle_dump(self.log_printer, 'test', {'answer': 42}))
 
 
+class CacheDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.log_printer = LogPrinter(NullPrinter())
+        db_delete(self.log_printer, 'coala_test')
+
+    def test_update(self):
+        self.assertTrue(db_update(self.log_printer, 'coala_test',
+                                  {'a': 1, 'b': {'c': (2, 3)}}))
+        self.assertTrue(db_update(self.log_printer, 'coala_test', {'a': 4},
+                                  deleted_keys=['nonexistent_key']))
+        self.assertEqual(db_load(self.log_printer, 'coala_test'),
+                         {'a': 4, 'b': {'c': (2, 3)}})
+        self.assertEqual(db_get(self.log_printer, 'coala_test', 'b'),
+                         {'c': (2, 3)})
+        # Other namespaces are not affected
+        self.assertIsNone(db_get(self.log_printer, 'coala_test2', 'a'))
+
+        self.assertTrue(db_delete(self.log_printer, 'coala_test'))
+        self.assertEqual(db_load(self.log_printer, 'coala_test', {}), {})
+
+    def test_corrupt_database(self):
+        db_path = get_data_path(self.log_printer, 'cache_db')
+        with open(db_path, 'wb') as f:
+            f.write(bytes([1] * 1000))
+
+        self.assertEqual(db_load(self.log_printer, 'coala_test', 42), 42)
+        self.assertFalse(os.path.isfile(db_path))
+        self.assertTrue(db_update(self.log_printer, 'coala_test', {'a': 1}))
+        self.assertEqual(db_get(self.log_printer, 'coala_test', 'a'), 1)
+
+        for operation in (lambda: db_get(self.log_printer, 'coala_test', 'a'),
+                          lambda: db_delete(self.log_printer, 'coala_test')):
+            with open(db_path, 'wb') as f:
+                f.write(bytes([1] * 1000))
+            with self.assertLogs(level='WARNING') as logs:
+                self.assertIn(operation(), (None, False))
+            self.assertEqual(logs.output[0],
+                             'WARNING:root:The cache database is corrupted '
+                             'and will be removed.')
+            self.assertRegex(logs.output[1],
+                             'Unable to (read from|write to) the cache '
+                             'database: ')
+            self.assertFalse(os.path.isfile(db_path))
+
+    def test_held_lock(self):
+        self.assertTrue(db_update(self.log_printer, 'coala_test', {'a': 1}))
+        db_path = get_data_path(self.log_printer, 'cache_db')
+        connect = sqlite3.connect
+        lock = connect(db_path)
+        lock.execute('BEGIN EXCLUSIVE')
+        try:
+            with unittest.mock.patch(
+                    'sqlite3.connect',
+                    lambda path, timeout: connect(path, timeout=0)), \
+                    self.assertLogs(level='WARNING') as logs:
+                self.assertEqual(
+                    db_get(self.log_printer, 'coala_test', 'a', 42), 42)
+                self.assertFalse(db_delete(self.log_printer, 'coala_test'))
+        finally:
+            lock.close()
+
+        self.assertEqual(logs.output,
+                         ['WARNING:root:Unable to read from the cache '
+                          'database: database is locked',
+                          'WARNING:root:Unable to write to the cache '
+                          'database: database is locked'])
+        # A lock is no corruption, the entries are kept.
+        self.assertEqual(db_get(self.log_printer, 'coala_test', 'a'), 1)
+
+    def test_unpicklable_value(self):
+        self.assertFalse(db_update(self.log_printer, 'coala_test',
+                                   {'a': lambda: None}))
+        self.assertIsNone(db_get(self.log_printer, 'coala_test', 'a'))
+
+    @unittest.mock.patch('sqlite3.connect')
+    def test_locked_database(self, connect):
+        connect.side_effect = sqlite3.OperationalError('database is locked')
+        self.assertEqual(db_load(self.log_printer, 'coala_test', 42), 42)
+        self.assertEqual(db_get(self.log_printer, 'coala_test', 'a', 42), 42)
+        self.assertFalse(db_update(self.log_printer, 'coala_test', {'a': 1}))
+        self.assertFalse(db_delete(self.log_printer, 'coala_test'))
+
+    @unittest.mock.patch('os.makedirs')
+    def test_permission_error(self, makedirs):
+        makedirs.side_effect = PermissionError
+        self.assertEqual(db_load(self.log_printer, 'coala_test', 42), 42)
+        self.assertEqual(db_get(self.log_printer, 'coala_test', 'a', 42), 42)
+        self.assertFalse(db_update(self.log_printer, 'coala_test', {'a': 1}))
+        self.assertFalse(db_delete(self.log_printer, 'coala_test'))
+
+
 class SettingsTest(unittest.TestCase):
 
     def setUp(self):
@@ -66,6 +170,11 @@ class SettingsTest(unittest.TestCase):
         settings_hash = get_settings_hash(sections)
         self.assertTrue(settings_changed(self.log_printer, settings_hash))
 
+    def test_first_run(self):
+        db_delete(self.log_printer, 'settings_hash_db')
+        self.assertFalse(settings_changed(self.log_printer,
+                                          get_settings_hash({})))
+
     def test_targets_change(self):
         sections = {'a': Section('a'), 'b': Section('b')}
         self.assertNotEqual(get_settings_hash(sections),
@@ -1,10 +1,12 @@
+import asyncio
 from contextlib import ExitStack
 import os
 import sys
 from tempfile import NamedTemporaryFile
 import unittest
 
-from coalib.misc.Shell import run_interactive_shell_command, run_shell_command
+from coalib.misc.Shell import (
+    run_interactive_shell_command, run_shell_command, run_shell_command_async)
 
 
 class RunShellCommandTest(unittest.TestCase):
@@ -91,3 +93,55 @@ class RunShellCommandTest(unittest.TestCase):
     def test_run_shell_command_kwargs_delegation(self):
         with self.assertRaises(TypeError):
             run_shell_command('super-cool-command', weird_parameter2='abc')
+
+
+class RunShellCommandAsyncTest(unittest.TestCase):
+
+    def setUp(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        self.addCleanup(asyncio.set_event_loop, None)
+        self.addCleanup(self.loop.close)
+
+    def run_command(self, command, stdin=None, **kwargs):
+        return self.loop.run_until_complete(run_shell_command_async(
+            command, stdin, loop=self.loop, **kwargs))
+
+    def test_run_shell_command_async_without_stdin(self):
+        command = RunShellCommandTest.construct_testscript_command(
+            'test_program.py')
+
+        stdout, stderr = self.run_command(command)
+
+        self.assertEqual(stdout, ('test_program Z\n'
+                                  'non-interactive mode.\n'
+                                  'Exiting...\n'))
+        self.assertEqual(stderr, '')
+
+    def test_run_shell_command_async_with_stdin(self):
+        command = RunShellCommandTest.construct_testscript_command(
+            'test_input_program.py')
+
+        self.assertEqual(self.run_command(command, '1  4  10  22'),
+                         ('37\n', ''))
+        self.assertEqual(self.run_command(command, '1 p 5'),
+                         ('', 'INVALID INPUT\n'))
+
+    def test_run_shell_command_async_shell(self):
+        self.assertEqual(self.run_command('echo coala', shell=True),
+                         ('coala\n', ''))
+
+    def test_run_shell_command_async_shell_sequence(self):
+        self.assertEqual(self.run_command(['echo', 'coala is great'],
+                                          shell=True),
+                         ('coala is great\n', ''))
+
+    def test_run_shell_command_async_missing_command(self):
+        with self.assertRaises(FileNotFoundError):
+            self.run_command(['some-nonexistent-command', '--version'])
+
+    def test_run_shell_command_async_bytes(self):
+        command = (sys.executable, '-c', 'import sys; print(sys.stdin.read())')
+        self.assertEqual(self.run_command(command, b'coala',
+                                          universal_newlines=False),
+                         (b'coala' + os.linesep.encode(), b''))
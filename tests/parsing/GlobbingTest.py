@@ -17,10 +17,12 @@ GlobTestDir
 import os
 import re
 import unittest
+from unittest.mock import Mock, patch
 
+from coalib.parsing import Globbing
 from coalib.parsing.Globbing import (
     _iter_alternatives, _iter_choices, _position_is_bracketed, fnmatch, glob,
-    glob_escape)
+    glob_escape, iglob_files, GlobSet)
 
 
 class TestFiles:
@@ -230,6 +232,36 @@ class FnmatchTest(unittest.TestCase):
         self._test_fnmatch(pattern, matches, non_matches)
 
 
+class GlobSetTest(unittest.TestCase):
+
+    def test_match(self):
+        uut = GlobSet(['*.py', 'a(b|c)[!d]', '', os.path.join('x', '**')])
+        self.assertEqual(uut.globs,
+                         ('*.py', 'a(b|c)[!d]', '', os.path.join('x', '**')))
+        for name in ('test.py', 'abe', 'ace', '', os.path.join('x', 'y', 'z')):
+            self.assertTrue(uut.match(name), name)
+        for name in (os.path.join('y', 'test.pyc'), 'abd', 'ab',
+                     os.path.join('y', 'x', 'z')):
+            self.assertFalse(uut.match(name), name)
+
+    def test_single_glob(self):
+        uut = GlobSet('*.py')
+        self.assertEqual(uut.globs, ('*.py',))
+        self.assertTrue(uut.match('test.py'))
+        self.assertFalse(uut.match('test.c'))
+
+    def test_same_as_fnmatch(self):
+        globs = ['*.py', '**.c', '(a|b)?', '[[]*', 'x**(y|z)']
+        uut = GlobSet(globs)
+        for name in ('a.py', 'a.c', os.path.join('a', 'b.c'), 'ab', 'cd',
+                     '[x', os.path.join('x', 'z'), 'xa',
+                     os.path.join('a', 'b.py')):
+            self.assertEqual(uut.match(name), fnmatch(name, globs), name)
+
+    def test_empty(self):
+        self.assertFalse(GlobSet([]).match(''))
+
+
 class GlobTest(unittest.TestCase):
 
     def setUp(self):
@@ -376,3 +408,133 @@ class GlobTest(unittest.TestCase):
         file_list = sorted([os.path.normcase(f) for f in file_list])
         self.assertEqual(results, file_list)
         os.curdir = old_curdir
+
+
+class IglobFilesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.maxDiff = None
+
+    def _test_iglob_files(self, globs, ignored_globs, file_list):
+        results = sorted(
+            os.path.normcase(filename)
+            for filename, glob in iglob_files(globs, ignored_globs)
+            if re.search(r'(__pycache__|\.pyc)', filename) is None)
+        file_list = sorted(os.path.normcase(f) for f in file_list)
+        self.assertEqual(results, file_list)
+
+    def test_same_as_glob(self):
+        for pattern in (os.path.join('Sub*', 'File1?.py'),
+                        '*',
+                        os.path.join('**', '*'),
+                        '**',
+                        '**.(py|[xy])',
+                        os.path.join('SubDir[12]',
+                                     'File[[]with[]]brackets.txt'),
+                        os.path.join('SubDir1', 'File12.py'),
+                        os.path.join('SubDir1', '**', 'File12.py'),
+                        'NOPE'):
+            pattern = os.path.join(TestFiles.glob_test_dir, pattern)
+            with self.subTest(pattern=pattern):
+                self._test_iglob_files(
+                    pattern, None,
+                    filter(os.path.isfile, glob(pattern)))
+
+    def test_multiple_globs(self):
+        globs = [os.path.join(TestFiles.glob_test_dir, 'File?.(x|y)'),
+                 os.path.join(TestFiles.dir1, '*'),
+                 TestFiles.file3]
+        results = [(filename, glob)
+                   for filename, glob in iglob_files(globs)
+                   if re.search(r'(__pycache__|\.pyc)', filename) is None]
+        self.assertEqual(sorted(results),
+                         sorted([(TestFiles.file1, globs[0]),
+                                 (TestFiles.file2, globs[0]),
+                                 (TestFiles.file11, globs[1]),
+                                 (TestFiles.file12, globs[1]),
+                                 (TestFiles.file3, globs[2])]))
+
+    def test_ignored(self):
+        self._test_iglob_files(
+            os.path.join(TestFiles.glob_test_dir, '**'),
+            [os.path.join(TestFiles.glob_test_dir, 'SubDir1'),
+             os.path.join(TestFiles.glob_test_dir, '*.x'),
+             os.path.join(TestFiles.dir2, '*brackets*')],
+            [TestFiles.file2, TestFiles.file3, TestFiles.file_paren])
+
+    def test_ignored_root(self):
+        self._test_iglob_files(
+            [os.path.join(TestFiles.dir1, '*'), TestFiles.file_paren],
+            [TestFiles.dir1 + os.sep, os.path.join(TestFiles.dir2, '*')],
+            [])
+
+    def test_ignored_parent(self):
+        self._test_iglob_files(
+            [TestFiles.file11, os.path.join(TestFiles.dir1, '*.py')],
+            [TestFiles.dir1],
+            [])
+
+    def test_ignored_absolute(self):
+        self._test_iglob_files(
+            os.path.join(TestFiles.dir1, '*'),
+            [os.sep + 'NOPE*'],
+            [TestFiles.file11, TestFiles.file12])
+
+    def test_missing_root(self):
+        self._test_iglob_files(
+            os.path.join(TestFiles.glob_test_dir, 'NOPE', '*'), None, [])
+
+    def test_unreadable_entry(self):
+        entries = [Mock(is_dir=Mock(side_effect=OSError)),
+                   Mock(is_dir=Mock(return_value=False),
+                        is_file=Mock(return_value=True))]
+        entries[0].name = 'unreadable'
+        entries[1].name = 'File11.py'
+        with patch('os.scandir', return_value=entries):
+            self._test_iglob_files(
+                os.path.join(TestFiles.dir1, '*'), None, [TestFiles.file11])
+
+    def test_pruned_directories(self):
+        with patch.object(Globbing, '_iter_entries',
+                          wraps=Globbing._iter_entries) as iter_entries:
+            list(iglob_files([os.path.join(TestFiles.glob_test_dir,
+                                           '**', '*.py'),
+                              os.path.join(TestFiles.glob_test_dir,
+                                           '*.x')],
+                             [os.path.join(TestFiles.glob_test_dir,
+                                           'SubDir2', '')]))
+        self.assertEqual(sorted(call[0][0]
+                                for call in iter_entries.call_args_list),
+                         [TestFiles.glob_test_dir, TestFiles.dir1])
+
+        with patch.object(Globbing, '_iter_entries',
+                          wraps=Globbing._iter_entries) as iter_entries:
+            list(iglob_files(os.path.join(TestFiles.glob_test_dir,
+                                          'SubDir1', '*.py')))
+        self.assertEqual(sorted(call[0][0]
+                                for call in iter_entries.call_args_list),
+                         [TestFiles.dir1])
+
+    def test_no_dirname(self):
+        old_curdir = os.curdir
+        os.curdir = TestFiles.glob_test_dir
+        try:
+            results = sorted(filename for filename, glob
+                             in iglob_files(['*.x', 'File2.?']))
+        finally:
+            os.curdir = old_curdir
+        self.assertEqual(results, ['File1.x', 'File2.y'])
+
+    def test_relative_roots(self):
+        old_cwd = os.getcwd()
+        os.chdir(TestFiles.glob_test_dir)
+        try:
+            results = sorted(filename for filename, glob
+                             in iglob_files(['*.x',
+                                             os.path.join('SubDir1', '*2.py'),
+                                             os.path.join('**', '*1.py')]))
+        finally:
+            os.chdir(old_cwd)
+        self.assertEqual(results, ['File1.x',
+                                   os.path.join('SubDir1', 'File11.py'),
+                                   os.path.join('SubDir1', 'File12.py')])
@@ -1,12 +1,15 @@
-import multiprocessing
+import os
 import queue
 import unittest
+from unittest.mock import patch
 
 from coalib.bears.GlobalBear import GlobalBear
 from coalib.bears.LocalBear import LocalBear
+from coalib.misc.Caching import ResultCache
 from coalib.processes.BearRunning import (
     LOG_LEVEL, LogMessage, run, send_msg, task_done)
 from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
+from coalib.processes.communication.ResultBatcher import ResultBatcher
 from coalib.results.Result import RESULT_SEVERITY, Result
 from coalib.settings.Section import Section
 from coalib.settings.Setting import Setting
@@ -92,6 +95,19 @@ class GlobalTestBear(GlobalBear):
         return result
 
 
+class BatchBear(LocalBear):
+
+    BATCH_SIZE = 2
+
+    def prepare_batch(self, file_dict):
+        self.batch = list(file_dict)
+
+    def run(self, filename, file):
+        return [Result.from_values('BatchBear',
+                                   'batch: ' + ', '.join(self.batch),
+                                   filename)]
+
+
 class UnexpectedBear1(LocalBear):
 
     def run(self, filename, file):
@@ -115,11 +131,10 @@ class BearRunningUnitTest(unittest.TestCase):
         self.global_bear_list = []
         self.global_bear_queue = queue.Queue()
         self.file_dict = {}
-        manager = multiprocessing.Manager()
-        self.local_result_dict = manager.dict()
-        self.global_result_dict = manager.dict()
+        self.global_result_dict = {}
         self.message_queue = queue.Queue()
         self.control_queue = queue.Queue()
+        self.local_result_dict = ResultBatcher(self.control_queue)
 
     def test_queue_done_marking(self):
         self.message_queue.put('test')
@@ -151,8 +166,7 @@ class BearRunningUnitTest(unittest.TestCase):
         self.global_bear_list.append(DependentGlobalBear({},
                                                          self.settings,
                                                          self.message_queue))
-        self.global_bear_queue.put(1)
-        self.global_bear_queue.put(0)
+        self.global_bear_queue.put([0, 1])
         self.file_name_queue.put('t')
         self.file_dict['t'] = []
 
@@ -173,6 +187,129 @@ class BearRunningUnitTest(unittest.TestCase):
         except queue.Empty:
             pass
 
+    def test_unmet_global_dependencies(self):
+        self.global_bear_list.append(DependentGlobalBear({},
+                                                         self.settings,
+                                                         self.message_queue))
+        self.global_bear_queue.put([0])
+
+        run(self.file_name_queue,
+            self.local_bear_list,
+            self.global_bear_list,
+            self.global_bear_queue,
+            self.file_dict,
+            self.local_result_dict,
+            self.global_result_dict,
+            self.message_queue,
+            self.control_queue)
+
+        msg = self.message_queue.get(timeout=0)
+        self.assertEqual(msg.log_level, LOG_LEVEL.WARNING)
+        self.assertIn('DependentGlobalBear', msg.message)
+        self.assertEqual(self.global_result_dict,
+                         {'DependentGlobalBear': None})
+
+    def test_end_of_queues(self):
+        self.local_bear_list.append(SimpleBear(self.settings,
+                                               self.message_queue))
+        self.global_bear_list.append(SimpleGlobalBear({},
+                                                      self.settings,
+                                                      self.message_queue))
+        self.file_dict['t'] = []
+        for elem in ('t', None, 't'):
+            self.file_name_queue.put(elem)
+        for elem in ([0], None, [0]):
+            self.global_bear_queue.put(elem)
+
+        # The queues are read until None even with an infinite timeout
+        run(self.file_name_queue,
+            self.local_bear_list,
+            self.global_bear_list,
+            self.global_bear_queue,
+            self.file_dict,
+            self.local_result_dict,
+            self.global_result_dict,
+            self.message_queue,
+            self.control_queue,
+            timeout=None)
+
+        self.assertEqual(self.file_name_queue.get(timeout=0), 't')
+        self.assertEqual(self.global_bear_queue.get(timeout=0), [0])
+        control_elements = []
+        while not self.control_queue.empty():
+            control_elements.append(self.control_queue.get(timeout=0)[0])
+        self.assertEqual(control_elements,
+                         [CONTROL_ELEMENT.LOCAL,
+                          CONTROL_ELEMENT.LOCAL_FINISHED,
+                          CONTROL_ELEMENT.GLOBAL,
+                          CONTROL_ELEMENT.GLOBAL_FINISHED])
+
+    def test_tasks(self):
+        self.local_bear_list.append(SimpleBear(self.settings,
+                                               self.message_queue))
+        self.local_bear_list.append(LocalTestBear(self.settings,
+                                                  self.message_queue))
+        self.file_dict[__file__] = ['line\n']
+        self.file_name_queue.put((__file__, [1]))
+        self.file_name_queue.put((__file__, [0]))
+        self.file_name_queue.put(__file__)
+
+        run(self.file_name_queue,
+            self.local_bear_list,
+            self.global_bear_list,
+            self.global_bear_queue,
+            self.file_dict,
+            ResultBatcher(self.control_queue, max_results=1),
+            self.global_result_dict,
+            self.message_queue,
+            self.control_queue)
+
+        origins = []
+        for i in range(3):
+            control_elem, [(filename, results)] = self.control_queue.get(
+                timeout=0)
+            self.assertEqual(control_elem, CONTROL_ELEMENT.LOCAL)
+            self.assertEqual(filename, __file__)
+            origins.append([result.origin for result in results])
+        self.assertEqual(origins,
+                         [['LocalTestBear'],
+                          ['SimpleBear', 'FakeBear', 'SimpleBear'],
+                          ['SimpleBear', 'FakeBear', 'SimpleBear',
+                           'LocalTestBear']])
+
+        control_elem, timings = self.control_queue.get(timeout=0)
+        self.assertEqual(control_elem, CONTROL_ELEMENT.LOCAL_FINISHED)
+        self.assertEqual(sorted(timings), ['LocalTestBear', 'SimpleBear'])
+        size = os.path.getsize(__file__)
+        self.assertEqual(timings['LocalTestBear'][1], 2 * size)
+        self.assertGreaterEqual(timings['LocalTestBear'][0], 0)
+
+    def test_batch_tasks(self):
+        self.local_bear_list.append(BatchBear(self.settings,
+                                              self.message_queue))
+        self.local_bear_list.append(SimpleBear(self.settings,
+                                               self.message_queue))
+        self.file_dict['a'] = ['line\n']
+        self.file_dict['b'] = ['line\n']
+        self.file_name_queue.put((('a', 'b', 'non_existent_file'), [0, 1]))
+
+        run(self.file_name_queue,
+            self.local_bear_list,
+            self.global_bear_list,
+            self.global_bear_queue,
+            self.file_dict,
+            ResultBatcher(self.control_queue, max_results=1),
+            self.global_result_dict,
+            self.message_queue,
+            self.control_queue)
+
+        for filename in ('a', 'b'):
+            control_elem, [(result_file, results)] = self.control_queue.get(
+                timeout=0)
+            self.assertEqual(result_file, filename)
+            self.assertEqual(results[0].message, 'batch: a, b')
+            self.assertEqual(len(results), 4)
+
     def test_evil_bear(self):
         self.settings.append(Setting('cls', 'NotImplementedError'))
 
@@ -308,11 +445,10 @@ d
         self.global_bear_list = []
         self.global_bear_queue = queue.Queue()
         self.file_dict = {}
-        manager = multiprocessing.Manager()
-        self.local_result_dict = manager.dict()
-        self.global_result_dict = manager.dict()
+        self.global_result_dict = {}
         self.message_queue = queue.Queue()
         self.control_queue = queue.Queue()
+        self.local_result_dict = ResultBatcher(self.control_queue)
 
         self.file1 = 'file1'
         self.file2 = 'arbitrary'
@@ -329,8 +465,18 @@ d
                                                     self.settings,
                                                     self.message_queue))
         self.global_bear_list.append('not a valid bear')
-        self.global_bear_queue.put(0)
-        self.global_bear_queue.put(1)
+        self.global_bear_queue.put([0])
+        self.global_bear_queue.put([1])
+
+    def get_local_results(self):
+        local_results = {}
+        while True:
+            control_elem, batch = self.control_queue.get(timeout=0)
+            if control_elem == CONTROL_ELEMENT.LOCAL_FINISHED:
+                return local_results
+
+            self.assertEqual(control_elem, CONTROL_ELEMENT.LOCAL)
+            local_results.update(batch)
 
     def test_run(self):
         run(self.file_name_queue,
@@ -356,16 +502,12 @@ d
         for msg in expected_messages:
             self.assertEqual(msg, self.message_queue.get(timeout=0).log_level)
 
-        local_result_expected = [[],
-                                 [Result.from_values('LocalTestBear',
-                                                     'something went wrong',
-                                                     'arbitrary')]
-                                 ]
-        for expected in local_result_expected:
-            control_elem, index = self.control_queue.get()
-            self.assertEqual(control_elem, CONTROL_ELEMENT.LOCAL)
-            real = self.local_result_dict[index]
-            self.assertEqual(real, expected)
+        local_result_expected = {
+            self.file1: [],
+            self.file2: [Result.from_values('LocalTestBear',
+                                            'something went wrong',
+                                            'arbitrary')]}
+        self.assertEqual(self.get_local_results(), local_result_expected)
 
         global_results_expected = [Result.from_values(
                                        'GlobalTestBear',
@@ -378,11 +520,9 @@ d
                                        'arbitrary',
                                        severity=RESULT_SEVERITY.INFO)]
 
-        control_elem, index = self.control_queue.get()
-        self.assertEqual(control_elem, CONTROL_ELEMENT.LOCAL_FINISHED)
-        control_elem, index = self.control_queue.get()
+        control_elem, (bearname, real) = self.control_queue.get()
         self.assertEqual(control_elem, CONTROL_ELEMENT.GLOBAL)
-        real = self.global_result_dict[index]
+        self.assertEqual(bearname, 'GlobalTestBear')
         self.assertEqual(sorted(global_results_expected), sorted(real))
 
         control_elem, none = self.control_queue.get(timeout=0)
@@ -391,7 +531,51 @@ d
 
         # The invalid bear gets a None in that dict for dependency resolution
         self.assertEqual(len(self.global_result_dict), 2)
-        self.assertEqual(len(self.local_result_dict),
-                         len(local_result_expected))
         self.assertRaises(queue.Empty, self.message_queue.get, timeout=0)
         self.assertRaises(queue.Empty, self.control_queue.get, timeout=0)
+
+    def test_run_result_cache(self):
+        result_cache = ResultCache(None, 'coala_test', flush_cache=True)
+        self.global_bear_queue = queue.Queue()
+        run(self.file_name_queue,
+            self.local_bear_list,
+            [],
+            self.global_bear_queue,
+            self.file_dict,
+            self.local_result_dict,
+            self.global_result_dict,
+            self.message_queue,
+            self.control_queue,
+            result_cache=result_cache)
+
+        expected = [Result.from_values('LocalTestBear',
+                                       'something went wrong',
+                                       'arbitrary')]
+        bear = self.local_bear_list[0]
+        # Results of failing bears are not cached
+        self.assertIsNone(result_cache.get(bear,
+                                           self.file1,
+                                           self.file_dict[self.file1]))
+        self.assertEqual(result_cache.get(bear,
+                                          self.file2,
+                                          self.file_dict[self.file2]),
+                         expected)
+
+        self.get_local_results()
+        self.assertEqual(self.control_queue.get(timeout=0),
+                         (CONTROL_ELEMENT.GLOBAL_FINISHED, None))
+        self.file_name_queue.put(self.file2)
+        with patch('coalib.processes.BearRunning.run_bear') as mock_run:
+            run(self.file_name_queue,
+                self.local_bear_list,
+                [],
+                self.global_bear_queue,
+                self.file_dict,
+                self.local_result_dict,
+                self.global_result_dict,
+                self.message_queue,
+                self.control_queue,
+                result_cache=result_cache)
+            self.assertFalse(mock_run.called)
+
+        self.assertEqual(self.get_local_results(), {self.file2: expected})
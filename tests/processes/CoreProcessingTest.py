@@ -0,0 +1,278 @@
+import concurrent.futures
+import inspect
+import os
+import pickle
+import queue
+import sys
+import unittest
+
+from pyprint.ConsolePrinter import ConsolePrinter
+
+from coalib.bearlib.abstractions.Linter import linter
+from coalib.bears.GlobalBear import GlobalBear
+from coalib.bears.LocalBear import LocalBear
+from coalib.output.printers.LogPrinter import LogPrinter
+from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
+from coalib.processes.CoreProcessing import (
+    adapt_legacy_bear, execute_section_with_core, get_runnable_bears,
+    run_core, LegacyGlobalBearAdapter, LegacyLinterAdapter,
+    LegacyLocalBearAdapter)
+from coalib.results.Result import Result
+from coalib.settings.ConfigurationGathering import gather_configuration
+from coalib.settings.Section import Section
+from coalib.settings.Setting import Setting
+
+
+class LineCountBear(LocalBear):
+
+    def run(self, filename, file):
+        yield self.new_result('{} lines'.format(len(file)), file=filename)
+
+
+class LineCountDependentBear(LocalBear):
+    BEAR_DEPS = {LineCountBear}
+
+    def run(self, filename, file, dependency_results):
+        for result in dependency_results['LineCountBear']:
+            yield self.new_result('Depends on ' + result.message,
+                                  file=filename)
+
+
+@linter(sys.executable, output_format='regex',
+        output_regex=r'(?P<message>.+)')
+class LineCountLinterBear:
+
+    @staticmethod
+    def create_arguments(filename, file, config_file):
+        return '-c', 'print("{} lines")'.format(len(file))
+
+
+class FileCountBear(GlobalBear):
+
+    def run(self):
+        self.warn('Counting files')
+        yield Result(self, '{} files'.format(len(self.file_dict)))
+
+
+class FileCountDependentBear(GlobalBear):
+    BEAR_DEPS = {FileCountBear}
+
+    def run(self, dependency_results):
+        for result in dependency_results['FileCountBear']:
+            yield Result(self, 'Depends on ' + result.message)
+
+
+class CoreProcessingTest(unittest.TestCase):
+
+    def setUp(self):
+        config_path = os.path.abspath(os.path.join(
+            os.path.dirname(__file__),
+            'section_executor_test_files',
+            '.coafile'))
+        self.testcode_c_path = os.path.join(os.path.dirname(config_path),
+                                            'testcode.c')
+        self.result_queue = queue.Queue()
+        self.console_printer = ConsolePrinter()
+
+        (self.sections,
+         self.local_bears,
+         self.global_bears,
+         targets) = gather_configuration(lambda *args: True,
+                                         LogPrinter(ConsolePrinter()),
+                                         arg_list=['--config',
+                                                   config_path])
+
+        self.section = Section('test')
+        self.section.append(Setting('files', self.testcode_c_path))
+        self.section.append(Setting('jobs', '1'))
+        self.file_dict = {'a.py': ['first\n', 'second\n'],
+                          'b.py': ['first\n']}
+
+    def execute_section(self, section, global_bears, local_bears):
+        return execute_section_with_core(
+            section,
+            global_bears,
+            local_bears,
+            lambda *args: self.result_queue.put(args[2]),
+            None,
+            None,
+            self.console_printer)
+
+    def test_adapt_legacy_bear(self):
+        adapter = adapt_legacy_bear(FileCountBear)
+        self.assertIs(adapter, adapt_legacy_bear(FileCountBear))
+        self.assertTrue(issubclass(adapter, LegacyGlobalBearAdapter))
+        self.assertEqual(adapter.name, 'FileCountBear')
+        self.assertEqual(adapter.BEAR_DEPS, set())
+        self.assertEqual(adapt_legacy_bear(FileCountDependentBear).BEAR_DEPS,
+                         {adapter})
+        self.assertTrue(issubclass(adapt_legacy_bear(LineCountBear),
+                                   LegacyLocalBearAdapter))
+        self.assertFalse(issubclass(adapt_legacy_bear(LineCountBear),
+                                    LegacyLinterAdapter))
+        self.assertTrue(issubclass(adapt_legacy_bear(LineCountLinterBear),
+                                   LegacyLinterAdapter))
+
+    def test_adapter_source_files(self):
+        source_files = adapt_legacy_bear(FileCountBear).get_source_files()
+        self.assertIn(os.path.abspath(__file__), source_files)
+        self.assertIn(inspect.getsourcefile(LegacyGlobalBearAdapter),
+                      source_files)
+
+    def test_global_tasks_depend_on_files(self):
+        def get_tasks(file_dict):
+            return list(adapt_legacy_bear(FileCountBear)(
+                self.section, file_dict).generate_tasks())
+
+        self.assertEqual(get_tasks(self.file_dict),
+                         get_tasks(dict(self.file_dict)))
+        self.assertNotEqual(get_tasks(self.file_dict),
+                            get_tasks({'a.py': ['first\n']}))
+
+    def test_pickle_adapter(self):
+        uut = adapt_legacy_bear(LineCountBear)(self.section, self.file_dict)
+        self.assertIsInstance(uut.legacy_bear, LineCountBear)
+
+        loaded = pickle.loads(pickle.dumps(uut))
+        self.assertIs(type(loaded), type(uut))
+        self.assertEqual(loaded.file_dict, {})
+        self.assertEqual(loaded.settings_hash, uut.settings_hash)
+        self.assertEqual(
+            loaded.execute_task(*next(iter(uut.generate_tasks())))[0][:2],
+            ('LineCountBear', 'a.py'))
+
+    def test_execute_section(self):
+        results = self.execute_section(self.sections['cli'],
+                                       self.global_bears['cli'],
+                                       self.local_bears['cli'])
+        self.assertTrue(results[0])
+        self.assertEqual(list(results[1]), [self.testcode_c_path])
+        self.assertEqual(
+            [result.message for result in results[1][self.testcode_c_path]],
+            ['test msg'])
+        self.assertEqual(list(results[2]), ['ProcessingGlobalTestBear'])
+        self.assertEqual(
+            [result.message
+             for result in results[2]['ProcessingGlobalTestBear']],
+            ['test message'])
+        self.assertEqual(list(results[3]), [self.testcode_c_path])
+
+        results = self.execute_section(self.sections['raw'],
+                                       self.global_bears['raw'],
+                                       self.local_bears['raw'])
+        self.assertTrue(results[0])
+        self.assertEqual(list(results[2]),
+                         ['ProcessingGlobalTestRawFileBear'])
+
+    def test_instantiate_legacy_bear(self):
+        message_queue = queue.Queue()
+        legacy_bear = adapt_legacy_bear(
+            LineCountBear).instantiate_legacy_bear(
+                self.section, self.file_dict, message_queue)
+        self.assertIsInstance(legacy_bear, LineCountBear)
+        self.assertIs(legacy_bear.section, self.section)
+        self.assertIs(legacy_bear.message_queue, message_queue)
+
+        legacy_bear = adapt_legacy_bear(
+            FileCountBear).instantiate_legacy_bear(
+                self.section, self.file_dict, message_queue)
+        self.assertIsInstance(legacy_bear, FileCountBear)
+        self.assertIs(legacy_bear.file_dict, self.file_dict)
+
+    def test_invalid_jobs(self):
+        section = self.sections['cli']
+        section.append(Setting('jobs', 'many'))
+        with self.assertLogs(level='WARNING') as logs:
+            results = self.execute_section(section,
+                                           self.global_bears['cli'],
+                                           self.local_bears['cli'])
+        self.assertIn("WARNING:root:Unable to convert setting 'jobs' into a "
+                      'number. Falling back to CPU count.',
+                      logs.output)
+        self.assertEqual(list(results[1]), [self.testcode_c_path])
+
+    def test_mixed_raw_files(self):
+        with self.assertLogs(level='ERROR'):
+            results = self.execute_section(self.sections['mixed'],
+                                           self.global_bears['mixed'],
+                                           self.local_bears['mixed'])
+        self.assertEqual(results, ((), {}, {}, {}))
+
+    def test_dependencies(self):
+        with self.assertLogs(level='WARNING') as logs:
+            results = self.execute_section(
+                self.section,
+                [FileCountBear, FileCountDependentBear],
+                [LineCountBear, LineCountDependentBear])
+
+        self.assertIn('WARNING:root:Counting files', logs.output)
+        self.assertEqual(
+            sorted(result.message
+                   for result in results[1][self.testcode_c_path]),
+            ['1 lines', 'Depends on 1 lines'])
+        self.assertEqual(
+            {bear: [result.message for result in bear_results]
+             for bear, bear_results in results[2].items()},
+            {'FileCountBear': ['1 files'],
+             'FileCountDependentBear': ['Depends on 1 files']})
+
+    def test_unmet_dependencies(self):
+        bears = [adapt_legacy_bear(bear)(self.section, self.file_dict)
+                 for bear in (LineCountDependentBear,
+                              FileCountDependentBear,
+                              FileCountBear)]
+        with self.assertLogs(level='WARNING') as logs:
+            self.assertEqual(get_runnable_bears(bears), bears[1:])
+
+        self.assertEqual(logs.output,
+                         ['WARNING:root:The dependencies of the bear '
+                          'LineCountDependentBear are not met. Leaving it '
+                          'out...'])
+
+    def test_run_core(self):
+        control_queue = queue.Queue()
+        bears = [adapt_legacy_bear(bear)(self.section, self.file_dict)
+                 for bear in (LineCountBear, FileCountBear)]
+        with self.assertLogs(level='WARNING'):
+            run_core(bears,
+                     control_queue,
+                     executor=concurrent.futures.ThreadPoolExecutor())
+
+        local_results = {}
+        control_elem, payload = control_queue.get(timeout=0)
+        # The results may be sent in several batches
+        while control_elem == CONTROL_ELEMENT.LOCAL:
+            for filename, results in payload:
+                local_results.setdefault(filename, []).extend(
+                    result.message for result in results)
+            control_elem, payload = control_queue.get(timeout=0)
+        self.assertEqual(local_results,
+                         {'a.py': ['2 lines'], 'b.py': ['1 lines']})
+
+        self.assertEqual(control_elem, CONTROL_ELEMENT.GLOBAL)
+        bear_name, results = payload
+        self.assertEqual(bear_name, 'FileCountBear')
+        self.assertEqual([result.message for result in results], ['2 files'])
+        self.assertEqual(control_queue.get(timeout=0),
+                         (CONTROL_ELEMENT.GLOBAL_FINISHED, None))
+        self.assertEqual(control_queue.get(timeout=0),
+                         (CONTROL_ELEMENT.LOCAL_FINISHED, None))
+
+    def test_run_core_linter(self):
+        control_queue = queue.Queue()
+        bear = adapt_legacy_bear(LineCountLinterBear)(self.section,
+                                                      self.file_dict)
+        run_core([bear],
+                 control_queue,
+                 executor=concurrent.futures.ThreadPoolExecutor())
+
+        local_results = {}
+        control_elem, payload = control_queue.get(timeout=0)
+        while control_elem == CONTROL_ELEMENT.LOCAL:
+            for filename, results in payload:
+                local_results.setdefault(filename, []).extend(
+                    result.message for result in results)
+            control_elem, payload = control_queue.get(timeout=0)
+        self.assertEqual(local_results,
+                         {'a.py': ['2 lines'], 'b.py': ['1 lines']})
+        self.assertEqual(control_elem, CONTROL_ELEMENT.GLOBAL_FINISHED)
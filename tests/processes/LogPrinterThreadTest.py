@@ -26,3 +26,15 @@ class LogPrinterThreadTest(unittest.TestCase):
             ('root', 'INFO', 'Sample message 2'),
             ('root', 'INFO', 'Sample message 3')
         )
+
+    def test_stop(self):
+        log_queue = queue.Queue()
+        self.uut = LogPrinterThread(log_queue)
+        log_queue.put(item='Sample message')
+        log_queue.put(item=None)
+        log_queue.put(item='Not printed')
+        with LogCapture() as capture:
+            self.uut.start()
+            self.uut.join()
+        capture.check(('root', 'INFO', 'Sample message'))
+        self.assertEqual(log_queue.get(timeout=0), 'Not printed')
@@ -0,0 +1,147 @@
+import os
+import pickle
+import queue
+import unittest
+from unittest.mock import Mock, patch
+
+from pyprint.ConsolePrinter import ConsolePrinter
+
+from coalib.output.printers.LogPrinter import LogPrinter
+from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
+from coalib.processes.Processing import execute_section
+from coalib.processes.ProcessPool import (
+    ProcessPool, dump_job, load_job, work)
+from coalib.processes.communication.ResultBatcher import ResultBatcher
+from coalib.settings.ConfigurationGathering import gather_configuration
+from coalib.settings.Setting import Setting
+
+
+class ProcessPoolTest(unittest.TestCase):
+
+    def setUp(self):
+        config_path = os.path.abspath(os.path.join(
+            os.path.dirname(__file__),
+            'section_executor_test_files',
+            '.coafile'))
+        self.result_queue = queue.Queue()
+        self.console_printer = ConsolePrinter()
+
+        (self.sections,
+         self.local_bears,
+         self.global_bears,
+         targets) = gather_configuration(lambda *args: True,
+                                         LogPrinter(ConsolePrinter()),
+                                         arg_list=['--config',
+                                                   config_path])
+        self.uut = ProcessPool()
+
+    def tearDown(self):
+        self.uut.close()
+
+    def execute_section(self, name, jobs):
+        self.sections[name].append(Setting('jobs', str(jobs)))
+        return execute_section(self.sections[name],
+                               self.global_bears[name],
+                               self.local_bears[name],
+                               lambda *args: self.result_queue.put(args[2]),
+                               None,
+                               None,
+                               console_printer=self.console_printer,
+                               pool=self.uut)
+
+    def test_run_sections(self):
+        results = self.execute_section('cli', 2)
+        processes = self.uut.processes
+        self.assertEqual(len(processes), 2)
+        self.assertTrue(all(process.is_alive() for process in processes))
+        self.assertTrue(results[0])
+        self.assertEqual(len(results[1]), 1)
+        self.assertEqual(list(results[2]), ['ProcessingGlobalTestBear'])
+
+        results = self.execute_section('raw', 2)
+        self.assertIs(self.uut.processes, processes)
+        self.assertEqual(self.uut.temporary_processes, [])
+        self.assertTrue(results[0])
+        self.assertEqual(list(results[2]),
+                         ['ProcessingGlobalTestRawFileBear'])
+
+        self.uut.close()
+        self.assertEqual(self.uut.processes, [])
+        self.assertFalse(any(process.is_alive() for process in processes))
+        self.assertFalse(self.uut.logger_thread.is_alive())
+
+    def test_different_job_count(self):
+        self.execute_section('cli', 1)
+        processes = self.uut.processes
+
+        results = self.execute_section('raw', 2)
+        self.assertIs(self.uut.processes, processes)
+        self.assertEqual(len(self.uut.temporary_processes), 2)
+        self.assertTrue(results[0])
+        self.assertEqual(list(results[2]),
+                         ['ProcessingGlobalTestRawFileBear'])
+
+        self.uut.close()
+        self.assertEqual(self.uut.temporary_processes, [])
+
+    def test_unpicklable_job(self):
+        queues = self.uut.queues
+        self.assertRaises((AttributeError, pickle.PicklingError),
+                          dump_job,
+                          {'message_queue': queues['message_queue'],
+                           'unpicklable': lambda: None},
+                          queues)
+
+        run_kwargs = dict(queues,
+                          local_bear_list=[],
+                          global_bear_list=[],
+                          file_dict={},
+                          local_result_dict=ResultBatcher(
+                              queues['control_queue']),
+                          global_result_dict={'unpicklable': lambda: None},
+                          timeout=0.1)
+        queues['file_name_queue'].put(None)
+        queues['global_bear_queue'].put(None)
+        processes = self.uut.run(1, run_kwargs)
+        self.assertEqual(self.uut.processes, [])
+        self.assertIs(processes, self.uut.temporary_processes)
+        self.assertEqual(queues['control_queue'].get(timeout=10),
+                         (CONTROL_ELEMENT.LOCAL_FINISHED, {}))
+        self.assertEqual(queues['control_queue'].get(timeout=10),
+                         (CONTROL_ELEMENT.GLOBAL_FINISHED, None))
+
+    def test_dump_job(self):
+        queues = self.uut.queues
+        job = dump_job({'message_queue': queues['message_queue']}, queues)
+        self.assertIs(load_job(job, queues)['message_queue'],
+                      queues['message_queue'])
+
+    def test_context_manager(self):
+        self.uut.close()
+        with ProcessPool() as pool:
+            self.uut = pool
+            self.execute_section('cli', 2)
+            processes = pool.processes
+
+        self.assertEqual(pool.processes, [])
+        self.assertFalse(any(process.is_alive() for process in processes))
+        self.assertFalse(pool.logger_thread.is_alive())
+
+    def test_work(self):
+        message_queue = queue.Queue()
+        job_queue = queue.Queue()
+        job_queue.put(dump_job({'message_queue': message_queue,
+                                'timeout': 0.1},
+                               {'message_queue': message_queue}))
+        job_queue.put(None)
+        with patch('coalib.processes.ProcessPool.run') as run:
+            work(job_queue, message_queue=message_queue)
+        run.assert_called_once_with(message_queue=message_queue, timeout=0.1)
+        self.assertTrue(job_queue.empty())
+
+    def test_work_interrupted(self):
+        # All processes of the process group get the signal of CTRL-C, the
+        # workers stop without a traceback then.
+        job_queue = Mock(get=Mock(side_effect=KeyboardInterrupt))
+        self.assertIsNone(work(job_queue))
+        job_queue.get.assert_called_once_with()
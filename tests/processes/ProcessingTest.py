@@ -7,20 +7,27 @@ import queue
 import subprocess
 import sys
 import unittest
+from unittest.mock import patch
 
 from pyprint.ConsolePrinter import ConsolePrinter
 
+from coala_utils.ContextManagers import make_temp
 from testfixtures import LogCapture, StringComparison
 
 from coalib.bears.Bear import Bear
+from coalib.bears.GlobalBear import GlobalBear
+from coalib.bears.LocalBear import LocalBear
 from coalib.output.printers.LogPrinter import LogPrinter
+from coalib.parsing.Globbing import fnmatch
 from coalib.output.printers.ListLogPrinter import ListLogPrinter
 from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
 from coalib.processes.Processing import (
     ACTIONS, autoapply_actions, check_result_ignore, create_process_group,
-    execute_section, get_default_actions, get_file_dict, print_result,
+    execute_section, get_default_actions, get_file_dict,
+    get_file_ignore_ranges, get_bear_groups, get_local_tasks, print_result,
     process_queues, simplify_section_result, yield_ignore_ranges,
-    instantiate_bears)
+    instantiate_bears, instantiate_processes, FileDict, IgnoreRangeIndex)
+from coalib.results.Diff import Diff
 from coalib.results.HiddenResult import HiddenResult
 from coalib.results.Result import RESULT_SEVERITY, Result
 from coalib.results.result_actions.ApplyPatchAction import ApplyPatchAction
@@ -235,14 +242,14 @@ class ProcessingTest(unittest.TestCase):
         #       is the same as expected will fail on Windows
         #       due to a problem with how coala handles path.
         self.assertEqual(self.unreadable_path.lower(),
-                         results[1].keys()[0].lower())
+                         list(results[1])[0].lower())
 
         # HACK: This is due to the problem with how coala handles paths
         #       that makes it problematic for Windows compatibility
-        self.unreadable_path = results[1].keys()[0]
+        self.unreadable_path = list(results[1])[0]
 
         self.assertEqual([bear.name for bear in self.global_bears['raw']],
-                         results[2].keys())
+                         list(results[2]))
 
         self.assertEqual(results[1][self.unreadable_path],
                          [Result('LocalTestRawBear', 'test msg')])
@@ -255,24 +262,6 @@ class ProcessingTest(unittest.TestCase):
     def test_process_queues(self):
         ctrlq = queue.Queue()
 
-        # Append custom controlling sequences.
-
-        # Simulated process 1
-        ctrlq.put((CONTROL_ELEMENT.LOCAL, 1))
-        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, None))
-        ctrlq.put((CONTROL_ELEMENT.GLOBAL, 1))
-
-        # Simulated process 2
-        ctrlq.put((CONTROL_ELEMENT.LOCAL, 2))
-
-        # Simulated process 1
-        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
-
-        # Simulated process 2
-        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, None))
-        ctrlq.put((CONTROL_ELEMENT.GLOBAL, 1))
-        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
-
         first_local = Result.from_values('o', 'The first result.', file='f')
         second_local = Result.from_values('ABear',
                                           'The second result.',
@@ -287,24 +276,46 @@ class ProcessingTest(unittest.TestCase):
                                           file='f',
                                           line=7)
         first_global = Result('o', 'The one and only global result.')
+        local_results_1 = [first_local,
+                           second_local,
+                           third_local,
+                           # The following are to be ignored
+                           Result('o', 'm', severity=RESULT_SEVERITY.INFO),
+                           Result.from_values('ABear', 'u', 'f', 2, 1),
+                           Result.from_values('ABear', 'u', 'f', 3, 1)]
+        local_results_2 = [fourth_local,
+                           # The following are to be ignored
+                           HiddenResult('t', 'c'),
+                           Result.from_values('ABear', 'u', 'f', 5, 1),
+                           Result.from_values('ABear', 'u', 'f', 6, 1)]
+
+        # Append custom controlling sequences.
+
+        # Simulated process 1
+        ctrlq.put((CONTROL_ELEMENT.LOCAL, [(1, local_results_1)]))
+        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, None))
+        ctrlq.put((CONTROL_ELEMENT.GLOBAL, (1, [first_global])))
+
+        # Simulated process 2
+        ctrlq.put((CONTROL_ELEMENT.LOCAL, [(2, local_results_2)]))
+
+        # Simulated process 1
+        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
+
+        # Simulated process 2
+        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, None))
+        ctrlq.put((CONTROL_ELEMENT.GLOBAL, (1, [first_global])))
+        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
+
         section = Section('')
         section.append(Setting('min_severity', 'normal'))
+        local_result_dict = {}
+        global_result_dict = {}
         process_queues(
             [DummyProcess(control_queue=ctrlq) for i in range(3)],
             ctrlq,
-            {1: [first_local,
-                 second_local,
-                 third_local,
-                 # The following are to be ignored
-                 Result('o', 'm', severity=RESULT_SEVERITY.INFO),
-                 Result.from_values('ABear', 'u', 'f', 2, 1),
-                 Result.from_values('ABear', 'u', 'f', 3, 1)],
-             2: [fourth_local,
-                 # The following are to be ignored
-                 HiddenResult('t', 'c'),
-                 Result.from_values('ABear', 'u', 'f', 5, 1),
-                 Result.from_values('ABear', 'u', 'f', 6, 1)]},
-            {1: [first_global]},
+            local_result_dict,
+            global_result_dict,
             {'f': self.file_dict[self.factory_test_file]},
             lambda *args: self.queue.put(args[2]),
             section,
@@ -317,6 +328,160 @@ class ProcessingTest(unittest.TestCase):
         self.assertEqual(self.queue.get(timeout=0), ([fourth_local]))
         self.assertEqual(self.queue.get(timeout=0), ([first_global]))
         self.assertEqual(self.queue.get(timeout=0), ([first_global]))
+        self.assertEqual(sorted(local_result_dict), [1, 2])
+        self.assertEqual(list(global_result_dict), [1])
+
+    def test_get_bear_groups(self):
+        class ABear(GlobalBear):
+            pass
+
+        class BBear(GlobalBear):
+            BEAR_DEPS = {ABear}
+
+        class CBear(GlobalBear):
+            pass
+
+        class DBear(GlobalBear):
+            BEAR_DEPS = {BBear, CBear}
+
+        class EBear(GlobalBear):
+            # Dependencies that are no global bears of the list are ignored
+            BEAR_DEPS = {Bear}
+
+        bears = [bear({}, Section('name'), self.queue)
+                 for bear in (DBear, EBear, CBear, BBear, ABear)]
+        bears.insert(2, 'invalid bear')
+        self.assertEqual(get_bear_groups(bears),
+                         [[3, 5, 4, 0], [1], [2]])
+        self.assertEqual(get_bear_groups([]), [])
+
+    def test_get_local_tasks(self):
+        class ABear(LocalBear):
+            pass
+
+        class BBear(LocalBear):
+            BEAR_DEPS = {ABear}
+
+        class CBear(LocalBear):
+            pass
+
+        class SpeedCache:
+            speeds = {'ABear': 1, 'BBear': 2, 'CBear': 10}
+
+            def get_seconds_per_byte(self, bear_name):
+                return self.speeds[bear_name]
+
+        bears = [bear(Section('name'), self.queue)
+                 for bear in (ABear, BBear, CBear)]
+        # testcode.c has 19 bytes, factory_test.txt 201
+        files = [self.testcode_c_path, 'non_existent_file',
+                 self.factory_test_file]
+        self.assertEqual(get_local_tasks(files, bears, SpeedCache()),
+                         [(self.factory_test_file, [2]),
+                          (self.factory_test_file, [0, 1]),
+                          (self.testcode_c_path, [2]),
+                          (self.testcode_c_path, [0, 1]),
+                          ('non_existent_file', [0, 1]),
+                          ('non_existent_file', [2])])
+
+        # Without a cache, larger files come first
+        self.assertEqual(get_local_tasks(files, bears[:1]),
+                         [(self.factory_test_file, [0]),
+                          (self.testcode_c_path, [0]),
+                          ('non_existent_file', [0])])
+
+        self.assertEqual(get_local_tasks(files[:2], []),
+                         [(self.testcode_c_path, []),
+                          ('non_existent_file', [])])
+
+        # Files are batched by size for groups with a batch size.
+        bears[0].BATCH_SIZE = 2
+        self.assertEqual(get_local_tasks(files, bears, SpeedCache()),
+                         [(self.factory_test_file, [2]),
+                          ((self.factory_test_file, self.testcode_c_path),
+                           [0, 1]),
+                          (self.testcode_c_path, [2]),
+                          ('non_existent_file', [2]),
+                          (('non_existent_file',), [0, 1])])
+
+    def test_process_queues_tasks(self):
+        ctrlq = queue.Queue()
+        first = Result.from_values('ABear', 'The first result.', file='f',
+                                   line=1)
+        second = Result.from_values('BBear', 'The second result.', file='f',
+                                    line=2)
+
+        # The bears of a file ran in different tasks
+        ctrlq.put((CONTROL_ELEMENT.LOCAL, [('f', [first])]))
+        ctrlq.put((CONTROL_ELEMENT.LOCAL, [('f', [second])]))
+        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, {'ABear': [1, 10]}))
+        ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, {}))
+        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
+        ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
+
+        class TimingCache:
+            timings = []
+
+            def add(self, timings):
+                self.timings.append(timings)
+
+        timing_cache = TimingCache()
+        local_result_dict = {}
+        process_queues(
+            [DummyProcess(control_queue=ctrlq) for i in range(3)],
+            ctrlq,
+            local_result_dict,
+            {},
+            {'f': ['first line\n', 'second line\n']},
+            lambda *args: self.queue.put(args[2]),
+            Section(''),
+            None,
+            self.log_printer,
+            self.console_printer,
+            timing_cache=timing_cache)
+
+        self.assertEqual(local_result_dict, {'f': [first, second]})
+        self.assertEqual(timing_cache.timings, [{'ABear': [1, 10]}])
+
+    def test_process_queues_patches(self):
+        ctrlq = queue.Queue()
+        with make_temp() as filename:
+            file = ['1\n', '2\n']
+            with open(filename, 'w') as handle:
+                handle.writelines(file)
+            results = []
+            for line in (1, 2):
+                diff = Diff(file)
+                diff.change_line(line, file[line - 1], 'changed\n')
+                results.append(Result('ABear', 'message',
+                                      diffs={filename: diff}))
+
+            ctrlq.put((CONTROL_ELEMENT.LOCAL, [(filename, results[:1])]))
+            ctrlq.put((CONTROL_ELEMENT.LOCAL, [(filename, results[1:])]))
+            ctrlq.put((CONTROL_ELEMENT.LOCAL_FINISHED, None))
+            ctrlq.put((CONTROL_ELEMENT.GLOBAL_FINISHED, None))
+
+            section = Section('')
+            section.append(Setting('default_actions',
+                                   'ABear: ApplyPatchAction'))
+            section.append(Setting('no_orig', True))
+            with patch('os.replace', wraps=os.replace) as replace:
+                process_queues([DummyProcess(control_queue=ctrlq)],
+                               ctrlq,
+                               {},
+                               {},
+                               {filename: file},
+                               lambda *args: self.queue.put(args[2]),
+                               section,
+                               None,
+                               self.log_printer,
+                               self.console_printer,
+                               debug=True)
+
+            # The file is written once, with both patches applied.
+            self.assertEqual(replace.call_count, 1)
+            with open(filename) as handle:
+                self.assertEqual(handle.readlines(), ['changed\n'] * 2)
 
     def test_dead_processes(self):
         ctrlq = queue.Queue()
@@ -378,6 +543,69 @@ class ProcessingTest(unittest.TestCase):
                          tuple,
                          msg='files in file_dict should not be editable')
 
+    def test_get_file_dict_lazy(self):
+        file_dict = get_file_dict([self.testcode_c_path], self.log_printer)
+        file = dict.__getitem__(file_dict, self.testcode_c_path)
+        self.assertNotIn('lines', file.__dict__)
+
+        subset = file_dict.subset([self.testcode_c_path, 'non_existent_file'])
+        self.assertIsInstance(subset, FileDict)
+        self.assertEqual(list(subset.keys()), [self.testcode_c_path])
+        self.assertNotIn('lines', file.__dict__)
+
+        lines = file_dict[self.testcode_c_path]
+        self.assertIs(file.lines, lines)
+        self.assertEqual(dict(file_dict.items()),
+                         {self.testcode_c_path: lines})
+        self.assertEqual(list(file_dict.values()), [lines])
+        self.assertEqual(len(file_dict.items()), 1)
+        self.assertIs(file_dict.get(self.testcode_c_path), lines)
+        self.assertIsNone(file_dict.get('non_existent_file'))
+
+    def test_instantiate_processes_lazy_files(self):
+        processes, arg_dict = instantiate_processes(
+            self.sections['cli'],
+            self.local_bears['cli'][:],
+            [],
+            1,
+            None,
+            None,
+            console_printer=self.console_printer,
+            debug=True)
+        file = dict.__getitem__(arg_dict['file_dict'], self.testcode_c_path)
+        self.assertNotIn('lines', file.__dict__)
+
+        # Global bears need the contents before patches may be applied
+        processes, arg_dict = instantiate_processes(
+            self.sections['cli'],
+            self.local_bears['cli'][:],
+            self.global_bears['cli'][:],
+            1,
+            None,
+            None,
+            console_printer=self.console_printer,
+            debug=True)
+        file = dict.__getitem__(arg_dict['file_dict'], self.testcode_c_path)
+        self.assertIn('lines', file.__dict__)
+
+        # So do the other tasks of a file if its bears are split into groups
+        local_bear, = self.local_bears['cli']
+
+        class OtherLocalTestBear(local_bear):
+            pass
+
+        processes, arg_dict = instantiate_processes(
+            self.sections['cli'],
+            [local_bear, OtherLocalTestBear],
+            [],
+            1,
+            None,
+            None,
+            console_printer=self.console_printer,
+            debug=True)
+        file = dict.__getitem__(arg_dict['file_dict'], self.testcode_c_path)
+        self.assertIn('lines', file.__dict__)
+
     def test_get_file_dict_non_existent_file(self):
         with LogCapture() as capture:
             file_dict = get_file_dict(['non_existent_file'], self.log_printer)
@@ -446,6 +674,18 @@ class ProcessingTest(unittest.TestCase):
                    SourceRange.from_values('e', 1, 1, 2, 2))]
         self.assertTrue(check_result_ignore(result, ranges))
 
+        # Overlapping ranges are looked at in the order of their lines, until
+        # they start after the result.
+        ranges = [([], SourceRange.from_values('e', 1, 1, 3, 1)),
+                  ([], SourceRange.from_values('e', 5, 1, 5, 2)),
+                  ([], SourceRange.from_values('e', 3, 5, 6, 1))]
+        result = Result.from_values('origin', 'message', file='e', line=3,
+                                    column=2, end_line=3, end_column=3)
+        self.assertFalse(check_result_ignore(result, ranges))
+        result = Result.from_values('origin', 'message', file='e', line=3,
+                                    column=2, end_line=3, end_column=6)
+        self.assertTrue(check_result_ignore(result, ranges))
+
     def test_ignore_glob(self):
         result = Result.from_values('LineLengthBear',
                                     'message',
@@ -480,7 +720,102 @@ class ProcessingTest(unittest.TestCase):
                    SourceRange.from_values('d', 1, 1, 2, 2))]
         self.assertFalse(check_result_ignore(result, ranges))
 
+    def test_ignore_range_index(self):
+        ranges = [([], SourceRange.from_values('a', 2, 3, 2, 5)),
+                  (['linelengthbear'], SourceRange.from_values('a', 4, 1, 6,
+                                                               1)),
+                  (['py*'], SourceRange.from_values('a', 5, 4, 9, 2)),
+                  ([], SourceRange.from_values('a', 12, 1, 14, 8)),
+                  (['space*'], SourceRange.from_values('a', 13, 2)),
+                  ([], SourceRange.from_values('b', 3, 1, 3, 8)),
+                  (['pylintbear'], SourceRange.from_values('b', None)),
+                  (['linelengthbear'], SourceRange.from_values('c', 8))]
+        index = IgnoreRangeIndex(ranges)
+
+        def brute_force(result):
+            origin = result.origin.lower().split(' ')[0]
+            return any(
+                result.overlaps(range) and
+                (not bears or origin in bears or fnmatch(origin, bears))
+                for bears, range in ranges)
+
+        positions = [(None, None, None, None)] + [
+            (line, column, end_line, end_column)
+            for line in range(1, 16)
+            for column in (None, 1, 4, 9)
+            for end_line in (line, line + 1)
+            for end_column in (None, 2, 6)
+            if (column is None and end_column is None or
+                column is not None and end_column is not None and
+                (end_line > line or end_column >= column))]
+        for origin in ('LineLengthBear', 'PyLintBear (E1)',
+                       'SpaceConsistencyBear', 'OtherBear'):
+            for filename in ('a', 'b', 'c', 'd'):
+                for line, column, end_line, end_column in positions:
+                    result = Result.from_values(origin, 'message', filename,
+                                                line, column, end_line,
+                                                end_column)
+                    with self.subTest(result=result):
+                        self.assertEqual(index.is_ignored(result),
+                                         brute_force(result))
+                        self.assertEqual(check_result_ignore(result, index),
+                                         brute_force(result))
+
+        # Ranges can be added after querying.
+        result = Result.from_values('OtherBear', 'message', 'd', 1)
+        self.assertFalse(index.is_ignored(result))
+        index.add([], SourceRange.from_values('d', 1, 1, 1, 2))
+        self.assertTrue(index.is_ignored(result))
+
+    def test_ignore_range_index_lazy(self):
+        class CountingDict(dict):
+            accessed = []
+
+            def get(self, key, default=None):
+                self.accessed.append(key)
+                return super().get(key, default)
+
+        file_dict = CountingDict({'a': ('x  # Ignore ABear\n', 'y\n'),
+                                  os.path.abspath('b'): ('y  # noqa\n',),
+                                  'raw': None})
+        index = IgnoreRangeIndex(file_dict=file_dict)
+        self.assertEqual(file_dict.accessed, [])
+
+        self.assertTrue(index.is_ignored(
+            Result.from_values('ABear', 'message', 'a', 2)))
+        self.assertFalse(index.is_ignored(
+            Result.from_values('BBear', 'message', 'a', 2)))
+        self.assertTrue(index.is_ignored(
+            Result.from_values('BBear', 'message', 'b', 1)))
+        self.assertFalse(index.is_ignored(
+            Result.from_values('BBear', 'message', 'raw', 1)))
+        self.assertFalse(index.is_ignored(
+            Result.from_values('BBear', 'message', 'unknown', 1)))
+        # Each file is scanned only once.
+        self.assertEqual(file_dict.accessed,
+                         ['a', os.path.abspath('b'), 'raw'])
+
+    def test_get_file_ignore_ranges(self):
+        cache = FileCache(self.log_printer, 'coala_ignore_test',
+                          flush_cache=True)
+        file = ('x  # Ignore ABear\n', 'y\n')
+        ranges = get_file_ignore_ranges('f', file, cache)
+        self.assertEqual(ranges, list(yield_ignore_ranges({'f': file})))
+        cache.write()
+
+        cache = FileCache(self.log_printer, 'coala_ignore_test')
+        with patch('coalib.processes.Processing.get_ignore_lines') as scan:
+            self.assertEqual(get_file_ignore_ranges('f', file, cache), ranges)
+            self.assertFalse(scan.called)
+
+        # Changed files are scanned again.
+        self.assertEqual(
+            get_file_ignore_ranges('f', ('x\n', 'y  # noqa\n'), cache),
+            [([], SourceRange.from_values('f', 2, 1, 2, 10))])
+
     def test_yield_ignore_ranges(self):
+        self.assertEqual(list(yield_ignore_ranges({'raw': None})), [])
+
         test_file_dict_a = {'f': self.file_dict[self.a_bear_test_path]}
         test_ignore_range_a = list(yield_ignore_ranges(test_file_dict_a))
         for test_bears, test_source_range in test_ignore_range_a:
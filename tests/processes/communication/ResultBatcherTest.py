@@ -0,0 +1,60 @@
+import queue
+import unittest
+from unittest.mock import patch
+
+from coalib.processes.CONTROL_ELEMENT import CONTROL_ELEMENT
+from coalib.processes.communication.ResultBatcher import ResultBatcher
+
+
+class ResultBatcherTest(unittest.TestCase):
+
+    def setUp(self):
+        self.control_queue = queue.Queue()
+
+    def test_max_results(self):
+        uut = ResultBatcher(self.control_queue, max_results=3, max_delay=10)
+        uut['a'] = [1, 2]
+        uut['b'] = []
+        self.assertTrue(self.control_queue.empty())
+
+        uut['c'] = [3]
+        self.assertEqual(self.control_queue.get(timeout=0),
+                         (CONTROL_ELEMENT.LOCAL,
+                          [('a', [1, 2]), ('b', []), ('c', [3])]))
+
+        uut['d'] = [4, 5]
+        self.assertTrue(self.control_queue.empty())
+
+    @patch('coalib.processes.communication.ResultBatcher.time.monotonic')
+    def test_max_delay(self, monotonic):
+        uut = ResultBatcher(self.control_queue, max_delay=1)
+        monotonic.return_value = 5
+        uut['a'] = [1]
+        monotonic.return_value = 5.5
+        uut['b'] = [2]
+        self.assertTrue(self.control_queue.empty())
+
+        monotonic.return_value = 6
+        uut['c'] = []
+        self.assertEqual(self.control_queue.get(timeout=0),
+                         (CONTROL_ELEMENT.LOCAL,
+                          [('a', [1]), ('b', [2]), ('c', [])]))
+
+        # The delay counts from the first result of the new batch
+        monotonic.return_value = 6.5
+        uut['d'] = [3]
+        monotonic.return_value = 7
+        uut['e'] = [4]
+        self.assertTrue(self.control_queue.empty())
+
+    def test_flush(self):
+        uut = ResultBatcher(self.control_queue)
+        uut.flush()
+        self.assertTrue(self.control_queue.empty())
+
+        uut['a'] = [1]
+        uut.flush()
+        self.assertEqual(self.control_queue.get(timeout=0),
+                         (CONTROL_ELEMENT.LOCAL, [('a', [1])]))
+        uut.flush()
+        self.assertTrue(self.control_queue.empty())
@@ -1,5 +1,6 @@
 import json
 import logging
+import pickle
 import unittest
 
 from unidiff.errors import UnidiffParseError
@@ -202,6 +203,53 @@ class DiffTest(unittest.TestCase):
         uut.rename = 'other.py'
         self.assertRaises(ConflictError, other.__add__, uut)
 
+    def test_addition_shared_changes(self):
+        file = ('1\n', '2\n', '3\n')
+        uut = Diff(file)
+        uut.modify_line(1, 'a\n')
+        other = Diff(list(file))
+        other.delete_line(2)
+        other.add_lines(3, ['4\n'])
+
+        result = uut + other
+        self.assertEqual(result.modified, ['a\n', '3\n', '4\n'])
+        self.assertEqual(result.range('f').start.line, 1)
+        self.assertEqual(result.range('f').end.line, 3)
+
+        # Changing the sum does not change the summands sharing changes.
+        result.add_lines(2, ['2.1\n'])
+        result.modify_line(3, 'c\n')
+        self.assertEqual(result.modified, ['a\n', '2.1\n', 'c\n', '4\n'])
+        self.assertEqual(uut.modified, ['a\n', '2\n', '3\n'])
+        self.assertEqual(other.modified, ['1\n', '3\n', '4\n'])
+
+        # Conflicting changes are still detected.
+        conflicting = Diff(file)
+        conflicting.modify_line(2, 'b\n')
+        self.assertRaises(ConflictError, other.__add__, conflicting)
+        self.assertEqual(other.modified, ['1\n', '3\n', '4\n'])
+
+    def test_shared_file(self):
+        file = ('1\n', '2\n')
+        uut = Diff(file)
+        self.assertIs(uut._file, file)
+        self.assertEqual(uut, Diff(list(file)))
+
+        # The cached files are not pickled.
+        uut.modify_line(1, 'a\n')
+        self.assertEqual(uut.original, list(file))
+        self.assertEqual(uut.modified, ['a\n', '2\n'])
+        state = uut.__getstate__()
+        self.assertNotIn('_original_cache', state)
+        self.assertNotIn('_modified_cache', state)
+        self.assertEqual(pickle.loads(pickle.dumps(uut)), uut)
+
+        # A returned file can be changed without changing the diff.
+        uut.modified.append('3\n')
+        self.assertEqual(uut.modified, ['a\n', '2\n'])
+        uut.delete = True
+        self.assertEqual(uut.modified, [])
+
     def test_from_string_arrays(self):
         a = ['q\n', 'a\n', 'b\n', 'x\n', 'c\n', 'd\n']
         b = ['a\n', 'b\n', 'y\n', 'c\n', 'd\n', 'f\n']
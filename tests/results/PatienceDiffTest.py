@@ -0,0 +1,78 @@
+import random
+import unittest
+
+from coalib.results.Diff import Diff
+from coalib.results.PatienceDiff import get_matching_blocks, get_opcodes
+
+
+def apply_opcodes(a, b, opcodes):
+    result = []
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == 'equal':
+            assert a[i1:i2] == b[j1:j2]
+            result.extend(a[i1:i2])
+        else:
+            result.extend(b[j1:j2])
+    return result
+
+
+class PatienceDiffTest(unittest.TestCase):
+
+    def test_empty(self):
+        self.assertEqual(get_opcodes([], []), [])
+        self.assertEqual(get_opcodes([], ['a']), [('insert', 0, 0, 0, 1)])
+        self.assertEqual(get_opcodes(['a'], []), [('delete', 0, 1, 0, 0)])
+        self.assertEqual(get_opcodes(['a'], ['a']), [('equal', 0, 1, 0, 1)])
+
+    def test_unique_lines(self):
+        a = ['def f():\n', '    pass\n', '\n', 'def g():\n', '    pass\n']
+        b = ['def g():\n', '    pass\n', '\n', 'def f():\n', '    pass\n']
+        # The common suffix is matched first, then the longest increasing
+        # sequence of the lines occurring once in both.
+        self.assertEqual(get_matching_blocks(a, b), [(1, 1, 2), (4, 4, 1)])
+
+    def test_random_sequences(self):
+        rand = random.Random(42)
+        for _ in range(500):
+            a = [rand.choice('abcd') for _ in range(rand.randrange(20))]
+            b = [rand.choice('abcde') for _ in range(rand.randrange(20))]
+            opcodes = get_opcodes(a, b)
+            self.assertEqual(apply_opcodes(a, b, opcodes), b)
+
+            blocks = get_matching_blocks(a, b)
+            for (i, j, size), (next_i, next_j, _) in zip(blocks, blocks[1:]):
+                self.assertLessEqual(i + size, next_i)
+                self.assertLessEqual(j + size, next_j)
+
+    def test_large_repetitive_file(self):
+        a = ['\n' if index % 3 else '}\n' for index in range(30000)]
+        b = list(a)
+        for index in (10, 5000, 20000):
+            b.insert(index, 'pass\n')
+
+        opcodes = [opcode for opcode in get_opcodes(a, b)
+                   if opcode[0] != 'equal']
+        self.assertEqual(opcodes, [('insert', 10, 10, 10, 11),
+                                   ('insert', 4999, 4999, 5000, 5001),
+                                   ('insert', 19998, 19998, 20000, 20001)])
+
+        diff = Diff.from_string_arrays(a, b)
+        self.assertEqual(diff.modified, b)
+        self.assertEqual(diff.stats(), (3, 0))
+
+    def test_too_expensive_ranges(self):
+        # Ranges that differ completely would take quadratic time, the search
+        # for an edit script gives up on them.
+        rand = random.Random(42)
+        a = ['    value_{} = {}\n'.format(index, rand.randrange(1000))
+             if index % 5 else '\n'
+             for index in range(5000)]
+        reindented = ['    ' + line if line.strip() else line for line in a]
+        self.assertEqual(get_opcodes(a, reindented),
+                         [('equal', 0, 1, 0, 1),
+                          ('replace', 1, 5000, 1, 5000)])
+
+        shuffled = list(a)
+        rand.shuffle(shuffled)
+        for b in (shuffled, a[::-1]):
+            self.assertEqual(apply_opcodes(a, b, get_opcodes(a, b)), b)
@@ -1,11 +1,13 @@
 import unittest
 import os
 from os.path import isfile
+from unittest.mock import patch
 
 from coala_utils.ContextManagers import make_temp
 from coalib.results.Diff import Diff
 from coalib.results.Result import Result
-from coalib.results.result_actions.ApplyPatchAction import ApplyPatchAction
+from coalib.results.result_actions.ApplyPatchAction import (
+    ApplyPatchAction, DeferredFileDiffDict, write_patched_file)
 from coalib.settings.Section import Section
 
 
@@ -122,6 +124,85 @@ class ApplyPatchActionTest(unittest.TestCase):
             # Recreate file so that context manager make_temp() can delete it
             open(f_a, 'w').close()
 
+    def test_apply_deferred(self):
+        uut = ApplyPatchAction()
+        with make_temp() as f_a, make_temp() as f_b:
+            file_dict = {f_a: ['1\n', '2\n', '3\n'],
+                         f_b: ['1\n', '2\n', '3\n']}
+            for filename in file_dict:
+                with open(filename, 'w') as file:
+                    file.writelines(file_dict[filename])
+            os.chmod(f_a, 0o640)
+
+            file_diff_dict = DeferredFileDiffDict()
+            for line in range(1, 4):
+                diff = Diff(file_dict[f_a])
+                diff.change_line(line, file_dict[f_a][line - 1], 'changed\n')
+                uut.apply(Result('origin', 'msg', diffs={f_a: diff}),
+                          file_dict,
+                          file_diff_dict)
+            diff = Diff(file_dict[f_b], rename=f_b + '.renamed')
+            diff.delete_line(1)
+            uut.apply(Result('origin', 'msg', diffs={f_b: diff}),
+                      file_dict,
+                      file_diff_dict,
+                      no_orig=True)
+
+            # Nothing is written before the end, except for the backups.
+            with open(f_a) as file:
+                self.assertEqual(file.readlines(), file_dict[f_a])
+            self.assertTrue(isfile(f_a + '.orig'))
+            self.assertFalse(isfile(f_b + '.orig'))
+            self.assertFalse(isfile(f_b + '.renamed'))
+
+            with patch('os.replace', wraps=os.replace) as replace:
+                file_diff_dict.write()
+            self.assertEqual(sorted(call[0][1]
+                                    for call in replace.call_args_list),
+                             sorted([f_a, f_b + '.renamed']))
+            self.assertEqual(file_diff_dict.pending, {})
+
+            with open(f_a) as file:
+                self.assertEqual(file.readlines(), ['changed\n'] * 3)
+            self.assertEqual(os.stat(f_a).st_mode & 0o777, 0o640)
+            with open(f_a + '.orig') as file:
+                self.assertEqual(file.readlines(), file_dict[f_a])
+            with open(f_b + '.renamed') as file:
+                self.assertEqual(file.readlines(), ['2\n', '3\n'])
+            self.assertFalse(isfile(f_b))
+            # No temporary files are left behind.
+            self.assertEqual(
+                sorted(name for name in os.listdir(os.path.dirname(f_a))
+                       if name.startswith('.' + os.path.basename(f_a)) or
+                       name.startswith('.' + os.path.basename(f_b))),
+                [])
+
+            os.remove(f_a + '.orig')
+            os.remove(f_b + '.renamed')
+            # Recreate file so that context manager make_temp() can delete it
+            open(f_b, 'w').close()
+
+    def test_write_patched_file(self):
+        with make_temp() as f_a:
+            diff = Diff(['1\n', '2\n'])
+            diff.delete_line(1)
+            with patch('shutil.copymode', side_effect=PermissionError):
+                self.assertRaises(PermissionError,
+                                  write_patched_file, diff, f_a)
+            # The file is untouched and the temporary file is removed.
+            with open(f_a) as file:
+                self.assertEqual(file.read(), '')
+            self.assertEqual(
+                [name for name in os.listdir(os.path.dirname(f_a))
+                 if name.startswith('.' + os.path.basename(f_a))],
+                [])
+
+            # Files that are not on the disk are created.
+            os.remove(f_a)
+            write_patched_file(diff, f_a)
+            with open(f_a) as file:
+                self.assertEqual(file.readlines(), ['2\n'])
+
     def test_apply_delete(self):
         uut = ApplyPatchAction()
         with make_temp() as f_a:
@@ -1,8 +1,12 @@
+import os
 import unittest
 from os.path import exists
 
 from coala_utils.ContextManagers import make_temp
+from coalib.results.Diff import Diff
 from coalib.results.Result import Result
+from coalib.results.result_actions.ApplyPatchAction import (
+    ApplyPatchAction, DeferredFileDiffDict)
 from coalib.results.result_actions.IgnoreResultAction import IgnoreResultAction
 
 
@@ -132,3 +136,33 @@ class IgnoreResultActionTest(unittest.TestCase):
                 ['1  {# Ignore else #}\n', '2\n'])
             with open(f_a, 'r') as f:
                 self.assertEqual(file_diff_dict[f_a].modified, f.readlines())
+
+    def test_ignore_deferred(self):
+        uut = IgnoreResultAction()
+        with make_temp() as f_a:
+            file_dict = {
+                f_a: ['1\n', '2\n', '3\n']
+            }
+            with open(f_a, 'w') as f:
+                f.writelines(file_dict[f_a])
+
+            file_diff_dict = DeferredFileDiffDict()
+            diff = Diff(file_dict[f_a], rename=f_a + '.renamed')
+            diff.change_line(3, '3\n', '3_changed\n')
+            ApplyPatchAction().apply(Result('origin', 'msg',
+                                            diffs={f_a: diff}),
+                                     file_dict, file_diff_dict, no_orig=True)
+
+            # The pending patch renames the file, it is written first.
+            uut.apply(Result.from_values('origin', 'msg', f_a, 2),
+                      file_dict, file_diff_dict, 'c', no_orig=True)
+            self.assertEqual(file_diff_dict.pending, {})
+            self.assertFalse(exists(f_a))
+            with open(f_a + '.renamed', 'r') as f:
+                self.assertEqual(
+                    f.readlines(),
+                    ['1\n', '2  // Ignore origin\n', '3_changed\n'])
+
+            os.remove(f_a + '.renamed')
+            # Recreate file so that context manager make_temp() can delete it
+            open(f_a, 'w').close()
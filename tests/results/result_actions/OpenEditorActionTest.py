@@ -9,7 +9,8 @@ import coalib.results.result_actions.OpenEditorAction
 from coalib.results.Diff import Diff
 from coalib.results.Result import Result
 from coalib.results.result_actions.OpenEditorAction import OpenEditorAction
-from coalib.results.result_actions.ApplyPatchAction import ApplyPatchAction
+from coalib.results.result_actions.ApplyPatchAction import (
+    ApplyPatchAction, DeferredFileDiffDict)
 from coalib.settings.Section import Section, Setting
 
 
@@ -123,6 +124,42 @@ class OpenEditorActionTest(unittest.TestCase):
         self.assertEqual(file_dict, expected_file_dict)
         open(self.fa, 'w').close()
 
+    def test_apply_deferred(self):
+        file_dict = {self.fa: ['1\n', '2\n', '3\n'],
+                     self.fb: ['1\n', '2\n', '3\n']}
+        for filename in file_dict:
+            with open(filename, 'w') as handle:
+                handle.writelines(file_dict[filename])
+
+        file_diff_dict = DeferredFileDiffDict()
+        for filename in file_dict:
+            diff = Diff(file_dict[filename])
+            diff.change_line(3, '3\n', '3_changed\n')
+            ApplyPatchAction().apply(
+                Result('origin', 'msg', diffs={filename: diff}),
+                file_dict,
+                file_diff_dict,
+                no_orig=True)
+
+        section = Section('')
+        section.append(Setting('editor', 'vim'))
+        subprocess.call = self.fake_edit
+        OpenEditorAction().apply_from_section(
+            Result.from_values('origin', 'msg', self.fa),
+            file_dict,
+            file_diff_dict,
+            section)
+
+        # Only the patches of the edited file are written before it is
+        # opened.
+        self.assertEqual(file_diff_dict.pending, {self.fb: self.fb})
+        with open(self.fa) as handle:
+            self.assertEqual(handle.readlines(), ['1\n', '3_changed\n'])
+        self.assertEqual(file_diff_dict[self.fa].modified,
+                         ['1\n', '3_changed\n'])
+        with open(self.fb) as handle:
+            self.assertEqual(handle.readlines(), file_dict[self.fb])
+
     def test_is_applicable(self):
         result1 = Result('', '')
         result2 = Result.from_values('', '', '')